@@ -1,14 +1,15 @@
 import streamlit as st
-import anthropic
 import os
+import clients
+import llm
+import telemetry
 os.environ["ANTHROPIC_API_KEY"] = st.secrets["ANTHROPIC_API_KEY"]
 my_api_key = st.secrets['ANTHROPIC_API_KEY']
 
-client = anthropic.Anthropic(
-    # defaults to os.environ.get("ANTHROPIC_API_KEY")
-  api_key = my_api_key
-)
-message = client.messages.create(
+# Shared across reruns and sessions, keeping its connections open
+client = clients.anthropic_client(my_api_key)
+message = llm.anthropic_text(
+    client,
     model="claude-3-5-sonnet-20240620",
     max_tokens=1000,
     temperature=0,
@@ -25,4 +26,6 @@ message = client.messages.create(
         }
     ]
 )
-st.write(message.content)
+st.write(message)
+llm.show_cache_stats()
+telemetry.show_telemetry()
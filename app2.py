@@ -1,98 +1,98 @@
 import streamlit as st
-import yfinance as yf
-import anthropic
-import os
-from bs4 import BeautifulSoup
-import plotly.graph_objects as go
-from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+import clients
+import llm
+import price_store
+import telemetry
+from digest import fundamentals_digest
+import prompts
+from snapshot import get_snapshot
+from panel import PricePanel
+from charts import comparison_chart, correlation_chart
+from pipeline import Pipeline
 
-# Initialize Anthropic client
-client = anthropic.Anthropic(api_key=st.secrets["ANTHROPIC_API_KEY"])
+# Shared Anthropic client (kept across reruns)
+client = clients.anthropic_client(st.secrets["ANTHROPIC_API_KEY"])
+
+# Maximum number of tickers analyzed at the same time (each runs three LLM calls)
+MAX_CONCURRENT_ANALYSES = int(st.secrets.get("MAX_CONCURRENT_ANALYSES", 4))
+
+# How the per-ticker analyses are requested: one structured JSON call for the
+# whole peer set, one per ticker, or the original three separate calls per ticker
+ANALYSIS_MODES = {
+    "Peer set (one call)": "peer_set",
+    "Per ticker (one call each)": "per_ticker",
+    "Separate calls (three per ticker)": "separate",
+}
+DEFAULT_ANALYSIS_MODE = st.secrets.get("ANALYSIS_MODE", "peer_set")
+if DEFAULT_ANALYSIS_MODE not in ANALYSIS_MODES.values():
+    DEFAULT_ANALYSIS_MODE = "peer_set"
+
+# Output tokens per ticker in a structured reply, as the three separate calls
+# allowed (300 + 300 + 500). Peer sets that would exceed the model's output
+# limit are split into batches analyzed concurrently.
+ANALYSIS_TOKENS_PER_TICKER = 1100
+MAX_OUTPUT_TOKENS = 4096
+PEER_BATCH_SIZE = max(1, MAX_OUTPUT_TOKENS // ANALYSIS_TOKENS_PER_TICKER)
 
 
 def get_tickers(company):
-    prompt = f"As a financial investor, provide the stock ticker for {company} and 5 other tickers for competitors in the same industry of comparable size and strategy. Format the response as a comma-separated list of tickers only."
+    prompt = prompts.tickers_prompt(company)
     
-    response = client.messages.create(
+    response = llm.anthropic_text(
+        client,
         model="claude-3-sonnet-20240229",
         max_tokens=300,
-        system="You are a financial investor, respond with facts and focused messages.",
+        system=prompts.INVESTOR_SYSTEM,
         messages=[{"role": "user", "content": prompt}]
     )
     
-    tickers = response.content[0].text.strip().split(',')
+    tickers = response.strip().split(',')
     return [ticker.strip() for ticker in tickers]
 
+# Closes and OHLCV of the whole peer set on one shared date index
 def get_stock_data(tickers, period='5y'):
-    data = {}
-    for ticker in tickers:
-        stock = yf.Ticker(ticker)
-        data[ticker] = stock.history(period=period)
-    return data
-
-def plot_stock_data(data, period='5y'):
-    fig = go.Figure()
-    for ticker, df in data.items():
-        fig.add_trace(go.Scatter(x=df.index, y=df['Close'], mode='lines', name=ticker))
-    
-    fig.update_layout(
-        title='Stock Price Comparison',
-        xaxis_title='Date',
-        yaxis_title='Price',
-        hovermode='x unified'
-    )
-    
-    # Add range slider and buttons
-    fig.update_xaxes(
-        rangeslider_visible=True,
-        rangeselector=dict(
-            buttons=list([
-                dict(count=1, label="1m", step="month", stepmode="backward"),
-                dict(count=6, label="6m", step="month", stepmode="backward"),
-                dict(count=1, label="YTD", step="year", stepmode="todate"),
-                dict(count=1, label="1y", step="year", stepmode="backward"),
-                dict(step="all")
-            ])
-        )
-    )
-    
-    return fig
+    return PricePanel.load(tickers, period=period)
+
+def get_fundamentals(ticker):
+    stock = get_snapshot(ticker)
+    return fundamentals_digest(stock.financials, stock.info, stock.news)
 
 def analyze_ticker(ticker):
-    stock = yf.Ticker(ticker)
-    financials = stock.financials
-    info = stock.info
-    news = stock.news
+    fundamentals = get_fundamentals(ticker)
     
     # Sentiment analysis
-    sentiment_prompt = f"As a financial investor, analyze the sentiment of the following financial data and news for {ticker}:\n\nFinancials: {financials}\n\nInfo: {info}\n\nNews: {news}\n\nProvide a concise sentiment analysis."
-    sentiment_response = client.messages.create(
+    sentiment_prompt = prompts.sentiment_prompt(ticker, fundamentals)
+    sentiment_response = llm.anthropic_text(
+        client,
         model="claude-3-sonnet-20240229",
         max_tokens=300,
-        system="You are a financial investor, respond with facts and focused messages.",
+        system=prompts.INVESTOR_SYSTEM,
         messages=[{"role": "user", "content": sentiment_prompt}]
     )
-    sentiment = sentiment_response.content[0].text.strip()
+    sentiment = sentiment_response.strip()
     
     # Analyst consensus
-    consensus_prompt = f"As a financial investor, provide the analyst consensus for {ticker} based on available data."
-    consensus_response = client.messages.create(
+    consensus_prompt = prompts.consensus_prompt(ticker)
+    consensus_response = llm.anthropic_text(
+        client,
         model="claude-3-sonnet-20240229",
         max_tokens=300,
-        system="You are a financial investor, respond with facts and focused messages.",
+        system=prompts.INVESTOR_SYSTEM,
         messages=[{"role": "user", "content": consensus_prompt}]
     )
-    consensus = consensus_response.content[0].text.strip()
+    consensus = consensus_response.strip()
     
     # Overall analysis
-    analysis_prompt = f"As a financial investor, provide an overall analysis and detailed financial numbers for {ticker} within its industry."
-    analysis_response = client.messages.create(
+    analysis_prompt = prompts.analysis_prompt(ticker)
+    analysis_response = llm.anthropic_text(
+        client,
         model="claude-3-sonnet-20240229",
         max_tokens=500,
-        system="You are a financial investor, respond with facts and focused messages.",
+        system=prompts.INVESTOR_SYSTEM,
         messages=[{"role": "user", "content": analysis_prompt}]
     )
-    analysis = analysis_response.content[0].text.strip()
+    analysis = analysis_response.strip()
     
     return {
         'sentiment': sentiment,
@@ -100,52 +100,150 @@ def analyze_ticker(ticker):
         'analysis': analysis
     }
 
-def generate_recommendation(company, analyses):
-    prompt = f"As a financial investor, based on the following analyses for {company} and its competitors, provide a recommendation (Buy, Hold, or Sell) with a short explanation:\n\n"
-    for ticker, analysis in analyses.items():
-        prompt += f"{ticker}:\nSentiment: {analysis['sentiment']}\nConsensus: {analysis['consensus']}\nAnalysis: {analysis['analysis']}\n\n"
+# Structured analyses of one batch. A reply that is cut off or does not parse
+# raises ValueError and is not cached, so a rerun asks again.
+def analyze_batch(fundamentals):
+    return llm.anthropic_text(
+        client,
+        parse=lambda reply: prompts.parse_structured_analysis(reply, list(fundamentals)),
+        model="claude-3-sonnet-20240229",
+        max_tokens=ANALYSIS_TOKENS_PER_TICKER * len(fundamentals),
+        system=prompts.INVESTOR_SYSTEM,
+        messages=[{"role": "user", "content": prompts.structured_analysis_prompt(fundamentals)}]
+    )
+
+# Sentiment, consensus, analysis and metrics of several tickers from JSON
+# replies of up to PEER_BATCH_SIZE tickers each. Tickers that are missing from
+# a reply or fail validation (or the whole batch, if its request fails or its
+# reply is cut off or does not parse) fall back to the separate calls.
+def analyze_structured(tickers):
+    fundamentals = {}
+    with ThreadPoolExecutor(max_workers=max(1, MAX_CONCURRENT_ANALYSES)) as executor:
+        futures = {ticker: executor.submit(get_fundamentals, ticker) for ticker in tickers}
+        for ticker, future in futures.items():
+            try:
+                fundamentals[ticker] = future.result()
+            except Exception:
+                pass  # Analyzed by the fallback, which reports the error
+    
+        items = list(fundamentals.items())
+        batches = [dict(items[i:i + PEER_BATCH_SIZE]) for i in range(0, len(items), PEER_BATCH_SIZE)]
+        analyses = {}
+        for future in [executor.submit(analyze_batch, batch) for batch in batches]:
+            try:
+                analyses.update(future.result())
+            except Exception:
+                pass  # The batch's tickers go to the fallback, which reports errors per ticker
+    
+    missing = [ticker for ticker in tickers if ticker not in analyses]
+    if missing:
+        # Shown in the performance panel, so frequent parse failures are visible
+        with telemetry.span("app2.analysis_fallback", "stage", tickers=len(missing)):
+            analyses.update(analyze_tickers(missing))
+    return {ticker: analyses[ticker] for ticker in tickers}
+
+def analyze_ticker_structured(ticker):
+    return analyze_structured([ticker])[ticker]
+
+# Analyze several tickers concurrently; results keep the ticker order and a
+# failing ticker is reported in its own entry instead of aborting the others
+def analyze_tickers(tickers, max_workers=MAX_CONCURRENT_ANALYSES, analyze=analyze_ticker):
+    analyses = {}
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = [executor.submit(analyze, ticker) for ticker in tickers]
+        for ticker, future in zip(tickers, futures):
+            try:
+                analyses[ticker] = future.result()
+            except Exception as e:
+                error = f"Analysis unavailable ({e})"
+                analyses[ticker] = {
+                    'sentiment': error,
+                    'consensus': error,
+                    'analysis': error
+                }
+    return analyses
+
+def generate_recommendation(company, analyses, stream=False):
+    prompt = prompts.recommendation_prompt(company, analyses)
     
-    response = client.messages.create(
+    params = dict(
         model="claude-3-sonnet-20240229",
         max_tokens=500,
-        system="You are a financial investor, respond with facts and focused messages.",
+        system=prompts.INVESTOR_SYSTEM,
         messages=[{"role": "user", "content": prompt}]
     )
+    # With stream=True the text chunks are returned as they arrive, e.g. for st.write_stream
+    if stream:
+        return llm.anthropic_stream(client, **params)
     
-    return response.content[0].text.strip()
+    return llm.anthropic_text(client, **params).strip()
 
-def get_key_metrics(company, recommendation):
-    prompt = f"As a financial investor, based on the following recommendation for {company}, provide the key financial metrics supporting it:\n\n{recommendation}"
+def get_key_metrics(company, recommendation, stream=False):
+    prompt = prompts.key_metrics_prompt(company, recommendation)
     
-    response = client.messages.create(
+    params = dict(
         model="claude-3-sonnet-20240229",
         max_tokens=500,
-        system="You are a financial investor, respond with facts and focused messages.",
+        system=prompts.INVESTOR_SYSTEM,
         messages=[{"role": "user", "content": prompt}]
     )
+    if stream:
+        return llm.anthropic_stream(client, **params)
     
-    return response.content[0].text.strip()
+    return llm.anthropic_text(client, **params).strip()
 
 # Streamlit app
 st.title("Investor Analysis App")
 
 company = st.text_input("Enter a company name:")
+period = st.selectbox("Chart period", ['1y', '2y', '5y', '10y'], index=2)
+rebase = st.toggle("Rebase prices to 100", value=True)
+mode = ANALYSIS_MODES[st.selectbox("Analysis mode", list(ANALYSIS_MODES), index=list(ANALYSIS_MODES.values()).index(DEFAULT_ANALYSIS_MODE))]
 
 if company:
-    tickers = get_tickers(company)
-    stock_data = get_stock_data(tickers)
-    
-    st.plotly_chart(plot_stock_data(stock_data))
-    
-    analyses = {}
-    for ticker in tickers:
-        analyses[ticker] = analyze_ticker(ticker)
-    
-    recommendation = generate_recommendation(company, analyses)
-    key_metrics = get_key_metrics(company, recommendation)
+    # Each stage re-executes only when one of its inputs changed, so changing the
+    # chart period refetches prices without repeating any of the LLM calls
+    pipeline = Pipeline("app2", {'company': company, 'period': period, 'mode': mode}, st.session_state)
+    
+    @pipeline.stage(inputs=('company',))
+    def tickers(company):
+        return get_tickers(company)
+    
+    # Prices are read again once per price store refresh interval
+    @pipeline.stage(inputs=('tickers', 'period'), ttl=price_store.REFRESH_SECONDS)
+    def stock_data(tickers, period):
+        return get_stock_data(tickers, period)
+    
+    @pipeline.stage(inputs=('tickers', 'mode'))
+    def analyses(tickers, mode):
+        if mode == 'peer_set':
+            return analyze_structured(tickers)
+        if mode == 'per_ticker':
+            return analyze_tickers(tickers, analyze=analyze_ticker_structured)
+        return analyze_tickers(tickers)
+    
+    # Freshly generated sections stream into the page as the tokens arrive
+    @pipeline.stage(inputs=('company', 'analyses'))
+    def recommendation(company, analyses):
+        return recommendation_slot.write_stream(generate_recommendation(company, analyses, stream=True)).strip()
+    
+    @pipeline.stage(inputs=('company', 'recommendation'))
+    def key_metrics(company, recommendation):
+        return metrics_slot.write_stream(get_key_metrics(company, recommendation, stream=True))
+    
+    prices = pipeline.run('stock_data')
+    st.plotly_chart(comparison_chart(prices, rebase=rebase))
+    # The company against each competitor
+    if not prices.empty and len(prices.tickers) > 1:
+        st.plotly_chart(correlation_chart(prices, prices.tickers[0]))
     
     st.subheader("Investment Recommendation")
-    st.write(recommendation)
+    recommendation_slot = st.empty()
+    recommendation_slot.write(pipeline.run('recommendation'))
     
     st.subheader("Key Financial Metrics")
-    st.write(key_metrics)
+    metrics_slot = st.empty()
+    metrics_slot.write(pipeline.run('key_metrics'))
+
+llm.show_cache_stats()
+telemetry.show_telemetry()
@@ -1,103 +1,117 @@
 import streamlit as st
-import yfinance as yf
-import plotly.graph_objects as go
-from anthropic import Anthropic
-from bs4 import BeautifulSoup
-import pandas as pd
 from datetime import datetime, timedelta
-
-# Initialize Anthropic client
-anthropic = Anthropic(api_key=st.secrets["ANTHROPIC_API_KEY"])
+import clients
+import llm
+import price_store
+import telemetry
+from digest import fundamentals_digest
+from snapshot import get_snapshot
+from panel import PricePanel
+from charts import comparison_chart
+from pipeline import Pipeline
+
+# Shared Anthropic client (kept across reruns)
+anthropic = clients.anthropic_client(st.secrets["ANTHROPIC_API_KEY"])
 
 def get_llm_response(prompt):
-    response = anthropic.messages.create(
+    return llm.anthropic_text(
+        anthropic,
+        model="claude-3-sonnet-20240229",
+        max_tokens=1000,
+        temperature=0,
+        system="You are a financial investor, respond with facts and clear messages.",
+        messages=[{"role": "user", "content": prompt}]
+    )
+
+# Same request as get_llm_response, yielding the text chunks as they arrive
+def stream_llm_response(prompt):
+    return llm.anthropic_stream(
+        anthropic,
         model="claude-3-sonnet-20240229",
         max_tokens=1000,
         temperature=0,
         system="You are a financial investor, respond with facts and clear messages.",
         messages=[{"role": "user", "content": prompt}]
     )
-    return response.content[0].text
 
 st.title("Investor Analyst App")
 
 company = st.text_input("Enter a company name:")
+rebase = st.toggle("Rebase prices to 100", value=False)
 
 if company:
-    # Get tickers
-    tickers_prompt = f"Provide the stock ticker for {company} and 5 other tickers for competitors in the same industry of comparable size and strategy. Format the response as a comma-separated list of tickers only."
-    tickers_response = get_llm_response(tickers_prompt)
-    tickers = [ticker.strip() for ticker in tickers_response.split(',')]
-
-    # Fetch historical data
-    end_date = datetime.now()
-    start_date = end_date - timedelta(days=5*365)
-    data = yf.download(tickers, start=start_date, end=end_date)
+    # Each stage re-executes only when one of its inputs changed, so reruns with
+    # the same company reuse the tickers, prices and LLM analyses
+    pipeline = Pipeline("app3", {"company": company}, st.session_state)
 
-    # Create interactive chart
-    fig = go.Figure()
-    for ticker in tickers:
-        fig.add_trace(go.Scatter(x=data.index, y=data['Close'][ticker], mode='lines', name=ticker))
-
-    fig.update_layout(
-        title="Stock Price History",
-        xaxis_title="Date",
-        yaxis_title="Price",
-        hovermode="x unified"
-    )
-
-    # Add range slider and buttons
-    fig.update_xaxes(
-        rangeslider_visible=True,
-        rangeselector=dict(
-            buttons=list([
-                dict(count=1, label="1m", step="month", stepmode="backward"),
-                dict(count=6, label="6m", step="month", stepmode="backward"),
-                dict(count=1, label="YTD", step="year", stepmode="todate"),
-                dict(count=1, label="1y", step="year", stepmode="backward"),
-                dict(step="all")
-            ])
-        )
-    )
-
-    st.plotly_chart(fig)
+    # Get tickers
+    @pipeline.stage(inputs=("company",))
+    def tickers(company):
+        tickers_prompt = f"Provide the stock ticker for {company} and 5 other tickers for competitors in the same industry of comparable size and strategy. Format the response as a comma-separated list of tickers only."
+        tickers_response = get_llm_response(tickers_prompt)
+        return [ticker.strip() for ticker in tickers_response.split(',')]
+
+    # Fetch historical data, again once per price store refresh interval
+    @pipeline.stage(inputs=("tickers",), ttl=price_store.REFRESH_SECONDS)
+    def data(tickers):
+        end_date = datetime.now()
+        start_date = end_date - timedelta(days=5*365)
+        return PricePanel.load(tickers, start=start_date, end=end_date)
 
     # Analyze each ticker
-    analyses = {}
-    for ticker in tickers:
-        stock = yf.Ticker(ticker)
-        financials = stock.financials
-        info = stock.info
-        news = stock.news
-        # Sentiment analysis
-        sentiment_prompt = f"Perform a sentiment analysis on the following financial data, company info, and news for {ticker}: {financials}, {info}, {news}. Provide a short summary of the sentiment."
-        sentiment = get_llm_response(sentiment_prompt)
-
-        # Analyst consensus
-        consensus_prompt = f"Based on the available data, what is the analyst consensus for {ticker}? Provide a short summary."
-        consensus = get_llm_response(consensus_prompt)
-
-        # Overall analysis
-        analysis_prompt = f"Provide an overall analysis of {ticker} within its industry based on the following information: {financials}, {info}, {news}, {sentiment}, {consensus}. Keep the analysis concise."
-        analysis = get_llm_response(analysis_prompt)
-
-        analyses[ticker] = {
-            "sentiment": sentiment,
-            "consensus": consensus,
-            "analysis": analysis
-        }
-
-    # Generate recommendation
-    recommendation_prompt = f"Based on the following analyses of {company} and its competitors {analyses}, provide an investment recommendation for {company}: Buy, Hold, or Sell. Include a short explanation for the recommendation."
-    recommendation = get_llm_response(recommendation_prompt)
+    @pipeline.stage(inputs=("tickers",))
+    def analyses(tickers):
+        analyses = {}
+        for ticker in tickers:
+            stock = get_snapshot(ticker)
+            financials = stock.financials
+            info = stock.info
+            news = stock.news
+            fundamentals = fundamentals_digest(financials, info, news)
+            # Sentiment analysis
+            sentiment_prompt = f"Perform a sentiment analysis on the following financial data, company info, and news for {ticker}:\n{fundamentals}\nProvide a short summary of the sentiment."
+            sentiment = get_llm_response(sentiment_prompt)
+
+            # Analyst consensus
+            consensus_prompt = f"Based on the available data, what is the analyst consensus for {ticker}? Provide a short summary."
+            consensus = get_llm_response(consensus_prompt)
+
+            # Overall analysis
+            analysis_prompt = f"Provide an overall analysis of {ticker} within its industry based on the following information:\n{fundamentals}\nSentiment: {sentiment}\nConsensus: {consensus}\nKeep the analysis concise."
+            analysis = get_llm_response(analysis_prompt)
+
+            analyses[ticker] = {
+                "sentiment": sentiment,
+                "consensus": consensus,
+                "analysis": analysis
+            }
+        return analyses
+
+    # Generate recommendation (streamed into the page when freshly generated)
+    @pipeline.stage(inputs=("company", "analyses"))
+    def recommendation(company, analyses):
+        recommendation_prompt = f"Based on the following analyses of {company} and its competitors {analyses}, provide an investment recommendation for {company}: Buy, Hold, or Sell. Include a short explanation for the recommendation."
+        return recommendation_slot.write_stream(stream_llm_response(recommendation_prompt))
 
     # Generate key financial metrics
-    metrics_prompt = f"Based on the recommendation '{recommendation}' and the analyses {analyses}, what are the key financial metrics supporting this recommendation for {company}? Provide a concise list of the most important metrics and their values."
-    key_metrics = get_llm_response(metrics_prompt)
+    @pipeline.stage(inputs=("company", "analyses", "recommendation"))
+    def key_metrics(company, analyses, recommendation):
+        metrics_prompt = f"Based on the recommendation '{recommendation}' and the analyses {analyses}, what are the key financial metrics supporting this recommendation for {company}? Provide a concise list of the most important metrics and their values."
+        return metrics_slot.write_stream(stream_llm_response(metrics_prompt))
+
+    prices = pipeline.run("data")
+
+    # Create interactive chart
+    st.plotly_chart(comparison_chart(prices, title="Stock Price History", rebase=rebase))
 
     # Display results
     st.subheader("Investment Recommendation")
-    st.write(recommendation)
+    recommendation_slot = st.empty()
+    recommendation_slot.write(pipeline.run("recommendation"))
 
     st.subheader("Key Financial Metrics")
-    st.write(key_metrics)
+    metrics_slot = st.empty()
+    metrics_slot.write(pipeline.run("key_metrics"))
+
+llm.show_cache_stats()
+telemetry.show_telemetry()
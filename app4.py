@@ -1,132 +1,25 @@
 import streamlit as st
-import yfinance as yf
 import pandas as pd
-import plotly.graph_objects as go
-
-def fetch_stock_data(ticker):
-    stock = yf.Ticker(ticker)
-    data = stock.history(period="1y")  # Always fetch the last year of data
+import price_store
+import telemetry
+from snapshot import get_snapshot
+from pipeline import Pipeline
+from patterns import scan_patterns
+from charts import candlestick_with_annotations
+
+def fetch_stock_data(ticker, period="1y"):
+    data = price_store.get_history(ticker, period=period)
     if data.empty:
         raise ValueError("No data found for the ticker.")
     data.reset_index(inplace=True)  # Reset the index to use positional slicing
     return data
 
-def plot_candlestick_chart(data, annotations):
-    fig = go.Figure(data=[go.Candlestick(
-        x=data['Date'],
-        open=data['Open'],
-        high=data['High'],
-        low=data['Low'],
-        close=data['Close']
-    )])
-
-    # Add annotations for detected patterns
-    for annotation in annotations:
-        fig.add_annotation(
-            x=annotation['Date'],
-            y=annotation['Price'],
-            text=annotation['Pattern'],
-            showarrow=True,
-            arrowhead=2,
-            ax=0,
-            ay=-40
-        )
-
-    fig.update_layout(title="Candlestick Chart", xaxis_title="Date", yaxis_title="Price")
-    return fig
-
+# Every head and shoulders, double top/bottom and shooting star over the whole history
 def detect_technical_patterns(data):
-    analysis = []
-    close_prices = data['Close']
-    high_prices = data['High']
-    low_prices = data['Low']
-    open_prices = data['Open']
-
-    # Ensure there is enough data for patterns
-    if len(data) < 50:
-        return analysis  # Not enough data for analysis
-
-    # Head and Shoulders
-    def head_and_shoulders():
-        subset = high_prices.iloc[-50:]
-        if subset.empty:
-            return None, {}
-        middle_peak_index = subset.idxmax()
-        left_peak = max(subset[:middle_peak_index]) if not subset[:middle_peak_index].empty else None
-        right_peak = max(subset[middle_peak_index + 1:]) if not subset[middle_peak_index + 1:].empty else None
-        middle_peak = high_prices[middle_peak_index]
-        if left_peak and right_peak and middle_peak > left_peak and middle_peak > right_peak:
-            return middle_peak_index, {"Middle Peak": middle_peak, "Left Peak": left_peak, "Right Peak": right_peak}
-        return None, {}
-
-    # Double Top
-    def double_top():
-        subset = high_prices.iloc[-50:]
-        if subset.empty:
-            return None, {}
-        recent_highs = subset.nlargest(2)
-        if len(recent_highs) == 2 and abs(recent_highs.iloc[0] - recent_highs.iloc[1]) / recent_highs.iloc[0] < 0.02:
-            return recent_highs.idxmax(), {"High 1": recent_highs.iloc[0], "High 2": recent_highs.iloc[1]}
-        return None, {}
-
-    # Double Bottom
-    def double_bottom():
-        subset = low_prices.iloc[-50:]
-        if subset.empty:
-            return None, {}
-        recent_lows = subset.nsmallest(2)
-        if len(recent_lows) == 2 and abs(recent_lows.iloc[0] - recent_lows.iloc[1]) / recent_lows.iloc[0] < 0.02:
-            return recent_lows.idxmax(), {"Low 1": recent_lows.iloc[0], "Low 2": recent_lows.iloc[1]}
-        return None, {}
-
-    # Shooting Star
-    def shooting_star():
-        if len(close_prices) < 1:
-            return None, {}
-        body = abs(close_prices.iloc[-1] - open_prices.iloc[-1])
-        wick = high_prices.iloc[-1] - close_prices.iloc[-1]
-        if wick > 2 * body and close_prices.iloc[-1] < open_prices.iloc[-1]:
-            return close_prices.index[-1], {"Body": body, "Wick": wick}
-        return None, {}
-
-    # Detect patterns
-    hs_date, hs_params = head_and_shoulders()
-    if hs_date is not None:
-        analysis.append({
-            "Pattern": "Head and Shoulders",
-            "Description": "A reversal pattern signaling the end of an uptrend.",
-            "Date": data['Date'][hs_date],
-            "Price": hs_params["Middle Peak"],
-            "Key Parameters": hs_params,
-            "Suggested Action": "Sell (Bearish Reversal)"
-        })
-
-    dt_date, dt_params = double_top()
-    if dt_date is not None:
-        analysis.append({
-            "Pattern": "Double Top",
-            "Description": "A bearish reversal pattern formed after two peaks.",
-            "Date": data['Date'][dt_date],
-            "Price": dt_params["High 1"],
-            "Key Parameters": dt_params,
-            "Suggested Action": "Sell (Bearish Reversal)"
-        })
-
-    db_date, db_params = double_bottom()
-    if db_date is not None:
-        analysis.append({
-            "Pattern": "Double Bottom",
-            "Description": "A bullish reversal pattern formed after two troughs.",
-            "Date": data['Date'][db_date],
-            "Price": db_params["Low 1"],
-            "Key Parameters": db_params,
-            "Suggested Action": "Buy (Bullish Reversal)"
-        })
-
-    return analysis
+    return scan_patterns(data)
 
 def fetch_financials(ticker):
-    stock = yf.Ticker(ticker)
+    stock = get_snapshot(ticker)
     try:
         revenue = stock.financials.loc["Total Revenue"].tail(3)
         net_income = stock.financials.loc["Net Income"].tail(3)
@@ -148,37 +41,55 @@ def fetch_financials(ticker):
 st.title("Stock Investor App")
 
 ticker = st.text_input("Enter a Stock Ticker (e.g., AAPL, MSFT, TSLA):", value="AAPL")
+period = st.selectbox("History", ["1y", "2y", "5y", "10y", "max"], index=0)
 
 if ticker:
+    # Stages only re-execute when the ticker or history changes, or when the price
+    # store would refresh the bars; the chart zoom reuses them
+    pipeline = Pipeline("app4", {"ticker": ticker, "period": period}, st.session_state)
+    pipeline.stage("data", inputs=("ticker", "period"), ttl=price_store.REFRESH_SECONDS)(fetch_stock_data)
+    pipeline.stage("patterns", inputs=("data",))(detect_technical_patterns)
+    pipeline.stage("financials", inputs=("ticker",))(fetch_financials)
+
     try:
         # Fetch and Display Stock Data
-        data = fetch_stock_data(ticker)
-        annotations = []
+        data = pipeline.run("data")
 
         # Analyze Technical Patterns
         st.subheader("Technical Analysis Patterns")
-        patterns = detect_technical_patterns(data)
+        patterns = pipeline.run("patterns")
         if patterns:
-            for pattern in patterns:
-                st.write(f"**Pattern:** {pattern['Pattern']}")
-                st.write(f"**Description:** {pattern['Description']}")
-                st.write(f"**Date:** {pattern['Date'].strftime('%Y-%m-%d')}")
-                st.write(f"**Key Parameters:** {pattern['Key Parameters']}")
-                st.write(f"**Suggested Action:** {pattern['Suggested Action']}")
-                st.write("---")
-                annotations.append({"Pattern": pattern["Pattern"], "Date": pattern["Date"], "Price": pattern["Price"]})
+            counts = pd.Series([p["Pattern"] for p in patterns]).value_counts()
+            st.write(", ".join(f"**{name}:** {count}" for name, count in counts.items()))
+            table = pd.DataFrame([{
+                "Date": p["Date"].strftime('%Y-%m-%d'),
+                "Pattern": p["Pattern"],
+                "Price": round(p["Price"], 2),
+                "Key Parameters": ", ".join(f"{k}: {v}" for k, v in p["Key Parameters"].items()),
+                "Suggested Action": p["Suggested Action"],
+            } for p in reversed(patterns)])
+            st.dataframe(table, hide_index=True, use_container_width=True)
+            with st.expander("Pattern descriptions"):
+                for name in counts.index:
+                    st.write(f"**{name}:** {next(p['Description'] for p in patterns if p['Pattern'] == name)}")
         else:
-            st.write("No technical patterns detected for the past year.")
+            st.write(f"No technical patterns detected for the past {period}.")
 
         # Plot Candlestick Chart
         st.subheader("Candlestick Chart")
-        zoom_period = len(data)
-        fig = plot_candlestick_chart(data.iloc[-zoom_period:], annotations)
+        zoom_period = st.slider("Trading days shown", min_value=min(20, len(data)), max_value=len(data), value=min(len(data), 250))
+        visible = data.iloc[-zoom_period:]
+        # Annotate only the occurrences inside the zoomed range
+        annotations = [
+            {"Pattern": p["Pattern"], "Date": p["Date"], "Price": p["Price"]}
+            for p in patterns if p["Date"] >= visible['Date'].iloc[0]
+        ]
+        fig = candlestick_with_annotations(visible, annotations)
         st.plotly_chart(fig)
 
         # Fetch and Display Financials
         st.subheader("Key Financials")
-        financials = fetch_financials(ticker)
+        financials = pipeline.run("financials")
         for key, value in financials.items():
             if isinstance(value, dict):
                 st.write(f"**{key}:**")
@@ -187,3 +98,5 @@ if ticker:
                 st.write(f"**{key}:** {value}")
     except Exception as e:
         st.error(f"Error fetching data for ticker '{ticker}': {e}")
+
+telemetry.show_telemetry()
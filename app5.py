@@ -1,9 +1,10 @@
 import streamlit as st
-import yfinance as yf
-import pandas as pd
-import pandas_ta as ta
-import plotly.graph_objects as go
-from datetime import datetime
+import backtest
+import price_store
+import telemetry
+from indicators import IndicatorSet
+from panel import PricePanel
+from charts import indicator_chart, rsi_chart
 
 # Set page config
 st.set_page_config(page_title="Stock Analysis App", layout="wide")
@@ -19,110 +20,40 @@ with col2:
     period_options = ['1d', '5d', '1mo', '3mo', '6mo', '1y', '2y', '5y', 'max']
     period = st.selectbox("Select Time Period", period_options, index=4)
 
-# Function to get stock data
-@st.cache_data
+# Function to get stock data: every stored bar of the symbol, covering at least
+# `period`. Not cached per session, the price store already keeps the bars (and
+# with the mmap backend returns views shared by all workers)
 def get_stock_data(symbol, period):
     try:
-        stock = yf.Ticker(symbol)
-        df = stock.history(period=period)
-        return df
+        return price_store.get_stored(symbol, period=period)
     except Exception as e:
         st.error(f"Error fetching data: {e}")
         return None
 
+# Indicator state over the symbol's whole stored history, kept across reruns and
+# periods, so only bars added since the last run are computed
+@st.cache_resource
+def get_indicator_set(symbol):
+    return IndicatorSet()
+
+# Backtest of the displayed bars, kept until the bars change (the last bar
+# and its close are part of the key; the bars themselves are not hashed)
+@st.cache_data(max_entries=32)
+def run_backtest(symbol, period, horizons, last_bar, _data):
+    return backtest.backtest(PricePanel.from_history(symbol, _data), horizons=list(horizons))
+
 # Get the data
-df = get_stock_data(symbol, period)
+history = get_stock_data(symbol, period)
+df = price_store.window(history, period) if history is not None else None
 
 if df is not None and not df.empty:
-    # Calculate technical indicators
-    # Moving averages
-    df['SMA20'] = ta.sma(df['Close'], length=20)
-    df['SMA50'] = ta.sma(df['Close'], length=50)
-    
-    # RSI
-    df['RSI'] = ta.rsi(df['Close'], length=14)
-    
-    # Bollinger Bands
-    bb_bands = ta.bbands(df['Close'], length=20)
-    df = pd.concat([df, bb_bands], axis=1)
-    
-    # Create candlestick chart
-    fig = go.Figure()
-    
-    # Add candlestick
-    fig.add_trace(go.Candlestick(
-        x=df.index,
-        open=df['Open'],
-        high=df['High'],
-        low=df['Low'],
-        close=df['Close'],
-        name='OHLC'
-    ))
-    
-    # Add moving averages
-    fig.add_trace(go.Scatter(
-        x=df.index,
-        y=df['SMA20'],
-        name='SMA20',
-        line=dict(color='orange')
-    ))
-    
-    fig.add_trace(go.Scatter(
-        x=df.index,
-        y=df['SMA50'],
-        name='SMA50',
-        line=dict(color='blue')
-    ))
-    
-    # Add Bollinger Bands
-    fig.add_trace(go.Scatter(
-        x=df.index,
-        y=df['BBU_20_2.0'],
-        name='Upper BB',
-        line=dict(color='gray', dash='dash')
-    ))
+    # Technical indicators of the displayed bars: SMA20/50, RSI(14) and Bollinger
+    # Bands (20, 2), matching ta.sma, ta.rsi and ta.bbands over the whole history
+    df = get_indicator_set(symbol).update(history).frame(df)
     
-    fig.add_trace(go.Scatter(
-        x=df.index,
-        y=df['BBL_20_2.0'],
-        name='Lower BB',
-        line=dict(color='gray', dash='dash'),
-        fill='tonexty'
-    ))
-    
-    # Update layout
-    fig.update_layout(
-        title=f'{symbol} Stock Price',
-        yaxis_title='Price',
-        xaxis_title='Date',
-        template='plotly_dark',
-        height=800
-    )
-    
-    # Show the chart
-    st.plotly_chart(fig, use_container_width=True)
-    
-    # Show RSI
-    fig_rsi = go.Figure()
-    fig_rsi.add_trace(go.Scatter(
-        x=df.index,
-        y=df['RSI'],
-        name='RSI'
-    ))
-    
-    # Add RSI levels
-    fig_rsi.add_hline(y=70, line_color='red', line_dash='dash')
-    fig_rsi.add_hline(y=30, line_color='green', line_dash='dash')
-    
-    fig_rsi.update_layout(
-        title='RSI Indicator',
-        yaxis_title='RSI',
-        xaxis_title='Date',
-        template='plotly_dark',
-        height=400
-    )
-    
-    st.plotly_chart(fig_rsi, use_container_width=True)
+    # Price chart with SMAs and Bollinger Bands, then RSI (both downsampled)
+    st.plotly_chart(indicator_chart(symbol, df), use_container_width=True)
+    st.plotly_chart(rsi_chart(df), use_container_width=True)
     
     # Technical Analysis Insights
     st.subheader("Technical Analysis Insights")
@@ -168,5 +99,23 @@ if df is not None and not df.empty:
         else:
             st.write("✅ Price within bands")
 
+    # How these signals and the other apps' rules did on this stock's history
+    # (expanders run their body even when closed, hence the toggle)
+    with st.expander("Backtest of the signals"):
+        horizons = st.multiselect("Holding periods (bars)", [5, 10, 20, 60, 120], default=list(backtest.HORIZONS))
+        if st.toggle("Run the backtest"):
+            last_bar = (df.index[-1], float(df['Close'].iloc[-1]), len(df))
+            results = run_backtest(symbol, period, tuple(sorted(horizons)), last_bar, df)
+            st.dataframe(
+                results.drop(columns="ticker").set_index(["rule", "horizon"]),
+                column_config={
+                    column: st.column_config.NumberColumn(format="percent")
+                    for column in ("mean_return", "hit_rate", "mean_drawdown", "max_drawdown")
+                },
+            )
+        st.caption("Each signal is entered at that bar's close; the drawdown is the worst close against it within the holding period.")
+
 else:
     st.error("No data available for the selected stock symbol and period.")
+
+telemetry.show_telemetry()
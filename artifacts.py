@@ -1,16 +1,15 @@
 import streamlit as st
-import yfinance as yf
-import pygwalker as pyg
-import pandas as pd
 import plotly.graph_objects as go
 from datetime import datetime, timedelta
+import price_store
+import telemetry
+from downsample import downsample_ohlc
 
 def get_stock_data(ticker, period="10y", interval="1d"):
     try:
         end_date = datetime.now()
         start_date = end_date - timedelta(days=3650)  # Approximately 10 years
-        stock = yf.Ticker(ticker)
-        data = stock.history(start=start_date, end=end_date, interval=interval)
+        data = price_store.get_history(ticker, start=start_date, end=end_date, interval=interval)
         
         if data.empty:
             st.error(f"No data available for {ticker}. This could be due to an invalid ticker symbol or a temporary issue with the data provider.")
@@ -23,6 +22,22 @@ def get_stock_data(ticker, period="10y", interval="1d"):
         st.error(f"An error occurred while fetching data: {str(e)}")
         return None
 
+# Compact copy of the frame for the explorer: float32 prices and short timestamp strings
+def compact_for_explorer(df):
+    compact = df.astype({column: 'float32' for column in ['Open', 'High', 'Low', 'Close']})
+    timestamps = compact['Timestamp']
+    date_only = (timestamps == timestamps.dt.normalize()).all()
+    compact['Timestamp'] = timestamps.dt.strftime('%Y-%m-%d' if date_only else '%Y-%m-%d %H:%M')
+    return compact
+
+# Explorer HTML cached per ticker and data version (the frame itself is not hashed)
+@st.cache_data(max_entries=16, show_spinner="Building explorer...")
+def get_explorer_html(ticker, data_version, _df):
+    # pygwalker is heavy and only needed once the explorer is shown
+    import pygwalker as pyg
+
+    return pyg.to_html(compact_for_explorer(_df))
+
 st.set_page_config(layout="wide")
 st.title("My First Artifacts App")
 
@@ -36,49 +51,56 @@ with st.sidebar:
         st.subheader("Fetch Stock Data")
         ticker = st.text_input("Enter stock ticker (e.g., AAPL, GOOGL):", "AAPL")
         fetch_data = st.button("Fetch Data")
-    
-    # Display yfinance version
-    st.write(f"yfinance version: {yf.__version__}")
 
 # Main content
 if selected_menu == "Data Fetch":
+    # Keep the fetched frame across reruns so the chart controls work without refetching
     if fetch_data:
         with st.spinner("Fetching 10 years of daily stock data..."):
-            df = get_stock_data(ticker)
+            st.session_state["fetched_data"] = (ticker, get_stock_data(ticker))
+
+    if "fetched_data" in st.session_state:
+        fetched_ticker, df = st.session_state["fetched_data"]
         
         if df is not None and not df.empty:
             st.write(f"Data range: from {df['Timestamp'].min()} to {df['Timestamp'].max()}")
             st.write(f"Number of data points: {len(df)}")
             
-            tab1, tab2 = st.tabs(["PyGWalker Analysis", "Candlestick Chart"])
+            # Only the selected tab runs, so the explorer is built only when it is opened
+            tab1, tab2 = st.tabs(["PyGWalker Analysis", "Candlestick Chart"], default="Candlestick Chart", on_change="rerun", key="data_fetch_tab")
             
-            with tab1:
-                st.header("Interactive Analysis with PyGWalker")
-                pyg_html = pyg.to_html(df)
-                st.components.v1.html(pyg_html, height=600)
+            if tab1.open:
+                with tab1:
+                    st.header("Interactive Analysis with PyGWalker")
+                    data_version = (len(df), str(df['Timestamp'].iloc[-1]), float(df['Close'].iloc[-1]))
+                    pyg_html = get_explorer_html(fetched_ticker, data_version, df)
+                    st.components.v1.html(pyg_html, height=600)
             
-            with tab2:
-                st.header("Candlestick Chart")
+            if tab2.open:
+                with tab2:
+                    st.header("Candlestick Chart")
                 
-                # Date range selection
-                col1, col2 = st.columns(2)
-                with col1:
-                    start_date = st.date_input("Start Date", df['Timestamp'].min().date(), min_value=df['Timestamp'].min().date(), max_value=df['Timestamp'].max().date())
-                with col2:
-                    end_date = st.date_input("End Date", df['Timestamp'].max().date(), min_value=df['Timestamp'].min().date(), max_value=df['Timestamp'].max().date())
+                    # Date range selection
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        start_date = st.date_input("Start Date", df['Timestamp'].min().date(), min_value=df['Timestamp'].min().date(), max_value=df['Timestamp'].max().date())
+                    with col2:
+                        end_date = st.date_input("End Date", df['Timestamp'].max().date(), min_value=df['Timestamp'].min().date(), max_value=df['Timestamp'].max().date())
                 
-                # Filter data based on selected date range
-                mask = (df['Timestamp'].dt.date >= start_date) & (df['Timestamp'].dt.date <= end_date)
-                filtered_df = df.loc[mask]
+                    # Filter data based on selected date range
+                    mask = (df['Timestamp'].dt.date >= start_date) & (df['Timestamp'].dt.date <= end_date)
+                    filtered_df = df.loc[mask]
+                    # Aggregate candles so the chart payload stays bounded for long ranges
+                    chart_df = downsample_ohlc(filtered_df, time_column='Timestamp')
                 
-                # Create candlestick chart
-                fig = go.Figure(data=[go.Candlestick(x=filtered_df['Timestamp'],
-                                                     open=filtered_df['Open'],
-                                                     high=filtered_df['High'],
-                                                     low=filtered_df['Low'],
-                                                     close=filtered_df['Close'])])
-                fig.update_layout(title=f"{ticker} Stock Price", xaxis_title="Date", yaxis_title="Price")
-                st.plotly_chart(fig, use_container_width=True)
+                    # Create candlestick chart
+                    fig = go.Figure(data=[go.Candlestick(x=chart_df['Timestamp'],
+                                                         open=chart_df['Open'],
+                                                         high=chart_df['High'],
+                                                         low=chart_df['Low'],
+                                                         close=chart_df['Close'])])
+                    fig.update_layout(title=f"{fetched_ticker} Stock Price", xaxis_title="Date", yaxis_title="Price")
+                    st.plotly_chart(fig, use_container_width=True)
         else:
             st.warning("Please try a different ticker symbol or check your internet connection.")
     else:
@@ -92,3 +114,5 @@ elif selected_menu == "About":
     st.header("About This App")
     st.write("This is a stock analysis application built with Streamlit. It allows users to fetch historical stock data, perform interactive analysis using PyGWalker, and view candlestick charts.")
     st.write("Created as part of the 'My First Artifacts App' project.")
+
+telemetry.show_telemetry()
@@ -0,0 +1,204 @@
+import argparse
+import sys
+
+import numpy as np
+import pandas as pd
+
+import telemetry
+from panel import PricePanel
+from patterns import pattern_signals
+from signals import crossover_masks
+
+# Vectorized evaluation of the apps' technical rules over a PricePanel. Each
+# rule turns the whole panel into a signal array (dates, tickers) of +1
+# (bullish), -1 (bearish) or 0, computed with array operations over every
+# ticker at once. Each signal is entered at that bar's close and held for
+# every horizon, and per rule, ticker and horizon we report:
+#
+#   signals        number of signal bars with a full horizon ahead
+#   mean_return    mean forward return in the signal's direction
+#   hit_rate       share of signals whose directional return is positive
+#   mean_drawdown  mean worst move against the signal within the horizon
+#   max_drawdown   worst such move
+#
+#   python -m backtest AAPL MSFT GOOGL --period 10y --horizons 5 20 60
+HORIZONS = (5, 20, 60)
+
+# name -> (description, func(panel) returning the signal array)
+RULES = {}
+
+
+def rule(name, description):
+    def decorator(func):
+        RULES[name] = (description, func)
+        return func
+    return decorator
+
+
+def _frame(values):
+    return pd.DataFrame(values)
+
+
+def _sma(close, window):
+    return _frame(close).rolling(window, min_periods=window).mean().to_numpy()
+
+
+# ta's EMA: ewm(span, adjust=False) with `span` bars of warm-up
+def _ema(values, span):
+    return _frame(values).ewm(span=span, min_periods=span, adjust=False).mean().to_numpy()
+
+
+def _crossover_signals(fast, slow):
+    up, down = crossover_masks(fast, slow)
+    return up.astype(np.int8) - down.astype(np.int8)
+
+
+# +1 where `bullish`, -1 where `bearish`
+def _state_signals(bullish, bearish):
+    return bullish.astype(np.int8) - bearish.astype(np.int8)
+
+
+@rule("golden_death_cross", "SMA50/SMA200 golden cross (buy) and death cross (sell), as in identify_patterns")
+def golden_death_cross(panel):
+    close = panel.filled("Close")
+    return _crossover_signals(_sma(close, 50), _sma(close, 200))
+
+
+@rule("macd_crossover", "MACD(12, 26, 9) crossing its signal line, as in identify_patterns")
+def macd_crossover(panel):
+    close = panel.filled("Close")
+    macd = _ema(close, 12) - _ema(close, 26)
+    return _crossover_signals(macd, _ema(macd, 9))
+
+
+@rule("sma20_50_crossover", "SMA20/SMA50 crossovers, as in trending's identify_crossovers")
+def sma20_50_crossover(panel):
+    close = panel.filled("Close")
+    return _crossover_signals(_sma(close, 20), _sma(close, 50))
+
+
+@rule("ma_trend", "app5: close above both SMA20 and SMA50 (bullish) or below both (bearish)")
+def ma_trend(panel):
+    close = panel.filled("Close")
+    sma20, sma50 = _sma(close, 20), _sma(close, 50)
+    return _state_signals((close > sma20) & (close > sma50), (close < sma20) & (close < sma50))
+
+
+# Wilder RSI(14) with pandas_ta's RMA, matching indicators.RSI
+@rule("rsi_extremes", "app5 and identify_patterns: RSI(14) below 30 (oversold, buy) or above 70 (overbought, sell)")
+def rsi_extremes(panel):
+    change = _frame(panel.filled("Close")).diff()
+    gains = change.clip(lower=0).ewm(alpha=1 / 14, min_periods=14, adjust=True).mean()
+    losses = (-change).clip(lower=0).ewm(alpha=1 / 14, min_periods=14, adjust=True).mean()
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rsi = (100 * gains / (gains + losses)).to_numpy()
+    return _state_signals(rsi < 30, rsi > 70)
+
+
+@rule("bollinger_bands", "app5: close below the lower band (buy) or above the upper band (sell) of BB(20, 2)")
+def bollinger_bands(panel):
+    close = panel.filled("Close")
+    rolling = _frame(close).rolling(20, min_periods=20)
+    mid, std = rolling.mean().to_numpy(), rolling.std(ddof=0).to_numpy()
+    return _state_signals(close < mid - 2 * std, close > mid + 2 * std)
+
+
+# Chart patterns act only once they are known: a swing high or low is
+# confirmed `order` bars after it, so a head and shoulders counts from its right
+# shoulder and a double top or bottom from its second extreme, `order` bars
+# later; a shooting star is known at its own close.
+@rule("pattern_action", "app4: Suggested Action (buy/sell) of head and shoulders, double tops/bottoms and shooting stars")
+def pattern_action(panel, order=5):
+    signals = np.zeros((len(panel), len(panel.tickers)), dtype=np.int8)
+    fields = [panel.fields[field] for field in ("Open", "High", "Low", "Close")]
+    for column in range(len(panel.tickers)):
+        rows = np.flatnonzero(~np.isnan(fields[3][:, column]))
+        signals[rows, column] = pattern_signals(*(values[rows, column] for values in fields), order=order)
+    return signals
+
+
+# Forward return over `horizon` bars, and the lowest and highest close within it, relative to each close
+def _forward(close, horizon):
+    frame = _frame(close)
+    window = frame.rolling(horizon, min_periods=horizon)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        future = frame.shift(-horizon).to_numpy() / close - 1
+        low = window.min().shift(-horizon).to_numpy() / close - 1
+        high = window.max().shift(-horizon).to_numpy() / close - 1
+    return future, low, high
+
+
+# Signal arrays of the given rules (all of them by default), keyed by name
+def rule_signals(panel, rules=None):
+    return {name: RULES[name][1](panel) for name in (rules or RULES)}
+
+
+# One row per rule, ticker and horizon
+@telemetry.traced("backtest.backtest", "indicators")
+def backtest(panel, rules=None, horizons=HORIZONS):
+    close = panel.filled("Close")
+    signals = rule_signals(panel, rules)
+    tickers = np.array(panel.tickers, dtype=object)
+    rows = []
+    for horizon in horizons:
+        future, low, high = _forward(close, horizon)
+        for name, direction in signals.items():
+            taken = (direction != 0) & ~np.isnan(future)
+            directional = np.where(taken, direction * future, 0.0)
+            adverse = np.where(taken, np.minimum(np.where(direction > 0, low, -high), 0.0), 0.0)
+            count = taken.sum(axis=0)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                rows.append(pd.DataFrame({
+                    "rule": name,
+                    "ticker": tickers,
+                    "horizon": horizon,
+                    "signals": count,
+                    "mean_return": directional.sum(axis=0) / count,
+                    "hit_rate": (taken & (directional > 0)).sum(axis=0) / count,
+                    "mean_drawdown": adverse.sum(axis=0) / count,
+                    "max_drawdown": np.where(count > 0, adverse.min(axis=0), np.nan),
+                }))
+    if not rows:
+        return pd.DataFrame(columns=["rule", "ticker", "horizon", "signals", "mean_return", "hit_rate", "mean_drawdown", "max_drawdown"])
+    return pd.concat(rows, ignore_index=True)
+
+
+# backtest() results pooled over tickers: every signal counts once, whatever its ticker
+def summarize(results):
+    weighted = results.assign(
+        mean_return=results["mean_return"] * results["signals"],
+        hit_rate=results["hit_rate"] * results["signals"],
+        mean_drawdown=results["mean_drawdown"] * results["signals"],
+    ).fillna({"mean_return": 0.0, "hit_rate": 0.0, "mean_drawdown": 0.0})
+    pooled = weighted.groupby(["rule", "horizon"]).agg(
+        tickers=("ticker", "nunique"),
+        signals=("signals", "sum"),
+        mean_return=("mean_return", "sum"),
+        hit_rate=("hit_rate", "sum"),
+        mean_drawdown=("mean_drawdown", "sum"),
+        max_drawdown=("max_drawdown", "min"),
+    )
+    for column in ("mean_return", "hit_rate", "mean_drawdown"):
+        pooled[column] = pooled[column] / pooled["signals"].where(pooled["signals"] > 0)
+    return pooled
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Backtest the apps' technical rules")
+    parser.add_argument("tickers", nargs="+")
+    parser.add_argument("--period", default="10y", help="history to test on (yfinance period)")
+    parser.add_argument("--horizons", type=int, nargs="+", default=list(HORIZONS), help="holding periods in bars")
+    parser.add_argument("--rules", nargs="+", choices=list(RULES), help="rules to test (default: all)")
+    parser.add_argument("--per-ticker", action="store_true", help="print the per-ticker results as well")
+    args = parser.parse_args(argv)
+
+    results = backtest(PricePanel.load(args.tickers, period=args.period), args.rules, args.horizons)
+    with pd.option_context("display.max_rows", None, "display.width", 160, "display.float_format", "{:.4f}".format):
+        if args.per_ticker:
+            print(results.to_string(index=False), end="\n\n")
+        print(summarize(results))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+# Offline stand-ins for Yahoo Finance and the LLM providers: synthetic OHLCV
+# bars, canned fundamentals and news, and a stub Anthropic client.
+
+
+# Geometric random walk of daily bars; the same (n, seed) always gives the same frame
+def ohlcv(n, seed=0, start="1990-01-02"):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.015, n)))
+    open_ = close * (1 + rng.normal(0, 0.005, n))
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.008, n)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.008, n)))
+    volume = rng.integers(1_000_000, 50_000_000, n).astype(float)
+    index = pd.bdate_range(start, periods=n, name="Date")
+    return pd.DataFrame({"Open": open_, "High": high, "Low": low, "Close": close, "Volume": volume}, index=index)
+
+
+_YEARS = pd.to_datetime(["2024-12-31", "2023-12-31", "2022-12-31", "2021-12-31"])
+
+FINANCIALS = pd.DataFrame(
+    {
+        year: {
+            "Total Revenue": 3.9e11 * growth,
+            "Gross Profit": 1.7e11 * growth,
+            "Operating Income": 1.2e11 * growth,
+            "EBITDA": 1.3e11 * growth,
+            "Net Income": 9.7e10 * growth,
+            "Diluted EPS": 6.1 * growth,
+            "Free Cash Flow": 1.0e11 * growth,
+            "Research And Development": 3.0e10 * growth,
+            "Interest Expense": 3.9e9,
+        }
+        for year, growth in zip(_YEARS, (1.0, 0.97, 0.95, 0.86))
+    }
+)
+
+INFO = {
+    "longName": "Example Corporation",
+    "sector": "Technology",
+    "industry": "Consumer Electronics",
+    "currency": "USD",
+    "marketCap": 3_400_000_000_000,
+    "currentPrice": 227.5,
+    "trailingPE": 37.4,
+    "forwardPE": 29.1,
+    "trailingEps": 6.08,
+    "revenueGrowth": 0.061,
+    "earningsGrowth": -0.341,
+    "profitMargins": 0.239,
+    "returnOnEquity": 1.57,
+    "debtToEquity": 209.1,
+    "recommendationKey": "buy",
+    "targetMeanPrice": 245.0,
+    "numberOfAnalystOpinions": 41,
+    "longBusinessSummary": "Designs, manufactures and markets consumer electronics. " * 20,
+}
+
+NEWS = [
+    {
+        "title": f"Example Corporation headline number {i} about products, results and strategy",
+        "publisher": "Newswire",
+        "providerPublishTime": 1_700_000_000 + i * 86_400,
+    }
+    for i in range(20)
+]
+
+TICKERS_REPLY = "AAPL, MSFT, GOOGL, AMZN, META, NVDA"
+
+ANALYSIS_REPLY = (
+    "Revenue grew 6% year over year with stable gross margins. Analysts remain "
+    "constructive with a mean target above the current price. "
+) * 4
+
+PEERS = ("AAPL", "MSFT", "GOOGL", "AMZN", "META", "NVDA")
+
+
+# Anthropic client look-alike answering every request with a canned reply
+class FakeAnthropic:
+    def __init__(self, reply=ANALYSIS_REPLY, chunk_size=16):
+        self.reply = reply
+        self.chunk_size = chunk_size
+        self.calls = 0
+        self.messages = SimpleNamespace(create=self._create, stream=self._stream)
+
+    # Rough token counts (four characters per token) in the shape of Anthropic's usage block
+    def _usage(self, params):
+        return SimpleNamespace(input_tokens=len(str(params.get("messages"))) // 4, output_tokens=len(self.reply) // 4)
+
+    def _create(self, **params):
+        self.calls += 1
+        return SimpleNamespace(content=[SimpleNamespace(text=self.reply)], usage=self._usage(params))
+
+    @contextmanager
+    def _stream(self, **params):
+        self.calls += 1
+        chunks = [self.reply[i:i + self.chunk_size] for i in range(0, len(self.reply), self.chunk_size)]
+        final = SimpleNamespace(usage=self._usage(params))
+        yield SimpleNamespace(text_stream=iter(chunks), get_final_message=lambda: final)
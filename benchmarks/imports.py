@@ -0,0 +1,127 @@
+import argparse
+import ast
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+from datetime import datetime
+
+from navigation import PAGES
+
+# Cold-start import cost of the multipage entrypoint and of each page. Every
+# sample is a fresh interpreter that runs only the top-level imports of the
+# script (not its Streamlit code), so it measures what opening the page costs
+# before any data is fetched.
+#
+#   python -m benchmarks.imports
+#   python -m benchmarks.imports --compare benchmarks/results/imports-baseline.json
+#
+# Results use the same JSON layout as benchmarks.run (with the resident memory
+# and the heavy packages each script loads), and --compare fails the same way.
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ENTRYPOINT = "streamlit_app.py"
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+# Packages that dominate start-up time; the entrypoint should load none of them
+# (plotly is left out: streamlit itself imports it)
+HEAVY = ("pandas", "yfinance", "anthropic", "openai", "bs4", "ta", "pandas_ta", "pygwalker")
+
+_PROBE = """
+import json, resource, sys, time
+heavy = {heavy!r}
+start = time.perf_counter()
+exec(compile({source!r}, {script!r}, "exec"), {{"__name__": "__imports__"}})
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    "ms": elapsed * 1000,
+    "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "modules": len(sys.modules),
+    "heavy": [name for name in heavy if name in sys.modules],
+}}))
+"""
+
+
+# The script's module-level import statements, as source
+def top_level_imports(script):
+    with open(os.path.join(ROOT, script)) as f:
+        source = f.read()
+    nodes = [node for node in ast.parse(source).body if isinstance(node, (ast.Import, ast.ImportFrom))]
+    return "\n".join(ast.unparse(node) for node in nodes)
+
+
+def sample(script):
+    probe = _PROBE.format(heavy=HEAVY, source=top_level_imports(script), script=script)
+    output = subprocess.run([sys.executable, "-c", probe], cwd=ROOT, capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def run(repeat=5, only=None):
+    results = []
+    for script in [ENTRYPOINT] + [page[1] for page in PAGES]:
+        if only and not any(pattern in script for pattern in only):
+            continue
+        try:
+            samples = [sample(script) for _ in range(repeat)]
+        except subprocess.CalledProcessError as e:
+            # e.g. an optional package that is not installed here
+            print(f"{script:22} failed: {e.stderr.strip().splitlines()[-1]}", flush=True)
+            continue
+        times = [s["ms"] for s in samples]
+        result = {
+            "name": f"import {script}",
+            "size": None,
+            "median_ms": statistics.median(times),
+            "min_ms": min(times),
+            "repeat": repeat,
+            "rss_mb": round(statistics.median(s["rss_mb"] for s in samples), 1),
+            "modules": samples[-1]["modules"],
+            "heavy": samples[-1]["heavy"],
+        }
+        results.append(result)
+        print(f"{script:22} {result['median_ms']:9.1f} ms {result['rss_mb']:7.1f} MB  {', '.join(result['heavy']) or '-'}", flush=True)
+    return results
+
+
+def main(argv=None):
+    from benchmarks.run import compare
+
+    parser = argparse.ArgumentParser(description="Import time of the multipage entrypoint and each page")
+    parser.add_argument("--repeat", type=int, default=5, help="fresh interpreters per script (the median is reported)")
+    parser.add_argument("--only", nargs="+", help="measure only scripts whose name contains one of these strings")
+    parser.add_argument("--output", help="JSON file for the results (default: benchmarks/results/imports-<timestamp>.json)")
+    parser.add_argument("--compare", help="baseline results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=1.25, help="slowdown ratio reported as a regression")
+    args = parser.parse_args(argv)
+
+    results = run(args.repeat, args.only)
+    report = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, "imports-" + datetime.now().strftime("%Y%m%d-%H%M%S") + ".json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nSaved {len(results)} results to {output}")
+
+    status = 0
+    entry = next((r for r in results if r["name"] == f"import {ENTRYPOINT}"), None)
+    if entry and entry["heavy"]:
+        print(f"{ENTRYPOINT} imports {', '.join(entry['heavy'])} at start-up")
+        status = 1
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} script(s) slower than {args.threshold:.2f}x the baseline")
+            status = 1
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
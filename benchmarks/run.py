@@ -0,0 +1,280 @@
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+# Offline benchmarks for the hot paths behind the apps, run against synthetic
+# prices, canned fundamentals/news and a stub LLM client (no network access).
+#
+#   python -m benchmarks.run                         # all cases, default sizes
+#   python -m benchmarks.run --sizes 2520 --only indicators figure
+#   python -m benchmarks.run --compare benchmarks/results/baseline.json
+#
+# Results are written as JSON (benchmarks/results/ by default); with --compare
+# each case is reported against the baseline and the exit status is 1 if any
+# median got slower than --threshold times the baseline.
+
+# Keep the benchmark's LLM cache away from the apps' cache
+os.environ.setdefault("INVESTOR_LLM_CACHE_PATH", os.path.join(tempfile.mkdtemp(prefix="investor-bench-"), "llm_cache.sqlite3"))
+
+import pandas as pd
+
+import backtest
+import llm
+import price_store
+import prompts
+import signals
+from charts import candlestick_with_annotations, indicator_chart, rsi_chart
+from digest import fundamentals_digest
+from indicators import IndicatorSet
+from panel import PricePanel
+from patterns import scan_patterns
+
+from benchmarks import fixtures
+
+DEFAULT_SIZES = (250, 2520, 10_000)
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+# (name, sized, make): make(size) returns (setup, func); only func(*setup()) is
+# timed. Cases that do not depend on the number of bars have sized=False.
+CASES = []
+
+
+def case(name, sized=True):
+    def decorator(make):
+        CASES.append((name, sized, make))
+        return make
+    return decorator
+
+
+@case("identify_crossovers")
+def _identify_crossovers(n):
+    df = fixtures.ohlcv(n)
+    return lambda: (df.copy(),), signals.identify_crossovers
+
+
+@case("detect_technical_patterns")
+def _detect_technical_patterns(n):
+    data = fixtures.ohlcv(n).reset_index()
+    return lambda: (data,), scan_patterns
+
+
+@case("identify_patterns")
+def _identify_patterns(n):
+    df = fixtures.ohlcv(n)
+    return lambda: (df.copy(),), signals.identify_patterns
+
+
+@case("indicators_full")
+def _indicators_full(n):
+    df = fixtures.ohlcv(n)
+    return lambda: (IndicatorSet(), df.copy()), IndicatorSet.update
+
+
+# One new bar on top of an indicator set that has seen the rest of the history
+@case("indicators_new_bar")
+def _indicators_new_bar(n):
+    df = fixtures.ohlcv(n)
+
+    def setup():
+        indicators = IndicatorSet()
+        indicators.update(df.iloc[:-1].copy())
+        return indicators, df.copy()
+    return setup, IndicatorSet.update
+
+
+@case("figure_indicator_chart")
+def _figure_indicator_chart(n):
+    data = fixtures.ohlcv(n)
+    df = IndicatorSet().update(data).frame(data)
+    return lambda: (df,), lambda df: (indicator_chart("BENCH", df), rsi_chart(df))
+
+
+@case("figure_pattern_chart")
+def _figure_pattern_chart(n):
+    data = fixtures.ohlcv(n).reset_index()
+    annotations = [{"Pattern": p["Pattern"], "Date": p["Date"], "Price": p["Price"]} for p in scan_patterns(data)]
+    return lambda: (data, annotations), candlestick_with_annotations
+
+
+# Rebasing and all-pairs rolling correlation of a six-ticker peer set
+@case("panel_peer_comparison")
+def _panel_peer_comparison(n):
+    close = pd.DataFrame({ticker: fixtures.ohlcv(n, seed=i)["Close"] for i, ticker in enumerate(fixtures.PEERS)})
+    panel = PricePanel.from_frame(pd.concat({"Close": close}, axis=1))
+    return lambda: (panel,), lambda panel: (panel.rebased(), panel.rolling_correlation(60))
+
+
+@case("backtest_rules")
+def _backtest_rules(n):
+    frame = pd.concat({ticker: fixtures.ohlcv(n, seed=i) for i, ticker in enumerate(fixtures.PEERS)}, axis=1).swaplevel(axis=1)
+    panel = PricePanel.from_frame(frame, fixtures.PEERS)
+    return lambda: (panel,), backtest.backtest
+
+
+# Loading a stored history; the mmap backend reuses the mapping after the first read
+def _store_load(backend, n):
+    store = price_store.BACKENDS[backend]()
+    path = os.path.join(tempfile.mkdtemp(prefix="investor-bench-store-"), "BENCH" + store.suffix)
+    store.write(path, fixtures.ohlcv(n))
+    return lambda: (path,), store.read
+
+
+@case("store_load_parquet")
+def _store_load_parquet(n):
+    return _store_load("parquet", n)
+
+
+@case("store_load_mmap")
+def _store_load_mmap(n):
+    return _store_load("mmap", n)
+
+
+@case("extract_tickers", sized=False)
+def _extract_tickers(n):
+    return lambda: (fixtures.TICKERS_REPLY,), prompts.extract_tickers
+
+
+@case("prompt_fundamentals_digest", sized=False)
+def _prompt_fundamentals_digest(n):
+    return lambda: (fixtures.FINANCIALS, fixtures.INFO, fixtures.NEWS), fundamentals_digest
+
+
+@case("prompt_recommendation", sized=False)
+def _prompt_recommendation(n):
+    analyses = {
+        ticker: {"sentiment": fixtures.ANALYSIS_REPLY, "consensus": fixtures.ANALYSIS_REPLY, "analysis": fixtures.ANALYSIS_REPLY}
+        for ticker in fixtures.PEERS
+    }
+    return lambda: ("Example Corporation", analyses), prompts.recommendation_prompt
+
+
+@case("prompt_crossover", sized=False)
+def _prompt_crossover(n):
+    event_date = datetime(2024, 6, 3)
+    return lambda: (event_date, "up", fixtures.NEWS, {"info": fixtures.INFO}), prompts.crossover_prompt
+
+
+def _llm_params(content):
+    return dict(
+        model="claude-3-sonnet-20240229",
+        max_tokens=300,
+        system=prompts.INVESTOR_SYSTEM,
+        messages=[{"role": "user", "content": content}],
+    )
+
+
+# Response cache hit: key hashing plus the SQLite lookup
+@case("llm_cached_call", sized=False)
+def _llm_cached_call(n):
+    client = fixtures.FakeAnthropic()
+    params = _llm_params(prompts.sentiment_prompt("BENCH", fundamentals_digest(fixtures.FINANCIALS, fixtures.INFO, fixtures.NEWS)))
+    llm.anthropic_text(client, **params)
+    return lambda: (client,), lambda client: llm.anthropic_text(client, **params)
+
+
+# Cache miss answered by the stub client: lookup, stub call and cache write
+@case("llm_uncached_call", sized=False)
+def _llm_uncached_call(n):
+    client = fixtures.FakeAnthropic()
+    counter = iter(range(sys.maxsize))
+    return (
+        lambda: (client, _llm_params(f"uncached request {time.time_ns()} {next(counter)}")),
+        lambda client, params: llm.anthropic_text(client, **params),
+    )
+
+
+def measure(setup, func, repeat):
+    func(*setup())  # warm-up
+    times = []
+    for _ in range(repeat):
+        args = setup()
+        start = time.perf_counter()
+        func(*args)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def run(sizes=DEFAULT_SIZES, repeat=7, only=None):
+    results = []
+    for name, sized, make in CASES:
+        if only and not any(pattern in name for pattern in only):
+            continue
+        for size in (sizes if sized else (None,)):
+            times = measure(*make(size), repeat)
+            result = {
+                "name": name,
+                "size": size,
+                "median_ms": statistics.median(times) * 1000,
+                "min_ms": min(times) * 1000,
+                "repeat": repeat,
+            }
+            results.append(result)
+            print(f"{name:28} {size if size else '-':>8} {result['median_ms']:10.3f} ms (min {result['min_ms']:.3f})", flush=True)
+    return results
+
+
+def _key(result):
+    return result["name"], result["size"]
+
+
+# Print each result against the baseline; returns the regressed (name, size) pairs
+def compare(results, baseline, threshold):
+    previous = {_key(r): r for r in baseline["results"]}
+    regressions = []
+    print(f"\n{'case':28} {'size':>8} {'baseline':>10} {'current':>10} {'ratio':>7}")
+    for result in results:
+        before = previous.get(_key(result))
+        if before is None:
+            continue
+        ratio = result["median_ms"] / before["median_ms"] if before["median_ms"] else float("inf")
+        flag = ""
+        if ratio > threshold:
+            flag = "  REGRESSION"
+            regressions.append(_key(result))
+        size = result["size"] if result["size"] else "-"
+        print(f"{result['name']:28} {size:>8} {before['median_ms']:10.3f} {result['median_ms']:10.3f} {ratio:6.2f}x{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline benchmarks of the app hot paths")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="numbers of daily bars")
+    parser.add_argument("--repeat", type=int, default=7, help="timed runs per case (the median is reported)")
+    parser.add_argument("--only", nargs="+", help="run only cases whose name contains one of these strings")
+    parser.add_argument("--output", help="JSON file for the results (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--compare", help="baseline results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=1.25, help="slowdown ratio reported as a regression")
+    args = parser.parse_args(argv)
+
+    results = run(args.sizes, args.repeat, args.only)
+    report = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "sizes": args.sizes,
+        "results": results,
+    }
+    output = args.output or os.path.join(RESULTS_DIR, datetime.now().strftime("%Y%m%d-%H%M%S") + ".json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nSaved {len(results)} results to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} case(s) slower than {args.threshold:.2f}x the baseline")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
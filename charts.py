@@ -0,0 +1,199 @@
+import plotly.graph_objects as go
+
+import telemetry
+from downsample import downsample_line, downsample_lines, downsample_ohlc
+
+# Plotly figure builders shared by the Streamlit pages. They only build the
+# figures, so they can be reused (and timed) without a Streamlit session.
+
+
+# app4: candlesticks with one arrow annotation per detected pattern
+@telemetry.traced("charts.candlestick_with_annotations", "figure")
+def candlestick_with_annotations(data, annotations):
+    fig = go.Figure(data=[go.Candlestick(
+        x=data['Date'],
+        open=data['Open'],
+        high=data['High'],
+        low=data['Low'],
+        close=data['Close']
+    )])
+
+    # Annotations for detected patterns, set in one layout update (add_annotation
+    # revalidates the whole layout on every call, which gets slow for long histories)
+    fig.update_layout(
+        title="Candlestick Chart",
+        xaxis_title="Date",
+        yaxis_title="Price",
+        annotations=[dict(
+            x=annotation['Date'],
+            y=annotation['Price'],
+            text=annotation['Pattern'],
+            showarrow=True,
+            arrowhead=2,
+            ax=0,
+            ay=-40
+        ) for annotation in annotations]
+    )
+    return fig
+
+
+# trending: candlesticks with an arrow above (up) or below (down) each crossover
+@telemetry.traced("charts.crossover_chart", "figure")
+def crossover_chart(data, crossovers):
+    fig = go.Figure(data=[go.Candlestick(x=data.index,
+                    open=data['Open'],
+                    high=data['High'],
+                    low=data['Low'],
+                    close=data['Close'])])
+
+    fig.update_layout(annotations=[dict(
+        x=date,
+        y=data.loc[date, 'High'] if event_type == 'up' else data.loc[date, 'Low'],
+        text='↑' if event_type == 'up' else '↓',
+        showarrow=False,
+        font=dict(size=20, color='blue' if event_type == 'up' else 'black')
+    ) for date, event_type in crossovers])
+    return fig
+
+
+# app5: candlesticks with SMA20/50 and Bollinger Bands. Bucketed candles and
+# LTTB lines keep the payload bounded however long the period is.
+@telemetry.traced("charts.indicator_chart", "figure")
+def indicator_chart(symbol, df):
+    chart_df = downsample_ohlc(df)
+    # All lines use the same points, so the fill between the bands lines up
+    lines = downsample_lines(df[['SMA20', 'SMA50', 'BBU_20_2.0', 'BBL_20_2.0']])
+    sma20 = lines['SMA20'].dropna()
+    sma50 = lines['SMA50'].dropna()
+    bands = lines[['BBU_20_2.0', 'BBL_20_2.0']].dropna()
+
+    fig = go.Figure()
+
+    # Add candlestick
+    fig.add_trace(go.Candlestick(
+        x=chart_df.index,
+        open=chart_df['Open'],
+        high=chart_df['High'],
+        low=chart_df['Low'],
+        close=chart_df['Close'],
+        name='OHLC'
+    ))
+
+    # Add moving averages
+    fig.add_trace(go.Scatter(
+        x=sma20.index,
+        y=sma20,
+        name='SMA20',
+        line=dict(color='orange')
+    ))
+
+    fig.add_trace(go.Scatter(
+        x=sma50.index,
+        y=sma50,
+        name='SMA50',
+        line=dict(color='blue')
+    ))
+
+    # Add Bollinger Bands
+    fig.add_trace(go.Scatter(
+        x=bands.index,
+        y=bands['BBU_20_2.0'],
+        name='Upper BB',
+        line=dict(color='gray', dash='dash')
+    ))
+
+    fig.add_trace(go.Scatter(
+        x=bands.index,
+        y=bands['BBL_20_2.0'],
+        name='Lower BB',
+        line=dict(color='gray', dash='dash'),
+        fill='tonexty'
+    ))
+
+    fig.update_layout(
+        title=f'{symbol} Stock Price',
+        yaxis_title='Price',
+        xaxis_title='Date',
+        template='plotly_dark',
+        height=800
+    )
+    return fig
+
+
+# app5: RSI line with the 70/30 levels
+@telemetry.traced("charts.rsi_chart", "figure")
+def rsi_chart(df):
+    rsi = downsample_line(df['RSI'])
+
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=rsi.index,
+        y=rsi,
+        name='RSI'
+    ))
+
+    # Add RSI levels
+    fig.add_hline(y=70, line_color='red', line_dash='dash')
+    fig.add_hline(y=30, line_color='green', line_dash='dash')
+
+    fig.update_layout(
+        title='RSI Indicator',
+        yaxis_title='RSI',
+        xaxis_title='Date',
+        template='plotly_dark',
+        height=400
+    )
+    return fig
+
+
+# app2/app3/openai_investor: one line per ticker of a PricePanel, either the
+# close or the close rebased to 100 at the start of the panel
+@telemetry.traced("charts.comparison_chart", "figure")
+def comparison_chart(panel, title="Stock Price Comparison", rebase=False):
+    # One set of dates for every ticker, so the unified hover shows them side by side
+    lines = downsample_lines(panel.rebased() if rebase else panel['Close'])
+    fig = go.Figure()
+    for ticker in panel.tickers:
+        line = lines[ticker].dropna()
+        fig.add_trace(go.Scatter(x=line.index, y=line, mode='lines', name=ticker))
+
+    fig.update_layout(
+        title=title,
+        xaxis_title='Date',
+        yaxis_title='Rebased (100 = start)' if rebase else 'Price',
+        hovermode='x unified'
+    )
+
+    # Add range slider and buttons
+    fig.update_xaxes(
+        rangeslider_visible=True,
+        rangeselector=dict(
+            buttons=list([
+                dict(count=1, label="1m", step="month", stepmode="backward"),
+                dict(count=6, label="6m", step="month", stepmode="backward"),
+                dict(count=1, label="YTD", step="year", stepmode="todate"),
+                dict(count=1, label="1y", step="year", stepmode="backward"),
+                dict(step="all")
+            ])
+        )
+    )
+    return fig
+
+
+# app2: rolling correlation of daily returns between `ticker` and each peer
+@telemetry.traced("charts.correlation_chart", "figure")
+def correlation_chart(panel, ticker, window=60):
+    correlation = downsample_lines(panel.correlation_with(ticker, window))
+    fig = go.Figure()
+    for peer in correlation.columns:
+        line = correlation[peer].dropna()
+        fig.add_trace(go.Scatter(x=line.index, y=line, mode='lines', name=peer))
+
+    fig.update_layout(
+        title=f'{window}-day correlation of daily returns with {ticker}',
+        xaxis_title='Date',
+        yaxis_title='Correlation',
+        yaxis_range=[-1, 1],
+        hovermode='x unified'
+    )
+    return fig
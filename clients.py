@@ -0,0 +1,139 @@
+import os
+import threading
+
+import telemetry
+
+# Process-wide HTTP clients shared by every Streamlit session and rerun: one
+# Anthropic client per API key, one OpenAI client per API key and one Yahoo
+# Finance session. Each keeps its connection pool alive between requests, so
+# reruns and concurrent sessions reuse open TLS connections instead of
+# handshaking again. Requests and newly opened connections are counted per
+# pool; stats() reports them (and the reuse rate) for the Performance panel.
+#
+# The LLM clients are created without SDK retries: the scheduler retries.
+YAHOO_IMPERSONATE = os.environ.get("INVESTOR_YAHOO_IMPERSONATE", "chrome")
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+class PoolStats:
+    def __init__(self, name):
+        self.name = name
+        self.requests = 0
+        self.connections = 0
+        self._lock = threading.Lock()
+
+    def request(self):
+        with self._lock:
+            self.requests += 1
+
+    def connection(self):
+        with self._lock:
+            self.connections += 1
+        span = telemetry.current_span()
+        if span is not None:
+            span.set(connections=span.attrs.get("connections", 0) + 1)
+
+    def to_dict(self):
+        with self._lock:
+            reused = max(self.requests - self.connections, 0)
+            return {
+                "requests": self.requests,
+                "connections": self.connections,
+                "reuse_rate": reused / self.requests if self.requests else 0.0,
+            }
+
+
+_stats = {}
+
+
+def _pool_stats(name):
+    with _clients_lock:
+        return _stats.setdefault(name, PoolStats(name))
+
+
+# httpx client for an LLM SDK; httpcore reports each new TCP connection via the trace extension
+def _httpx_client(factory, stats):
+    def trace(event, info):
+        if event == "connection.connect_tcp.complete":
+            stats.connection()
+
+    def on_request(request):
+        stats.request()
+        request.extensions["trace"] = trace
+
+    return factory(event_hooks={"request": [on_request]})
+
+
+def _shared(key, create):
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            client = _clients[key] = create()
+        return client
+
+
+def anthropic_client(api_key=None):
+    import anthropic
+
+    api_key = api_key or os.environ.get("ANTHROPIC_API_KEY")
+    stats = _pool_stats("anthropic")
+    return _shared(("anthropic", api_key), lambda: anthropic.Anthropic(
+        api_key=api_key,
+        max_retries=0,
+        http_client=_httpx_client(anthropic.DefaultHttpxClient, stats),
+    ))
+
+
+# The key defaults to openai.api_key (as set by the apps) or OPENAI_API_KEY
+def openai_client(api_key=None):
+    import openai
+
+    api_key = api_key or openai.api_key or os.environ.get("OPENAI_API_KEY")
+    stats = _pool_stats("openai")
+    return _shared(("openai", api_key), lambda: openai.OpenAI(
+        api_key=api_key,
+        max_retries=0,
+        http_client=_httpx_client(openai.DefaultHttpxClient, stats),
+    ))
+
+
+def _yahoo_session_class():
+    from curl_cffi import requests as curl_requests
+
+    # curl_cffi session (what yfinance uses by default) that counts its
+    # requests; libcurl keeps a connection cache per thread, and a connection
+    # is counted the first time its local address is seen
+    class CountingSession(curl_requests.Session):
+        def __init__(self, stats, **kwargs):
+            super().__init__(**kwargs)
+            self.stats = stats
+            self._seen = set()
+            self._seen_lock = threading.Lock()
+
+        def request(self, method, url, *args, **kwargs):
+            response = super().request(method, url, *args, **kwargs)
+            self.stats.request()
+            address = (getattr(response, "primary_ip", None), getattr(response, "local_port", None))
+            with self._seen_lock:
+                new = address not in self._seen
+                self._seen.add(address)
+            if new:
+                self.stats.connection()
+            return response
+
+    return CountingSession
+
+
+# Session passed to yf.Ticker and yf.download
+def yahoo_session():
+    stats = _pool_stats("yahoo")
+    return _shared(("yahoo",), lambda: _yahoo_session_class()(stats, impersonate=YAHOO_IMPERSONATE))
+
+
+# {pool: {"requests", "connections", "reuse_rate"}} for the pools used so far
+def stats():
+    with _clients_lock:
+        pools = dict(_stats)
+    return {name: pool.to_dict() for name, pool in sorted(pools.items())}
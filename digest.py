@@ -0,0 +1,125 @@
+import re
+
+import pandas as pd
+
+# Compact, token-budgeted text digest of yfinance fundamentals for LLM prompts,
+# used instead of dumping the raw financials DataFrame, info dict and news list.
+
+FINANCIAL_LINE_ITEMS = (
+    "Total Revenue",
+    "Gross Profit",
+    "Operating Income",
+    "EBITDA",
+    "Net Income",
+    "Diluted EPS",
+    "Free Cash Flow",
+)
+
+# (info key, label, format) - "pct" values are fractions, "num" are abbreviated
+INFO_FIELDS = (
+    ("longName", "Name", "text"),
+    ("sector", "Sector", "text"),
+    ("industry", "Industry", "text"),
+    ("currency", "Currency", "text"),
+    ("marketCap", "Market cap", "num"),
+    ("currentPrice", "Price", "num"),
+    ("trailingPE", "P/E", "num"),
+    ("forwardPE", "Forward P/E", "num"),
+    ("trailingEps", "EPS", "num"),
+    ("revenueGrowth", "Revenue growth", "pct"),
+    ("earningsGrowth", "Earnings growth", "pct"),
+    ("profitMargins", "Profit margin", "pct"),
+    ("returnOnEquity", "ROE", "pct"),
+    ("debtToEquity", "Debt/Equity", "num"),
+    ("recommendationKey", "Analyst rating", "text"),
+    ("targetMeanPrice", "Target price", "num"),
+    ("numberOfAnalystOpinions", "Analysts", "num"),
+)
+
+
+# Rough token count (about four characters per token for English text)
+def estimate_tokens(text):
+    return len(text) // 4 + 1
+
+
+def format_number(value):
+    if value is None or (isinstance(value, float) and pd.isna(value)):
+        return "N/A"
+    if not isinstance(value, (int, float)):
+        return str(value)
+    for threshold, suffix in ((1e12, "T"), (1e9, "B"), (1e6, "M"), (1e3, "K")):
+        if abs(value) >= threshold:
+            return f"{value / threshold:.1f}{suffix}"
+    return f"{value:.2f}".rstrip("0").rstrip(".")
+
+
+def info_digest(info):
+    parts = []
+    for key, label, kind in INFO_FIELDS:
+        value = (info or {}).get(key)
+        if value is None or value == "":
+            continue
+        if kind == "pct" and isinstance(value, (int, float)):
+            value = f"{value:.1%}"
+        elif kind == "num":
+            value = format_number(value)
+        parts.append(f"{label}={value}")
+    return "; ".join(parts)
+
+
+def financials_digest(financials, periods=3):
+    if financials is None or getattr(financials, "empty", True):
+        return ""
+    columns = list(financials.columns[:periods])
+    labels = [str(c.year) if hasattr(c, "year") else str(c) for c in columns]
+    lines = []
+    for item in FINANCIAL_LINE_ITEMS:
+        if item not in financials.index:
+            continue
+        values = [format_number(financials.at[item, c]) for c in columns]
+        if all(v == "N/A" for v in values):
+            continue
+        lines.append(f"{item}: {' | '.join(values)}")
+    if not lines:
+        return ""
+    return f"Financials ({' | '.join(labels)}): " + "; ".join(lines)
+
+
+# yfinance has returned news both as flat dicts and nested under "content"
+def _headline(item):
+    content = item.get("content") or item
+    title = content.get("title")
+    provider = content.get("publisher") or (content.get("provider") or {}).get("displayName")
+    return title, provider
+
+
+def news_headlines(news, limit=8):
+    headlines, seen = [], set()
+    for item in news or []:
+        title, provider = _headline(item)
+        if not title:
+            continue
+        normalized = re.sub(r"[^a-z0-9]+", " ", title.lower()).strip()
+        if normalized in seen:
+            continue
+        seen.add(normalized)
+        headlines.append(f"{title} ({provider})" if provider else title)
+        if len(headlines) >= limit:
+            break
+    return headlines
+
+
+# Profile line, key financial line items and deduplicated headlines, keeping
+# as many headlines as fit in the token budget
+def fundamentals_digest(financials, info, news, max_tokens=350):
+    sections = [s for s in (info_digest(info), financials_digest(financials)) if s]
+    text = "\n".join(sections)
+    headlines = []
+    for headline in news_headlines(news):
+        candidate = "\n".join([text, "Headlines:"] + [f"- {h}" for h in headlines + [headline]])
+        if estimate_tokens(candidate) > max_tokens:
+            break
+        headlines.append(headline)
+    if headlines:
+        text = "\n".join([text, "Headlines:"] + [f"- {h}" for h in headlines])
+    return text
@@ -0,0 +1,98 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+# Server-side downsampling applied before building Plotly figures, so the
+# payload sent to the browser stays bounded however much history is loaded.
+# Callers pass the visible slice; the resolution follows from its length.
+MAX_LINE_POINTS = 2000
+MAX_CANDLES = 800
+
+
+def _as_float(x):
+    if isinstance(x, pd.DatetimeIndex):
+        return x.asi8.astype(float)
+    values = np.asarray(x)
+    if np.issubdtype(values.dtype, np.datetime64):
+        return values.astype("datetime64[ns]").astype(np.int64).astype(float)
+    return values.astype(float)
+
+
+# Largest-Triangle-Three-Buckets: indices of the points that best preserve the
+# visual shape of the line (first and last points are always kept)
+def lttb_indices(x, y, max_points=MAX_LINE_POINTS):
+    n = len(y)
+    if max_points >= n or max_points < 3:
+        return np.arange(n)
+    x = _as_float(x)
+    y = np.asarray(y, dtype=float)
+    every = (n - 2) / (max_points - 2)
+    sampled = np.empty(max_points, dtype=np.int64)
+    sampled[0] = a = 0
+    for i in range(max_points - 2):
+        # Average of the next bucket is the third vertex of the triangle
+        next_start = int(math.floor((i + 1) * every)) + 1
+        next_end = min(int(math.floor((i + 2) * every)) + 1, n)
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        start = int(math.floor(i * every)) + 1
+        end = int(math.floor((i + 1) * every)) + 1
+        areas = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(areas))
+        sampled[i + 1] = a
+    sampled[-1] = n - 1
+    return sampled
+
+
+# LTTB-downsampled copy of a Series (index used as x); NaN points are dropped first
+def downsample_line(series, max_points=MAX_LINE_POINTS):
+    series = series.dropna()
+    if len(series) <= max_points:
+        return series
+    return series.iloc[lttb_indices(series.index, series.to_numpy(), max_points)]
+
+
+# Rows of a frame of lines to plot for all of its columns: the union of each
+# column's LTTB points (NaNs skipped), with the point budget split between the
+# columns, so the traces share their x positions and an x-unified hover lines up
+def downsample_lines(frame, max_points=MAX_LINE_POINTS):
+    if len(frame) <= max_points or len(frame.columns) == 0:
+        return frame
+    budget = max(3, max_points // len(frame.columns))
+    x = _as_float(frame.index)
+    rows = []
+    for column in frame.columns:
+        y = frame[column].to_numpy(dtype=float)
+        valid = np.flatnonzero(~np.isnan(y))
+        rows.append(valid[lttb_indices(x[valid], y[valid], budget)])
+    return frame.iloc[np.unique(np.concatenate(rows))]
+
+
+# Aggregate consecutive candles into buckets (first open, max high, min low,
+# last close, summed volume) so at most max_bars candles remain. The time of
+# each bucket is its first bar, from `time_column` or the index if None.
+def downsample_ohlc(df, max_bars=MAX_CANDLES, time_column=None):
+    n = len(df)
+    if n <= max_bars:
+        return df
+    size = math.ceil(n / max_bars)
+    starts = np.arange(0, n, size)
+    ends = np.minimum(starts + size, n) - 1
+
+    columns = {}
+    if time_column is not None:
+        columns[time_column] = df[time_column].to_numpy()[starts]
+    if "Open" in df.columns:
+        columns["Open"] = df["Open"].to_numpy()[starts]
+    if "High" in df.columns:
+        columns["High"] = np.fmax.reduceat(df["High"].to_numpy(dtype=float), starts)
+    if "Low" in df.columns:
+        columns["Low"] = np.fmin.reduceat(df["Low"].to_numpy(dtype=float), starts)
+    if "Close" in df.columns:
+        columns["Close"] = df["Close"].to_numpy()[ends]
+    if "Volume" in df.columns:
+        columns["Volume"] = np.add.reduceat(np.nan_to_num(df["Volume"].to_numpy(dtype=float)), starts)
+    index = pd.RangeIndex(len(starts)) if time_column is not None else df.index[starts]
+    return pd.DataFrame(columns, index=index)
@@ -0,0 +1,181 @@
+import bisect
+import copy
+import math
+import threading
+from collections import deque
+
+import numpy as np
+
+import telemetry
+
+# Incremental versions of the pandas_ta indicators used by app5. Each object
+# holds its rolling state, so appending a bar costs O(1) instead of recomputing
+# the whole history. Values match ta.sma, ta.rsi and ta.bbands (ddof=0),
+# including the NaN warm-up period.
+
+NAN = float("nan")
+
+
+class SMA:
+    def __init__(self, length):
+        self.length = length
+        self._window = deque()
+        self._sum = 0.0
+
+    def update(self, value):
+        self._window.append(value)
+        self._sum += value
+        if len(self._window) > self.length:
+            self._sum -= self._window.popleft()
+        if len(self._window) < self.length:
+            return NAN
+        return self._sum / self.length
+
+
+# pandas_ta's RMA: ewm(alpha=1/length, min_periods=length, adjust=True).mean()
+class _RMA:
+    def __init__(self, length):
+        self.length = length
+        self._decay = 1.0 - 1.0 / length
+        self._weighted_sum = 0.0
+        self._weight = 0.0
+        self._count = 0
+
+    def update(self, value):
+        self._weighted_sum = value + self._decay * self._weighted_sum
+        self._weight = 1.0 + self._decay * self._weight
+        self._count += 1
+        if self._count < self.length:
+            return NAN
+        return self._weighted_sum / self._weight
+
+
+# Wilder RSI from running averages of gains and losses
+class RSI:
+    def __init__(self, length=14, scalar=100.0):
+        self.scalar = scalar
+        self._gains = _RMA(length)
+        self._losses = _RMA(length)
+        self._previous = None
+
+    def update(self, close):
+        previous, self._previous = self._previous, close
+        if previous is None:
+            return NAN
+        change = close - previous
+        gain = self._gains.update(max(change, 0.0))
+        loss = self._losses.update(max(-change, 0.0))
+        if math.isnan(gain) or gain + loss == 0:
+            return NAN
+        return self.scalar * gain / (gain + loss)
+
+
+# Bollinger Bands from a running sum and sum of squares (population variance)
+class BollingerBands:
+    # Recompute the running sums from the window this often to bound rounding drift
+    RESYNC_EVERY = 10_000
+
+    def __init__(self, length=20, std=2.0):
+        self.length = length
+        self.std = std
+        self._window = deque()
+        self._sum = 0.0
+        self._sum_sq = 0.0
+        self._updates = 0
+
+    def update(self, close):
+        self._window.append(close)
+        self._sum += close
+        self._sum_sq += close * close
+        if len(self._window) > self.length:
+            old = self._window.popleft()
+            self._sum -= old
+            self._sum_sq -= old * old
+        self._updates += 1
+        if self._updates % self.RESYNC_EVERY == 0:
+            self._sum = sum(self._window)
+            self._sum_sq = sum(v * v for v in self._window)
+        if len(self._window) < self.length:
+            return NAN, NAN, NAN, NAN, NAN
+
+        mid = self._sum / self.length
+        deviation = self.std * math.sqrt(max(self._sum_sq / self.length - mid * mid, 0.0))
+        lower, upper = mid - deviation, mid + deviation
+        width = upper - lower
+        bandwidth = 100 * width / mid if mid else NAN
+        percent = (close - lower) / width if width else NAN
+        return lower, mid, upper, bandwidth, percent
+
+
+# The app5 indicator block (SMA20, SMA50, RSI14, BB20) over one price history,
+# meant to be kept per symbol over everything the price store holds for it.
+# update() only processes bars after the last one it has seen and appends their
+# values to growing arrays; if the latest bar was revised (a partial session
+# refreshed by the price store) it is replayed, and if the first one changed
+# (the price store re-fetched a history re-adjusted for a split or dividend)
+# everything is recomputed. frame() returns the values for a displayed window.
+class IndicatorSet:
+    BB_COLUMNS = ("BBL_20_2.0", "BBM_20_2.0", "BBU_20_2.0", "BBB_20_2.0", "BBP_20_2.0")
+    COLUMNS = ("SMA20", "SMA50", "RSI") + BB_COLUMNS
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._indicators = (SMA(20), SMA(50), RSI(14), BollingerBands(20, 2.0))
+        self._index = []
+        self._closes = []
+        # One row per column; capacity doubles as bars are appended
+        self._values = np.empty((len(self.COLUMNS), 1024))
+        self._before_last = None
+
+    def _append(self, timestamp, close):
+        sma20, sma50, rsi, bbands = self._indicators
+        position = len(self._index)
+        if position == self._values.shape[1]:
+            self._values = np.concatenate([self._values, np.empty_like(self._values)], axis=1)
+        self._index.append(timestamp)
+        self._closes.append(close)
+        self._values[:, position] = (sma20.update(close), sma50.update(close), rsi.update(close)) + bbands.update(close)
+
+    def _drop_last(self):
+        self._indicators = self._before_last
+        self._before_last = None
+        self._index.pop()
+        self._closes.pop()
+
+    def _extends(self, index):
+        n = len(self._index)
+        return 0 < n <= len(index) and index[0] == self._index[0] and index[n - 1] == self._index[-1]
+
+    # Process the bars of `df` (the whole history, oldest first) not seen yet
+    @telemetry.traced("indicators.IndicatorSet.update", "indicators")
+    def update(self, df):
+        with self._lock:
+            index = df.index
+            start = len(self._index)
+            if not self._extends(index) or float(df["Close"].iloc[0]) != self._closes[0]:
+                # A different history, or the same one re-adjusted for a split or dividend
+                self._reset()
+            elif float(df["Close"].iloc[start - 1]) != self._closes[-1]:
+                if self._before_last is None:
+                    self._reset()
+                else:
+                    self._drop_last()
+
+            start = len(self._index)
+            closes = df["Close"].iloc[start:].to_numpy(dtype=float)
+            for i, close in enumerate(closes, start):
+                if i == len(index) - 1:
+                    # Keep the state from before the newest bar so a revision can be replayed
+                    self._before_last = copy.deepcopy(self._indicators)
+                self._append(index[i], close)
+            return self
+
+    # `df` (a window of the history passed to update()) with the indicator columns added
+    def frame(self, df):
+        with self._lock:
+            first = bisect.bisect_left(self._index, df.index[0]) if len(df) else 0
+            values = self._values[:, first:first + len(df)].copy()
+        return df.assign(**dict(zip(self.COLUMNS, values)))
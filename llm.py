@@ -0,0 +1,109 @@
+import time
+
+import providers
+import telemetry
+from scheduler import schedulers
+from llm_cache import LLMCache
+
+# Shared entry points for every Anthropic and OpenAI call in the apps.
+# Completions are served from the persistent response cache when possible.
+cache = LLMCache()
+
+
+# Anthropic messages.create, returning the text of the first content block. With
+# `parse`, returns parse(text) instead: a reply cut off at max_tokens, or one that
+# `parse` rejects with ValueError, raises ValueError and is not kept in the cache.
+def anthropic_text(client, parse=None, **params):
+    with telemetry.span("anthropic.messages.create", "llm", model=params.get("model")) as span:
+        key = cache.key("anthropic", params)
+        text = cache.get(key)
+        fresh = text is None
+        span.set(cache_hit=not fresh)
+        if fresh:
+            text, usage = providers.get_provider().anthropic_create(client, params)
+            span.set(**(usage or {}))
+            if parse is not None and (usage or {}).get("stop_reason") == "max_tokens":
+                raise ValueError(f"Reply cut off at max_tokens={params.get('max_tokens')}")
+        result = text
+        if parse is not None:
+            try:
+                result = parse(text)
+            except ValueError:
+                if not fresh:
+                    cache.delete(key)
+                raise
+        if fresh:
+            cache.set(key, text)
+        return result
+
+
+# OpenAI chat completion, returning the message content of the first choice
+def openai_text(**params):
+    with telemetry.span("openai.chat.completions.create", "llm", model=params.get("model")) as span:
+        key = cache.key("openai", params)
+        text = cache.get(key)
+        span.set(cache_hit=text is not None)
+        if text is None:
+            text, usage = providers.get_provider().openai_create(params)
+            span.set(**(usage or {}))
+            cache.set(key, text)
+        return text
+
+
+# Yield the chunks of a provider stream, recording time to first token and usage
+def _stream(span, chunks, usage):
+    collected = []
+    for chunk in chunks:
+        if not collected:
+            span.set(first_token_ms=round((time.time() - span.started) * 1000, 1))
+        collected.append(chunk)
+        yield chunk
+    span.set(**usage)
+    return "".join(collected)
+
+
+# Streaming variant of anthropic_text yielding text chunks as they arrive. A cached
+# response is yielded in one piece; a fresh one is cached once the stream completes.
+def anthropic_stream(client, **params):
+    with telemetry.span("anthropic.messages.stream", "llm", model=params.get("model")) as span:
+        key = cache.key("anthropic", params)
+        text = cache.get(key)
+        span.set(cache_hit=text is not None)
+        if text is not None:
+            yield text
+            return
+        usage = {}
+        text = yield from _stream(span, providers.get_provider().anthropic_stream(client, params, usage), usage)
+        cache.set(key, text)
+
+
+# Streaming variant of openai_text
+def openai_stream(**params):
+    with telemetry.span("openai.chat.completions.stream", "llm", model=params.get("model")) as span:
+        key = cache.key("openai", params)
+        text = cache.get(key)
+        span.set(cache_hit=text is not None)
+        if text is not None:
+            yield text
+            return
+        usage = {}
+        text = yield from _stream(span, providers.get_provider().openai_stream(params, usage), usage)
+        cache.set(key, text)
+
+
+# Show the response cache hit rate and the request schedulers in the Streamlit sidebar
+def show_cache_stats():
+    import streamlit as st
+
+    stats = cache.stats()
+    st.sidebar.metric(
+        "LLM cache hit rate",
+        f"{stats['hit_rate']:.0%}",
+        help=f"{stats['hits']} hits, {stats['misses']} misses, {stats['entries']} cached responses",
+    )
+    for name, scheduler in sorted(schedulers().items()):
+        s = scheduler.stats()
+        st.sidebar.caption(
+            f"{name}: {s['calls']} calls, {s['retries']} retries ({s['throttled']} throttled), "
+            f"concurrency {s['concurrency']:g}, {s['in_flight']} in flight"
+        )
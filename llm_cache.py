@@ -0,0 +1,100 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# Persistent cache of LLM completions, keyed by provider and the full request
+# (model, system prompt, messages, sampling parameters). Entries expire after
+# TTL_SECONDS and the least recently used ones are evicted beyond MAX_ENTRIES.
+CACHE_PATH = os.environ.get("INVESTOR_LLM_CACHE_PATH", os.path.join(".cache", "llm_cache.sqlite3"))
+TTL_SECONDS = int(os.environ.get("INVESTOR_LLM_CACHE_TTL", 24 * 60 * 60))
+MAX_ENTRIES = int(os.environ.get("INVESTOR_LLM_CACHE_MAX_ENTRIES", 5000))
+
+
+class LLMCache:
+    def __init__(self, path=CACHE_PATH, ttl=TTL_SECONDS, max_entries=MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+
+    # One connection per thread; WAL keeps hit lookups and LRU bumps well under a millisecond
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, response TEXT NOT NULL, "
+                "created REAL NOT NULL, last_used REAL NOT NULL, hits INTEGER NOT NULL DEFAULT 0)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+            self._local.conn = conn
+        return conn
+
+    def key(self, provider, params):
+        payload = json.dumps({"provider": provider, **params}, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _count(self, hit):
+        with self._stats_lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, key):
+        conn = self._connection()
+        now = time.time()
+        row = conn.execute("SELECT response, created FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is None or now - row[1] > self.ttl:
+            if row is not None:
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._count(False)
+            return None
+        conn.execute("UPDATE responses SET last_used = ?, hits = hits + 1 WHERE key = ?", (now, key))
+        self._count(True)
+        return row[0]
+
+    def set(self, key, response):
+        conn = self._connection()
+        now = time.time()
+        conn.execute(
+            "INSERT OR REPLACE INTO responses (key, response, created, last_used) VALUES (?, ?, ?, ?)",
+            (key, response, now, now),
+        )
+        self._evict(conn, now)
+
+    def delete(self, key):
+        self._connection().execute("DELETE FROM responses WHERE key = ?", (key,))
+
+    def _evict(self, conn, now):
+        conn.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl,))
+        (count,) = conn.execute("SELECT COUNT(*) FROM responses").fetchone()
+        if count > self.max_entries:
+            conn.execute(
+                "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY last_used ASC LIMIT ?)",
+                (count - self.max_entries,),
+            )
+
+    def stats(self):
+        with self._stats_lock:
+            hits, misses = self.hits, self.misses
+        (entries,) = self._connection().execute("SELECT COUNT(*) FROM responses").fetchone()
+        total = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / total if total else 0.0,
+            "entries": entries,
+        }
@@ -0,0 +1,17 @@
+# Pages of the multipage app (streamlit_app.py), by sidebar section. Each page
+# is one of the standalone app scripts; Streamlit runs a page's script, and so
+# imports its dependencies, only when that page is opened. Kept free of imports
+# so the entrypoint and the import-time benchmark can read it cheaply.
+#
+# (section, script, title, icon); the first page is the default one
+PAGES = [
+    ("Research", "app3.py", "Investor analyst", ":material/insights:"),
+    ("Research", "app2.py", "Peer analysis", ":material/groups:"),
+    ("Research", "openai_investor.py", "Stock screener", ":material/filter_alt:"),
+    ("Research", "trending.py", "Crossover events", ":material/swap_vert:"),
+    ("Technical", "app4.py", "Chart patterns", ":material/candlestick_chart:"),
+    ("Technical", "app5.py", "Technical indicators", ":material/ssid_chart:"),
+    ("Technical", "artifacts.py", "Data explorer", ":material/table_chart:"),
+    ("Other", "trending2.py", "Crossover events (legacy)", ":material/history:"),
+    ("Other", "app.py", "Poem", ":material/edit_note:"),
+]
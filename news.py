@@ -0,0 +1,64 @@
+import bisect
+import threading
+import time
+from datetime import datetime, timezone
+
+from snapshot import get_snapshot
+
+# Company news fetched once per ticker and kept sorted by publish time, so the
+# news in any date window is found with two bisects instead of a linear filter.
+NEWS_TTL_SECONDS = 15 * 60
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+# Publish time in epoch seconds; yfinance has returned news both as flat dicts
+# with providerPublishTime and nested under "content" with an ISO pubDate
+def published_at(item):
+    if "providerPublishTime" in item:
+        return float(item["providerPublishTime"])
+    pub_date = (item.get("content") or {}).get("pubDate")
+    if pub_date:
+        return datetime.fromisoformat(pub_date.replace("Z", "+00:00")).timestamp()
+    return None
+
+
+def _epoch(value):
+    # Naive datetimes are taken as UTC
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+class NewsIndex:
+    def __init__(self, news):
+        dated = sorted(
+            ((published_at(item), i, item) for i, item in enumerate(news or []) if published_at(item) is not None),
+            key=lambda entry: entry[:2],
+        )
+        self._times = [entry[0] for entry in dated]
+        self._items = [entry[2] for entry in dated]
+        self.fetched_at = time.time()
+
+    def __len__(self):
+        return len(self._items)
+
+    # News published between start and end (inclusive), oldest first
+    def between(self, start, end):
+        lo = bisect.bisect_left(self._times, _epoch(start))
+        hi = bisect.bisect_right(self._times, _epoch(end))
+        return self._items[lo:hi]
+
+
+# The network fetch runs outside the global lock, so different tickers are
+# fetched concurrently; the snapshot's per-ticker lock keeps one fetch per ticker
+def get_news_index(ticker, ttl=NEWS_TTL_SECONDS):
+    with _indexes_lock:
+        index = _indexes.get(ticker)
+    if index is not None and time.time() - index.fetched_at <= ttl:
+        return index
+    index = NewsIndex(get_snapshot(ticker, ttl).news)
+    with _indexes_lock:
+        _indexes[ticker] = index
+    return index
@@ -1,87 +1,84 @@
 import streamlit as st
-import yfinance as yf
 import plotly.graph_objs as go
 import openai
-from bs4 import BeautifulSoup
 import pandas as pd
 from datetime import datetime, timedelta
-import ta
+import time
+import price_store
+import llm
+import telemetry
+from snapshot import get_snapshot
+from signals import identify_patterns
+from prompts import extract_tickers
+import screener
+from downsample import downsample_line
+from panel import PricePanel
 
 # Set Streamlit page configuration
 st.set_page_config(page_title="Investor Analysis App", layout="wide")
 
-# Initialize OpenAI API key from Streamlit secrets
+# Initialize OpenAI API key from Streamlit secrets; the shared client in clients.py uses it
 openai.api_key = st.secrets["OPENAI_API_KEY"]
 
 # Define a function to call OpenAI GPT-4 using the latest syntax
 def get_openai_response(messages):
     try:
-        response = openai.ChatCompletion.create(
+        response = llm.openai_text(
             model="gpt-4",
             messages=messages,
             temperature=0.5,
             max_tokens=1500,
         )
-        # Access the response content correctly using dictionary-style access
-        return response['choices'][0]['message']['content'].strip()
+        return response.strip()
     except Exception as e:
         st.error(f"OpenAI API error: {e}")
         return None
 
-# Function to extract tickers from OpenAI response
-def extract_tickers(response):
-    # Assuming the response is a comma-separated list of tickers or listed in lines
-    soup = BeautifulSoup(response, "html.parser")
-    text = soup.get_text()
-    # Split by comma and newline
-    tickers = [ticker.strip().upper() for ticker in text.replace('\n', ',').split(',') if ticker.strip()]
-    # Filter tickers to valid symbols (basic filter: alphabetic and up to 5 characters)
-    tickers = [ticker for ticker in tickers if ticker.isalpha() and len(ticker) <= 5]
-    return tickers[:5]
+# Same request as get_openai_response, rendering the tokens into the page as they arrive
+def stream_openai_response(messages):
+    try:
+        response = st.write_stream(llm.openai_stream(
+            model="gpt-4",
+            messages=messages,
+            temperature=0.5,
+            max_tokens=1500,
+        ))
+        return response.strip()
+    except Exception as e:
+        st.error(f"OpenAI API error: {e}")
+        return None
 
-# Function to perform sophisticated technical analysis using the ta library
-def identify_patterns(df):
-    patterns = []
-    # Ensure the dataframe has the necessary columns
-    if not {'Open', 'High', 'Low', 'Close'}.issubset(df.columns):
-        return patterns
-    
-    # Calculate Moving Averages
-    sma50 = ta.trend.SMAIndicator(close=df['Close'], window=50)
-    df['SMA50'] = sma50.sma_indicator()
-    sma200 = ta.trend.SMAIndicator(close=df['Close'], window=200)
-    df['SMA200'] = sma200.sma_indicator()
-    
-    # Calculate MACD
-    macd = ta.trend.MACD(close=df['Close'])
-    df['MACD'] = macd.macd()
-    df['MACD_Signal'] = macd.macd_signal()
-    df['MACD_Diff'] = macd.macd_diff()
-    
-    # Calculate RSI
-    rsi = ta.momentum.RSIIndicator(close=df['Close'])
-    df['RSI'] = rsi.rsi()
-    
-    # Identify Golden Cross and Death Cross
-    if df['SMA50'].iloc[-1] > df['SMA200'].iloc[-1] and df['SMA50'].iloc[-2] <= df['SMA200'].iloc[-2]:
-        patterns.append({'pattern': 'Golden Cross', 'date': df.index[-1]})
-    elif df['SMA50'].iloc[-1] < df['SMA200'].iloc[-1] and df['SMA50'].iloc[-2] >= df['SMA200'].iloc[-2]:
-        patterns.append({'pattern': 'Death Cross', 'date': df.index[-1]})
-    
-    # Identify MACD Crossovers
-    if df['MACD'].iloc[-1] > df['MACD_Signal'].iloc[-1] and df['MACD'].iloc[-2] <= df['MACD_Signal'].iloc[-2]:
-        patterns.append({'pattern': 'MACD Bullish Crossover', 'date': df.index[-1]})
-    elif df['MACD'].iloc[-1] < df['MACD_Signal'].iloc[-1] and df['MACD'].iloc[-2] >= df['MACD_Signal'].iloc[-2]:
-        patterns.append({'pattern': 'MACD Bearish Crossover', 'date': df.index[-1]})
-    
-    # Identify RSI Overbought/Oversold
-    if df['RSI'].iloc[-1] > 70:
-        patterns.append({'pattern': 'RSI Overbought', 'date': df.index[-1]})
-    elif df['RSI'].iloc[-1] < 30:
-        patterns.append({'pattern': 'RSI Oversold', 'date': df.index[-1]})
-    
-    # Limit to 5 patterns
-    return patterns[:5]
+# Universe-wide pattern screener, streaming matches into a table as tickers are evaluated
+def screener_section():
+    with st.expander("Universe Pattern Screener"):
+        st.write("Run the golden/death cross, MACD crossover and RSI checks over a whole list of tickers.")
+        universe = st.text_area("Tickers (comma or newline separated)", value="AAPL, MSFT, NVDA, AMD, INTC, TSM, AVGO, QCOM")
+        if st.button("Run Screener"):
+            tickers = list(dict.fromkeys(t.strip().upper() for t in universe.replace('\n', ',').split(',') if t.strip()))
+            if not tickers:
+                st.error("No tickers to screen.")
+                return
+            progress = st.progress(0.0)
+            matches_placeholder = st.empty()
+            matches, timings = [], []
+            started = time.perf_counter()
+            for i, result in enumerate(screener.screen(tickers), start=1):
+                timings.append({
+                    "Ticker": result["ticker"],
+                    "Bars": result["bars"],
+                    "Fetch (ms)": round(result["fetch_seconds"] * 1000, 1),
+                    "Evaluate (ms)": round(result["eval_seconds"] * 1000, 1),
+                    "Error": result["error"] or "",
+                })
+                for pattern in result["patterns"]:
+                    matches.append({"Ticker": result["ticker"], "Pattern": pattern["pattern"], "Date": pattern["date"]})
+                if result["patterns"]:
+                    matches_placeholder.dataframe(pd.DataFrame(matches), use_container_width=True)
+                progress.progress(i / len(tickers), text=f"Screened {i}/{len(tickers)} tickers")
+            if not matches:
+                matches_placeholder.info("No patterns found.")
+            st.write(f"Screened {len(tickers)} tickers in {time.perf_counter() - started:.1f}s")
+            st.dataframe(pd.DataFrame(timings), use_container_width=True)
 
 # Streamlit App
 def main():
@@ -117,11 +114,10 @@ def main():
                 return
             st.success(f"**Top 5 Tickers:** {', '.join(tickers)}")
             
-            # Step 2: Retrieve 2 years of weekly historical close data
+            # Step 2: Retrieve 2 years of weekly historical prices on one shared index
             @st.cache_data
             def fetch_historical_close(tickers):
-                data = yf.download(tickers, period="2y", interval="1wk")['Close']
-                return data
+                return PricePanel.load(tickers, period="2y", interval="1wk").dropna()
 
             data = fetch_historical_close(tickers)
             if data.empty:
@@ -147,11 +143,16 @@ def main():
             else:
                 start_date = data.index.min()
             
-            filtered_data = data[data.index >= start_date]
+            rebase = st.toggle("Rebase prices to 100", value=False)
+            
+            filtered_data = data.since(start_date)
             
+            # Rebased to 100 at the start of the selected period
+            lines = filtered_data.rebased() if rebase else filtered_data['Close']
             fig = go.Figure()
-            for ticker in tickers:
-                fig.add_trace(go.Scatter(x=filtered_data.index, y=filtered_data[ticker], mode='lines', name=ticker))
+            for ticker in filtered_data.tickers:
+                close = downsample_line(lines[ticker].dropna())
+                fig.add_trace(go.Scatter(x=close.index, y=close, mode='lines', name=ticker))
             fig.update_layout(height=600, width=1200, hovermode='x unified')
             
             # Add a range slider
@@ -176,7 +177,7 @@ def main():
             # Step 4: Retrieve financials, info, and news for each ticker
             ticker_data = {}
             for ticker in tickers:
-                stock = yf.Ticker(ticker)
+                stock = get_snapshot(ticker)
                 try:
                     financials = stock.financials
                     info = stock.info
@@ -235,7 +236,8 @@ def main():
                 "content": recommendation_input
             }
             messages_recommend = [system_message_recommend, user_message_recommend]
-            recommendation_response = get_openai_response(messages_recommend)
+            st.subheader("Recommendation")
+            recommendation_response = stream_openai_response(messages_recommend)
             if recommendation_response is None:
                 st.error("Failed to get recommendation.")
                 return
@@ -294,9 +296,8 @@ def main():
                 st.error("No data available for the selected top stock.")
             
             # Step 6: Retrieve one year of daily data for the top stock
-            @st.cache_data
             def fetch_daily_data(ticker):
-                return yf.download(ticker, period="1y", interval="1d")
+                return price_store.get_history(ticker, period="1y", interval="1d")
             
             top_stock = selected_stock
             top_stock_data = fetch_daily_data(top_stock)
@@ -335,6 +336,7 @@ def main():
                     )
             
             # Add technical indicators to the chart
+            import ta
             sma50 = ta.trend.SMAIndicator(close=top_stock_data['Close'], window=50)
             top_stock_data['SMA50'] = sma50.sma_indicator()
             sma200 = ta.trend.SMAIndicator(close=top_stock_data['Close'], window=200)
@@ -391,3 +393,6 @@ def main():
 
 if __name__ == "__main__":
     main()
+    screener_section()
+    llm.show_cache_stats()
+    telemetry.show_telemetry()
@@ -0,0 +1,131 @@
+import numpy as np
+import pandas as pd
+
+import price_store
+import telemetry
+
+# Prices of a peer set on one shared date index: one float array per field,
+# with time along axis 0 and one column per ticker (as in signals.py), so
+# cross-ticker maths runs on whole arrays instead of reindexing per ticker.
+# The index is the union of the tickers' calendars; a ticker without a bar on
+# some date has NaN there, and the derived series forward-fill over such gaps.
+
+
+def _window_sums(values, window):
+    sums = np.cumsum(values, axis=0)
+    sums = np.concatenate([np.zeros((1,) + values.shape[1:]), sums])
+    return sums[window:] - sums[:-window]
+
+
+# Forward-fill NaNs down each column (leading NaNs stay)
+def _ffill(values):
+    positions = np.where(np.isnan(values), 0, np.arange(len(values))[:, None])
+    np.maximum.accumulate(positions, axis=0, out=positions)
+    return np.take_along_axis(values, positions, axis=0)
+
+
+class PricePanel:
+    def __init__(self, index, tickers, fields):
+        self.index = index
+        self.tickers = list(tickers)
+        self.fields = fields
+
+    # From a price_store.get_panel frame with (field, ticker) columns
+    @classmethod
+    def from_frame(cls, frame, tickers=None):
+        tickers = list(tickers) if tickers is not None else list(dict.fromkeys(frame.columns.get_level_values(1)))
+        fields = {}
+        for field in dict.fromkeys(frame.columns.get_level_values(0)):
+            fields[field] = frame[field].reindex(columns=tickers).to_numpy(dtype=float)
+        return cls(pd.DatetimeIndex(frame.index), tickers, fields)
+
+    @classmethod
+    def load(cls, tickers, period=None, start=None, end=None, interval="1d", fields=price_store.PANEL_FIELDS):
+        tickers = list(dict.fromkeys(tickers))
+        frame = price_store.get_panel(tickers, period=period, start=start, end=end, interval=interval, fields=fields)
+        return cls.from_frame(frame, tickers)
+
+    # One ticker's bars, e.g. from price_store.get_history
+    @classmethod
+    def from_history(cls, ticker, data, fields=price_store.PANEL_FIELDS):
+        fields = {field: data[field].to_numpy(dtype=float)[:, None] for field in fields if field in data.columns}
+        return cls(pd.DatetimeIndex(data.index), [ticker], fields)
+
+    def __len__(self):
+        return len(self.index)
+
+    @property
+    def empty(self):
+        return len(self.index) == 0 or not self.tickers
+
+    # Dates by tickers frame of one field, e.g. panel["Close"][ticker]
+    def __getitem__(self, field):
+        return pd.DataFrame(self.fields[field], index=self.index, columns=self.tickers, copy=False)
+
+    def _take(self, rows):
+        return PricePanel(self.index[rows], self.tickers, {field: values[rows] for field, values in self.fields.items()})
+
+    # Bars from `start` on
+    def since(self, start):
+        return self._take(slice(self.index.searchsorted(pd.Timestamp(start)), None))
+
+    # Without the dates on which no ticker has a value for `field`
+    def dropna(self, field="Close"):
+        return self._take(~np.isnan(self.fields[field]).all(axis=1))
+
+    # Values of `field` forward-filled over each ticker's missing dates
+    def filled(self, field="Close"):
+        return _ffill(self.fields[field])
+
+    # Per-bar simple returns; the first bar and the bars before a ticker's first price are NaN
+    def returns(self, field="Close"):
+        prices = self.filled(field)
+        returns = np.full_like(prices, np.nan)
+        returns[1:] = prices[1:] / prices[:-1] - 1
+        return pd.DataFrame(returns, index=self.index, columns=self.tickers)
+
+    # Prices divided by each ticker's first price in the panel
+    def normalized(self, field="Close"):
+        prices = self.filled(field)
+        if len(prices) == 0:
+            return pd.DataFrame(prices, index=self.index, columns=self.tickers)
+        first = prices[(~np.isnan(prices)).argmax(axis=0), np.arange(prices.shape[1])]
+        return pd.DataFrame(prices / first, index=self.index, columns=self.tickers)
+
+    # Cumulative return of each ticker since the start of the panel
+    def normalized_returns(self, field="Close"):
+        return self.normalized(field) - 1
+
+    # Every ticker rebased to `base` (100 by default) at the start of the panel
+    def rebased(self, base=100.0, field="Close"):
+        return self.normalized(field) * base
+
+    # Rolling correlation of the daily returns of every pair of tickers, from
+    # windowed sums in one pass: an array of shape (dates, tickers, tickers),
+    # NaN until a pair has `window` returns
+    @telemetry.traced("panel.rolling_correlation", "indicators")
+    def rolling_correlation(self, window=60, field="Close"):
+        returns = self.returns(field).to_numpy()
+        dates, count = returns.shape
+        result = np.full((dates, count, count), np.nan)
+        if dates < window or window < 2:
+            return result
+        valid = ~np.isnan(returns)
+        x = np.where(valid, returns, 0.0)
+
+        complete = _window_sums(valid.astype(float), window) == window
+        mean = _window_sums(x, window) / window
+        variance = _window_sums(x * x, window) / window - mean * mean
+        covariance = _window_sums(x[:, :, None] * x[:, None, :], window) / window - mean[:, :, None] * mean[:, None, :]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            correlation = covariance / np.sqrt(variance[:, :, None] * variance[:, None, :])
+        mask = complete[:, :, None] & complete[:, None, :] & (variance[:, :, None] > 0) & (variance[:, None, :] > 0)
+        result[window - 1:] = np.where(mask, np.clip(correlation, -1.0, 1.0), np.nan)
+        return result
+
+    # Rolling correlation of `ticker` with each of the other tickers
+    def correlation_with(self, ticker, window=60, field="Close"):
+        position = self.tickers.index(ticker)
+        others = [i for i in range(len(self.tickers)) if i != position]
+        correlation = self.rolling_correlation(window, field)[:, position, others]
+        return pd.DataFrame(correlation, index=self.index, columns=[self.tickers[i] for i in others])
@@ -0,0 +1,160 @@
+import numpy as np
+import pandas as pd
+
+import telemetry
+
+# Full-history chart pattern scanner: head and shoulders, double top, double
+# bottom and shooting star. Swing highs/lows come from O(n) rolling max/min
+# windows and the pattern rules are evaluated on whole arrays at once, so every
+# occurrence in years of daily bars is found in milliseconds.
+
+DESCRIPTIONS = {
+    "Head and Shoulders": ("A reversal pattern signaling the end of an uptrend.", "Sell (Bearish Reversal)"),
+    "Double Top": ("A bearish reversal pattern formed after two peaks.", "Sell (Bearish Reversal)"),
+    "Double Bottom": ("A bullish reversal pattern formed after two troughs.", "Buy (Bullish Reversal)"),
+    "Shooting Star": ("A bearish candle with a long upper wick after buyers lost control.", "Sell (Bearish Reversal)"),
+}
+
+
+# Positions of swing highs (or lows): bars equal to the max (min) of the centered
+# window of 2 * order + 1 bars; on flat tops only the first bar is kept
+def local_extrema(values, order=5, kind="max"):
+    values = np.asarray(values, dtype=float)
+    window = pd.Series(values).rolling(2 * order + 1, center=True, min_periods=1)
+    extreme = (window.max() if kind == "max" else window.min()).to_numpy()
+    flags = values == extreme
+    flags[1:] &= values[1:] != values[:-1]
+    return np.flatnonzero(flags)
+
+
+def _occurrence(pattern, dates, position, price, params):
+    description, action = DESCRIPTIONS[pattern]
+    return {
+        "Pattern": pattern,
+        "Description": description,
+        "Date": dates[position],
+        "Price": float(price),
+        "Key Parameters": {k: round(float(v), 2) for k, v in params.items()},
+        "Suggested Action": action,
+    }
+
+
+# Occurrence dicts from the arrays returned by the _find_* functions
+def _occurrences(pattern, dates, found):
+    positions, confirmed, prices, params = found
+    return [
+        _occurrence(pattern, dates, position, prices[i], {name: values[i] for name, values in params.items()})
+        for i, position in enumerate(positions)
+    ]
+
+
+# Each _find_* function returns (positions, confirmed, prices, params): the bar
+# each occurrence is dated at, the bar from which it is known (a swing high or
+# low is only known `order` bars after it), its price and its key parameters.
+def _none():
+    empty = np.zeros(0, dtype=int)
+    return empty, empty, np.zeros(0), {}
+
+
+def _find_head_and_shoulders(high, low, order=5, shoulder_tolerance=0.03, min_head_excess=0.01):
+    peaks = local_extrema(high, order, "max")
+    if len(peaks) < 3:
+        return _none()
+    left, head, right = high[peaks[:-2]], high[peaks[1:-1]], high[peaks[2:]]
+    shoulders = np.maximum(left, right)
+    matches = np.flatnonzero(
+        (head > shoulders * (1 + min_head_excess))
+        & (np.abs(left - right) / shoulders <= shoulder_tolerance)
+    )
+    # Lowest low between consecutive peaks; the neckline is the lower of the two troughs
+    troughs = np.minimum.reduceat(low, peaks)[:-1]
+    neckline = np.minimum(troughs[:-1], troughs[1:])
+    params = {"Left Peak": left[matches], "Middle Peak": head[matches], "Right Peak": right[matches], "Neckline": neckline[matches]}
+    return peaks[matches + 1], peaks[matches + 2] + order, head[matches], params
+
+
+def _find_double_tops(high, low, order=5, tolerance=0.02, min_depth=0.03):
+    peaks = local_extrema(high, order, "max")
+    if len(peaks) < 2:
+        return _none()
+    first, second = high[peaks[:-1]], high[peaks[1:]]
+    top = np.maximum(first, second)
+    trough = np.minimum.reduceat(low, peaks)[:-1]
+    matches = np.flatnonzero((np.abs(first - second) / top <= tolerance) & (trough <= top * (1 - min_depth)))
+    params = {"High 1": first[matches], "High 2": second[matches], "Trough": trough[matches]}
+    return peaks[matches + 1], peaks[matches + 1] + order, first[matches], params
+
+
+def _find_double_bottoms(high, low, order=5, tolerance=0.02, min_depth=0.03):
+    troughs = local_extrema(low, order, "min")
+    if len(troughs) < 2:
+        return _none()
+    first, second = low[troughs[:-1]], low[troughs[1:]]
+    bottom = np.minimum(first, second)
+    peak = np.maximum.reduceat(high, troughs)[:-1]
+    matches = np.flatnonzero((np.abs(first - second) / bottom <= tolerance) & (peak >= bottom * (1 + min_depth)))
+    params = {"Low 1": first[matches], "Low 2": second[matches], "Peak": peak[matches]}
+    return troughs[matches + 1], troughs[matches + 1] + order, first[matches], params
+
+
+def _find_shooting_stars(open_, high, close):
+    body = np.abs(close - open_)
+    wick = high - close
+    matches = np.flatnonzero((wick > 2 * body) & (close < open_))
+    return matches, matches, high[matches], {"Body": body[matches], "Wick": wick[matches]}
+
+
+# Three consecutive swing highs with the middle (head) highest and the two
+# shoulders within `shoulder_tolerance` of each other
+def head_and_shoulders(high, low, dates, order=5, shoulder_tolerance=0.03, min_head_excess=0.01):
+    return _occurrences("Head and Shoulders", dates, _find_head_and_shoulders(high, low, order, shoulder_tolerance, min_head_excess))
+
+
+# Two consecutive swing highs within `tolerance` of each other, separated by a
+# trough at least `min_depth` below them
+def double_tops(high, low, dates, order=5, tolerance=0.02, min_depth=0.03):
+    return _occurrences("Double Top", dates, _find_double_tops(high, low, order, tolerance, min_depth))
+
+
+# Mirror image of double_tops on swing lows
+def double_bottoms(high, low, dates, order=5, tolerance=0.02, min_depth=0.03):
+    return _occurrences("Double Bottom", dates, _find_double_bottoms(high, low, order, tolerance, min_depth))
+
+
+# Bearish candles whose wick above the close is more than twice the body
+def shooting_stars(open_, high, close, dates):
+    return _occurrences("Shooting Star", dates, _find_shooting_stars(open_, high, close))
+
+
+# Suggested Action of every pattern as an array over the bars: +1 (buy) or -1
+# (sell) on the bar where a pattern becomes known, without looking ahead. A
+# later pattern on the same bar wins.
+def pattern_signals(open_, high, low, close, order=5):
+    signals = np.zeros(len(close), dtype=np.int8)
+    for pattern, found in (
+        ("Head and Shoulders", _find_head_and_shoulders(high, low, order)),
+        ("Double Top", _find_double_tops(high, low, order)),
+        ("Double Bottom", _find_double_bottoms(high, low, order)),
+        ("Shooting Star", _find_shooting_stars(open_, high, close)),
+    ):
+        confirmed = found[1]
+        confirmed = confirmed[confirmed < len(close)]
+        signals[confirmed] = 1 if DESCRIPTIONS[pattern][1].startswith("Buy") else -1
+    return signals
+
+
+# Every pattern occurrence in an OHLC frame, in date order. Dates come from a
+# 'Date' column if there is one, otherwise from the index.
+@telemetry.traced("patterns.scan_patterns", "indicators")
+def scan_patterns(data, order=5):
+    if len(data) < 3:
+        return []
+    dates = pd.DatetimeIndex(data["Date"]) if "Date" in data.columns else data.index
+    open_, high, low, close = (data[c].to_numpy(dtype=float) for c in ("Open", "High", "Low", "Close"))
+    occurrences = (
+        head_and_shoulders(high, low, dates, order)
+        + double_tops(high, low, dates, order)
+        + double_bottoms(high, low, dates, order)
+        + shooting_stars(open_, high, close, dates)
+    )
+    return sorted(occurrences, key=lambda o: o["Date"])
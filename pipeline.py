@@ -0,0 +1,72 @@
+import hashlib
+import time
+
+import telemetry
+
+# Small DAG of named, cached stages with explicit inputs. A stage's key is
+# derived from the keys of its inputs (page parameters or other stages), and a
+# stage only re-executes when that key changes, so a changed parameter re-runs
+# just the stages below it and a rerun with unchanged inputs runs nothing.
+# Results are kept in a mapping that survives reruns, e.g. st.session_state.
+
+
+def _fingerprint(value):
+    return hashlib.sha256(repr(value).encode("utf-8")).hexdigest()
+
+
+class Pipeline:
+    def __init__(self, name, params, store):
+        self.name = name
+        self.params = params
+        self._store = store
+        self._stages = {}
+        self.executed = []
+
+    # Register a stage; `inputs` names page parameters or other stages and the
+    # stage function receives their values positionally. A stage with `ttl`
+    # also re-executes once per `ttl` seconds (e.g. prices the store refreshes).
+    def stage(self, name=None, inputs=(), ttl=None):
+        def decorator(func):
+            self._stages[name or func.__name__] = (func, tuple(inputs), ttl)
+            return func
+        return decorator
+
+    def _slot(self, name):
+        return f"pipeline:{self.name}:{name}"
+
+    def _generation(self, name):
+        return self._store.get(self._slot(name) + ":generation", 0)
+
+    def _resolve(self, name, memo):
+        if name in memo:
+            return memo[name]
+        if name not in self._stages:
+            if name not in self.params:
+                raise KeyError(f"Unknown pipeline input: {name}")
+            value = self.params[name]
+            memo[name] = (_fingerprint(value), value)
+            return memo[name]
+
+        func, inputs, ttl = self._stages[name]
+        upstream = [self._resolve(i, memo) for i in inputs]
+        period = int(time.time() // ttl) if ttl else None
+        key = _fingerprint((name, self._generation(name), [k for k, _ in upstream], period))
+        cached = self._store.get(self._slot(name))
+        if cached is not None and cached[0] == key:
+            value = cached[1]
+        else:
+            with telemetry.span(f"pipeline.{self.name}.{name}", "stage"):
+                value = func(*[v for _, v in upstream])
+            self._store[self._slot(name)] = (key, value)
+            self.executed.append(name)
+        memo[name] = (key, value)
+        return memo[name]
+
+    # Value of a stage, executing it (and anything above it) only if its inputs changed
+    def run(self, name):
+        return self._resolve(name, {})[1]
+
+    # Force a stage to re-execute on its next run; everything below it follows
+    # because their keys include this stage's key
+    def invalidate(self, name):
+        self._store[self._slot(name) + ":generation"] = self._generation(name) + 1
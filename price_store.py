@@ -0,0 +1,334 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import columnar
+import providers
+import telemetry
+
+# Shared on-disk OHLCV store: one file per ticker and interval, plus a small
+# JSON sidecar recording how far back the file is complete and when the tail
+# was last refreshed. Callers get cached bars and only the missing head/tail of
+# the requested range is downloaded from Yahoo.
+#
+# INVESTOR_PRICE_STORE_BACKEND selects the file format:
+#
+#   parquet  one Parquet file per ticker, read into a new frame on every load (default)
+#   mmap     columnar files (see columnar.py) mapped read-only, so worker
+#            processes share one copy of each history and loads return views of it
+STORE_DIR = os.environ.get("INVESTOR_PRICE_STORE_DIR", os.path.join(".cache", "prices"))
+STORE_BACKEND = os.environ.get("INVESTOR_PRICE_STORE_BACKEND", "parquet")
+
+# Skip the tail fetch if the stored bars were refreshed less than this many seconds ago
+REFRESH_SECONDS = int(os.environ.get("INVESTOR_PRICE_REFRESH_SECONDS", 15 * 60))
+
+# Columns of the panel returned by get_panel
+PANEL_FIELDS = ("Open", "High", "Low", "Close", "Volume")
+
+_locks = {}
+_locks_guard = threading.Lock()
+
+
+def _lock_for(key):
+    with _locks_guard:
+        return _locks.setdefault(key, threading.Lock())
+
+
+# Backends read a stored history and write one, returning the bars as read() would
+class ParquetBackend:
+    suffix = ".parquet"
+
+    def read(self, path):
+        return pd.read_parquet(path)
+
+    def write(self, path, data):
+        data.to_parquet(path + ".tmp")
+        os.replace(path + ".tmp", path)
+        return data
+
+
+class MmapBackend:
+    suffix = ".cols"
+
+    def read(self, path):
+        columns = columnar.read(path)
+        return pd.DataFrame() if columns is None else columns.frame()
+
+    def write(self, path, data):
+        columnar.write(path, data)
+        return self.read(path)
+
+
+BACKENDS = {"parquet": ParquetBackend, "mmap": MmapBackend}
+
+if STORE_BACKEND not in BACKENDS:
+    raise ValueError(f"Unknown INVESTOR_PRICE_STORE_BACKEND {STORE_BACKEND!r}, expected one of {', '.join(BACKENDS)}")
+_backend = BACKENDS[STORE_BACKEND]()
+
+
+def _paths(ticker, interval):
+    name = ticker.upper().replace("/", "_")
+    directory = os.path.join(STORE_DIR, interval)
+    return os.path.join(directory, f"{name}{_backend.suffix}"), os.path.join(directory, f"{name}.json")
+
+
+def _load(ticker, interval):
+    data_path, meta_path = _paths(ticker, interval)
+    if not os.path.exists(data_path) or not os.path.exists(meta_path):
+        return pd.DataFrame(), {}
+    with open(meta_path) as f:
+        meta = json.load(f)
+    return _backend.read(data_path), meta
+
+
+def _save(ticker, interval, data, meta):
+    data_path, meta_path = _paths(ticker, interval)
+    os.makedirs(os.path.dirname(data_path), exist_ok=True)
+    # Both files go through a temporary file, so concurrent readers never see a partial one
+    data = _backend.write(data_path, data)
+    with open(meta_path + ".tmp", "w") as f:
+        json.dump(meta, f)
+    os.replace(meta_path + ".tmp", meta_path)
+    return data
+
+
+def _as_timestamp(value, tz):
+    if value is None:
+        return None
+    ts = pd.Timestamp(value)
+    if tz is not None and ts.tzinfo is None:
+        return ts.tz_localize(tz)
+    if tz is None and ts.tzinfo is not None:
+        return ts.tz_localize(None)
+    return ts
+
+
+# Translate a yfinance period string into a start date ("max" means no start)
+def period_start(period, now=None):
+    now = now or datetime.now()
+    if period in (None, "max"):
+        return None
+    if period == "ytd":
+        return datetime(now.year, 1, 1)
+    if period.endswith("mo"):
+        count, unit = int(period[:-2]), "mo"
+    else:
+        count, unit = int(period[:-1]), period[-1]
+    if unit == "d":
+        # Calendar days plus a margin for weekends; the result is trimmed to `count` bars
+        return now - pd.Timedelta(days=count * 2 + 4)
+    if unit == "mo":
+        return now - pd.DateOffset(months=count)
+    if unit == "y":
+        return now - pd.DateOffset(years=count)
+    raise ValueError(f"Unsupported period: {period}")
+
+
+@telemetry.traced("yfinance.history", "fetch")
+def _fetch(ticker, interval, start=None, end=None):
+    return providers.get_provider().history(ticker, interval, start, end)
+
+
+# Fetch the same gap for several tickers with one threaded yf.download request
+@telemetry.traced("yfinance.download", "fetch")
+def _download(tickers, interval, start=None, end=None):
+    return providers.get_provider().download(tickers, interval, start, end)
+
+
+def _merge(frames):
+    frames = [f for f in frames if f is not None and not f.empty]
+    if not frames:
+        return pd.DataFrame()
+    merged = pd.concat(frames)
+    # The last stored bar may have been a partial session, keep the newest copy
+    merged = merged[~merged.index.duplicated(keep="last")]
+    return merged.sort_index()
+
+
+# Work out which parts of [start, now] are missing from the stored bars.
+# Returns (head, tail) where each is a (start, end) range to fetch or None.
+def _gaps(data, meta, start):
+    if data.empty:
+        return (start, None), None
+    head = tail = None
+    covered_from = meta.get("covered_from")
+    if covered_from != "max" and (start is None or _as_timestamp(start, None) < _as_timestamp(covered_from, None)):
+        # Missing head: only the bars before the first stored one
+        head = (start, data.index[0])
+    if time.time() - meta.get("fetched_at", 0) > REFRESH_SECONDS:
+        # Missing tail: from the last stored bar onwards
+        tail = (data.index[-1].to_pydatetime(), None)
+    return head, tail
+
+
+# Yahoo's bars are adjusted for splits and dividends (auto_adjust), so a new
+# split or dividend rewrites every bar before it. A fetched tail with an action
+# the stored bars do not have yet means the stored history is on an old price
+# basis and has to be fetched again as a whole.
+def _readjusted(data, tail):
+    if data.empty or tail is None or tail.empty:
+        return False
+    for column in ("Dividends", "Stock Splits"):
+        if column not in tail.columns:
+            continue
+        fetched = tail[column].fillna(0)
+        stored = data[column].reindex(tail.index).fillna(0) if column in data.columns else 0
+        if ((fetched != 0) & (fetched != stored)).any():
+            return True
+    return False
+
+
+# Start of the whole range the store will cover after this update
+def _covered_start(meta, head):
+    if head is not None:
+        return head[0]
+    covered_from = meta.get("covered_from")
+    return None if covered_from in (None, "max") else _as_timestamp(covered_from, None)
+
+
+# `refetched` (the whole range fetched again) replaces the stored bars instead
+# of being merged into them
+def _update(ticker, interval, data, meta, start, head, tail, fetched, refetched=None):
+    if head is None and tail is None:
+        return data
+    if refetched is not None and not refetched.empty:
+        data = _merge([refetched])
+    else:
+        data = _merge([data] + fetched)
+    if head is not None:
+        meta["covered_from"] = "max" if start is None else str(start)
+    if not data.empty:
+        meta["fetched_at"] = time.time()
+        data = _save(ticker, interval, data, meta)
+    return data
+
+
+# Make sure the store covers [start, now] for this ticker and return all stored bars
+def _ensure(ticker, interval, start):
+    with _lock_for((ticker.upper(), interval)):
+        data, meta = _load(ticker, interval)
+        head, tail = _gaps(data, meta, start)
+        fetched = [_fetch(ticker, interval, *gap) for gap in (head, tail) if gap is not None]
+        refetched = None
+        if tail is not None and _readjusted(data, fetched[-1]):
+            refetched = _fetch(ticker, interval, _covered_start(meta, head))
+        return _update(ticker, interval, data, meta, start, head, tail, fetched, refetched)
+
+
+# Positional slice of the sorted bars, so mapped histories stay views
+def _slice(data, start, end, period):
+    if data.empty:
+        return data
+    first, last = 0, len(data)
+    if start is not None:
+        first = data.index.searchsorted(_as_timestamp(start, None), side="left")
+    if end is not None:
+        last = data.index.searchsorted(_as_timestamp(end, None), side="left")
+    if period is not None and period.endswith("d"):
+        first = max(first, last - int(period[:-1]))
+    return data.iloc[first:last]
+
+
+# Cached replacement for yf.Ticker(ticker).history(period=..., start=..., end=..., interval=...)
+def get_history(ticker, period=None, start=None, end=None, interval="1d"):
+    if start is None and period is None:
+        period = "1mo"
+    if start is None:
+        start = period_start(period)
+    with telemetry.span("price_store.get_history", "fetch", ticker=ticker, interval=interval) as span:
+        data = _slice(_ensure(ticker, interval, start), start, end, period)
+        span.set(bars=len(data))
+        return data
+
+
+# Every stored bar of a ticker, after making sure they cover `period` or
+# `start`; window() cuts out what get_history would have returned. For state
+# kept over the whole history (e.g. indicators.IndicatorSet), whose start does
+# not move every day the way a period's does.
+def get_stored(ticker, period=None, start=None, interval="1d"):
+    if start is None:
+        start = period_start(period or "1mo")
+    with telemetry.span("price_store.get_stored", "fetch", ticker=ticker, interval=interval) as span:
+        data = _ensure(ticker, interval, start)
+        span.set(bars=len(data))
+        return data
+
+
+# The bars of get_stored() that get_history(ticker, period, start, end) returns
+def window(data, period=None, start=None, end=None):
+    if start is None and period is None:
+        period = "1mo"
+    if start is None:
+        start = period_start(period)
+    return _slice(data, start, end, period)
+
+
+# get_history as arrays: (int64 nanosecond timestamps, {field: values}). With the
+# mmap backend these are read-only views of the shared mapping, not copies.
+def get_arrays(ticker, period=None, start=None, end=None, interval="1d", fields=PANEL_FIELDS):
+    data = get_history(ticker, period=period, start=start, end=end, interval=interval)
+    if data.empty:
+        return np.empty(0, dtype=np.int64), {}
+    index = pd.DatetimeIndex(data.index).as_unit("ns").asi8
+    return index, {field: data[field].to_numpy() for field in fields if field in data.columns}
+
+
+# Cached, batched replacement for yf.download(tickers, ...): missing heads and tails of
+# all tickers are fetched with at most two threaded requests, and the result is one
+# frame on a shared date index with (field, ticker) columns, e.g. panel['Close'][ticker]
+def get_panel(tickers, period=None, start=None, end=None, interval="1d", fields=PANEL_FIELDS):
+    tickers = list(dict.fromkeys(tickers))
+    if start is None and period is None:
+        period = "1mo"
+    if start is None:
+        start = period_start(period)
+
+    with telemetry.span("price_store.get_panel", "fetch", tickers=len(tickers), interval=interval):
+        locks = [_lock_for(key) for key in sorted({(ticker.upper(), interval) for ticker in tickers})]
+        for lock in locks:
+            lock.acquire()
+        try:
+            stored = {ticker: _load(ticker, interval) for ticker in tickers}
+            gaps = {ticker: _gaps(data, meta, start) for ticker, (data, meta) in stored.items()}
+            fetched = {ticker: [] for ticker in tickers}
+            for position in (0, 1):
+                wanted = {ticker: gap[position] for ticker, gap in gaps.items() if gap[position] is not None}
+                if not wanted:
+                    continue
+                starts = [gap[0] for gap in wanted.values()]
+                ends = [gap[1] for gap in wanted.values()]
+                gap_start = None if any(s is None for s in starts) else min(_as_timestamp(s, None) for s in starts)
+                gap_end = None if any(e is None for e in ends) else max(ends)
+                for ticker, frame in _download(list(wanted), interval, gap_start, gap_end).items():
+                    fetched[ticker].append(frame)
+            readjusted = [
+                ticker for ticker, (data, meta) in stored.items()
+                if gaps[ticker][1] is not None and fetched[ticker] and _readjusted(data, fetched[ticker][-1])
+            ]
+            refetched = {}
+            if readjusted:
+                starts = [_covered_start(stored[ticker][1], gaps[ticker][0]) for ticker in readjusted]
+                refetch_start = None if any(s is None for s in starts) else min(_as_timestamp(s, None) for s in starts)
+                refetched = _download(readjusted, interval, refetch_start)
+            histories = {
+                ticker: _update(ticker, interval, data, meta, start, *gaps[ticker], fetched[ticker], refetched.get(ticker))
+                for ticker, (data, meta) in stored.items()
+            }
+        finally:
+            for lock in reversed(locks):
+                lock.release()
+
+        histories = {ticker: _slice(data, start, end, period) for ticker, data in histories.items()}
+        columns = {}
+        for field in fields:
+            columns[field] = pd.DataFrame(
+                {ticker: data[field] if field in data.columns else pd.Series(dtype=float) for ticker, data in histories.items()}
+            )
+        panel = pd.concat(columns, axis=1).sort_index()
+        panel.columns.names = ["Price", "Ticker"]
+        return panel
@@ -0,0 +1,126 @@
+import json
+
+from digest import news_headlines
+
+# Prompt text for the LLM calls made by the apps, and parsing of their replies.
+# Kept out of the Streamlit pages so prompts can be built without a session.
+
+INVESTOR_SYSTEM = "You are a financial investor, respond with facts and focused messages."
+
+# Fields of a structured (single-call) ticker analysis
+ANALYSIS_FIELDS = ("sentiment", "consensus", "analysis", "metrics")
+
+
+# app2 prompts
+def tickers_prompt(company):
+    return f"As a financial investor, provide the stock ticker for {company} and 5 other tickers for competitors in the same industry of comparable size and strategy. Format the response as a comma-separated list of tickers only."
+
+
+def sentiment_prompt(ticker, fundamentals):
+    return f"As a financial investor, analyze the sentiment of the following financial data and news for {ticker}:\n\n{fundamentals}\n\nProvide a concise sentiment analysis."
+
+
+def consensus_prompt(ticker):
+    return f"As a financial investor, provide the analyst consensus for {ticker} based on available data."
+
+
+def analysis_prompt(ticker):
+    return f"As a financial investor, provide an overall analysis and detailed financial numbers for {ticker} within its industry."
+
+
+def recommendation_prompt(company, analyses):
+    prompt = f"As a financial investor, based on the following analyses for {company} and its competitors, provide a recommendation (Buy, Hold, or Sell) with a short explanation:\n\n"
+    for ticker, analysis in analyses.items():
+        prompt += f"{ticker}:\nSentiment: {analysis['sentiment']}\nConsensus: {analysis['consensus']}\nAnalysis: {analysis['analysis']}\n"
+        if analysis.get('metrics'):
+            prompt += f"Metrics: {analysis['metrics']}\n"
+        prompt += "\n"
+    return prompt
+
+
+def key_metrics_prompt(company, recommendation):
+    return f"As a financial investor, based on the following recommendation for {company}, provide the key financial metrics supporting it:\n\n{recommendation}"
+
+
+# One request for the sentiment, consensus, analysis and metrics of one or more
+# tickers, given {ticker: fundamentals digest}; the reply is a JSON object
+def structured_analysis_prompt(fundamentals):
+    sections = "\n\n".join(f"{ticker}:\n{digest}" for ticker, digest in fundamentals.items())
+    example = ", ".join(f'"{ticker}": {{' + ", ".join(f'"{field}": "..."' for field in ANALYSIS_FIELDS) + "}" for ticker in list(fundamentals)[:2])
+    return (
+        f"As a financial investor, analyze each of the following companies using the financial data and news provided:\n\n{sections}\n\n"
+        f"Respond with a single JSON object and nothing else, with one entry for each of {', '.join(fundamentals)}, e.g. {{{example}}}, where:\n"
+        "- sentiment: a concise sentiment analysis of the financial data and news\n"
+        "- consensus: the analyst consensus based on the available data\n"
+        "- analysis: an overall analysis with detailed financial numbers within its industry\n"
+        "- metrics: the key financial metrics and their values"
+    )
+
+
+def _field_text(value):
+    if isinstance(value, dict):
+        value = "; ".join(f"{k}: {v}" for k, v in value.items())
+    elif isinstance(value, list):
+        value = "; ".join(str(v) for v in value)
+    return str(value).strip() if value is not None else ""
+
+
+# Analyses from a structured_analysis_prompt reply, keyed by ticker. Tickers
+# whose entry is missing or lacks a field are left out, so the caller can fall
+# back for just those; a reply without a JSON object raises ValueError.
+def parse_structured_analysis(reply, tickers):
+    start, end = reply.find("{"), reply.rfind("}")
+    if start < 0 or end < start:
+        raise ValueError("No JSON object in the reply")
+    data = json.loads(reply[start:end + 1])
+    if not isinstance(data, dict):
+        raise ValueError("The reply is not a JSON object")
+    # A single-ticker reply may leave out the ticker level
+    if len(tickers) == 1 and set(ANALYSIS_FIELDS) <= set(data):
+        data = {tickers[0]: data}
+    entries = {str(key).strip().upper(): value for key, value in data.items()}
+    analyses = {}
+    for ticker in tickers:
+        entry = entries.get(ticker.strip().upper())
+        if not isinstance(entry, dict):
+            continue
+        analysis = {field: _field_text(entry.get(field)) for field in ANALYSIS_FIELDS}
+        if all(analysis.values()):
+            analyses[ticker] = analysis
+    return analyses
+
+
+# trending crossover analysis prompt; up to 5 news headlines are included
+def crossover_prompt(event_date, event_type, news, company_info):
+    news_summary = "\n".join([f"- {title}" for title in news_headlines(news, limit=5)])
+
+    return f"""
+    As a financial investor, analyze the following crossover event and provide insights:
+
+    Event Date: {event_date.strftime('%Y-%m-%d')}
+    Event Type: {event_type}
+
+    Recent News:
+    {news_summary}
+
+    Company Information:
+    - Name: {company_info['info'].get('longName', 'N/A')}
+    - Sector: {company_info['info'].get('sector', 'N/A')}
+    - Industry: {company_info['info'].get('industry', 'N/A')}
+    - Market Cap: ${company_info['info'].get('marketCap', 'N/A'):,}
+
+    Please provide a focused analysis of notable events, facts, company communications such as product announcements, investor events, M&A news, or strategy changes that could explain this crossover. Avoid technical jargon about bullish or bearish moments, and instead focus on concrete business factors. Provide both quantitative and qualitative insights in your response.
+    """
+
+
+# Tickers from a comma-separated or line-separated reply (at most 5)
+def extract_tickers(response):
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(response, "html.parser")
+    text = soup.get_text()
+    # Split by comma and newline
+    tickers = [ticker.strip().upper() for ticker in text.replace('\n', ',').split(',') if ticker.strip()]
+    # Filter tickers to valid symbols (basic filter: alphabetic and up to 5 characters)
+    tickers = [ticker for ticker in tickers if ticker.isalpha() and len(ticker) <= 5]
+    return tickers[:5]
@@ -0,0 +1,367 @@
+import hashlib
+import json
+import os
+import pickle
+import threading
+from abc import ABC, abstractmethod
+
+import pandas as pd
+
+import clients
+from scheduler import estimate_tokens, get_scheduler
+
+# Pluggable source for everything the apps fetch from outside: Yahoo price bars
+# and ticker datasets, and Anthropic/OpenAI completions. price_store, snapshot
+# and llm go through get_provider(), which is selected by INVESTOR_PROVIDER_MODE:
+#
+#   live    call Yahoo and the LLM APIs (default)
+#   record  call them and also write every response to the cassette directory
+#   replay  serve responses from the cassette directory only, without network
+#
+# Price bars are kept as one frame per ticker and interval, and replay slices it
+# to the requested range, so replays do not depend on the exact dates requested.
+# Ticker datasets are kept per ticker and name, and LLM responses per request.
+# Replay with an empty INVESTOR_PRICE_STORE_DIR to exercise the price fetches too.
+PROVIDER_MODE = os.environ.get("INVESTOR_PROVIDER_MODE", "live")
+CASSETTE_DIR = os.environ.get("INVESTOR_CASSETTE_DIR", os.path.join(".cache", "cassettes"))
+
+TICKER_DATASETS = ("info", "financials", "balance_sheet", "news")
+
+
+class CassetteMissError(LookupError):
+    pass
+
+
+def _usage(usage):
+    if usage is None:
+        return None
+    if hasattr(usage, "input_tokens"):
+        return {"input_tokens": usage.input_tokens, "output_tokens": usage.output_tokens}
+    return {"input_tokens": usage.prompt_tokens, "output_tokens": usage.completion_tokens}
+
+
+def _total(usage):
+    return usage["input_tokens"] + usage["output_tokens"] if usage else None
+
+
+# The scheduler retries failed requests, so the SDK's own retries are turned off
+# (clients from clients.py already are; copying those would be wasted work)
+def _without_retries(client):
+    if getattr(client, "max_retries", None) == 0 or not hasattr(client, "with_options"):
+        return client
+    return client.with_options(max_retries=0)
+
+
+# Bars are returned in exchange-local time without tz, matching yf.download(ignore_tz=True)
+def _naive(data):
+    if isinstance(data.index, pd.DatetimeIndex) and data.index.tz is not None:
+        data.index = data.index.tz_localize(None)
+    return data
+
+
+# A provider missing any of these fails when it is created, not mid-page
+class Provider(ABC):
+    # Bars of one ticker for [start, end); start=None means the full history
+    @abstractmethod
+    def history(self, ticker, interval, start=None, end=None):
+        ...
+
+    # {ticker: bars} for several tickers over the same range
+    @abstractmethod
+    def download(self, tickers, interval, start=None, end=None):
+        ...
+
+    # One of TICKER_DATASETS for a ticker (yf.Ticker attribute)
+    @abstractmethod
+    def ticker_data(self, ticker, name):
+        ...
+
+    # (text, usage) for an Anthropic messages.create request
+    @abstractmethod
+    def anthropic_create(self, client, params):
+        ...
+
+    # Text chunks of an Anthropic messages.stream request; `usage` is filled in at the end
+    @abstractmethod
+    def anthropic_stream(self, client, params, usage):
+        ...
+
+    # (text, usage) for an OpenAI chat completion request
+    @abstractmethod
+    def openai_create(self, params):
+        ...
+
+    # Text chunks of a streamed OpenAI chat completion; `usage` is filled in at the end
+    @abstractmethod
+    def openai_stream(self, params, usage):
+        ...
+
+
+# yfinance is imported on the first Yahoo fetch: pages served from the price
+# store, and pages that only call the LLMs, never load it
+class LiveProvider(Provider):
+    def history(self, ticker, interval, start=None, end=None):
+        import yfinance as yf
+
+        stock = yf.Ticker(ticker, session=clients.yahoo_session())
+        if start is None:
+            data = stock.history(period="max", interval=interval, end=end)
+        else:
+            data = stock.history(start=start, end=end, interval=interval)
+        return _naive(data)
+
+    def download(self, tickers, interval, start=None, end=None):
+        import yfinance as yf
+
+        if start is None:
+            raw = yf.download(tickers, period="max", end=end, interval=interval, actions=True, group_by="ticker",
+                              threads=True, ignore_tz=True, progress=False, session=clients.yahoo_session())
+        else:
+            raw = yf.download(tickers, start=start, end=end, interval=interval, actions=True, group_by="ticker",
+                              threads=True, ignore_tz=True, progress=False, session=clients.yahoo_session())
+        frames = {}
+        for ticker in tickers:
+            if raw is None or raw.empty or ticker not in raw.columns.get_level_values(0):
+                frames[ticker] = pd.DataFrame()
+                continue
+            frame = raw[ticker].dropna(how="all")
+            frame.columns.name = None
+            frames[ticker] = frame
+        return frames
+
+    def ticker_data(self, ticker, name):
+        import yfinance as yf
+
+        return getattr(yf.Ticker(ticker, session=clients.yahoo_session()), name)
+
+    # Requests go through the provider's scheduler, which owns rate limits and retries
+    def anthropic_create(self, client, params):
+        scheduler = get_scheduler("anthropic")
+        reserved = estimate_tokens(params)
+        response = scheduler.call(lambda: _without_retries(client).messages.create(**params), reserved)
+        usage = _usage(getattr(response, "usage", None))
+        scheduler.settle(reserved, _total(usage))
+        if usage is not None:
+            # "max_tokens" when the reply was cut off
+            usage["stop_reason"] = getattr(response, "stop_reason", None)
+        return response.content[0].text, usage
+
+    def anthropic_stream(self, client, params, usage):
+        scheduler = get_scheduler("anthropic")
+        reserved = estimate_tokens(params)
+
+        def stream():
+            with _without_retries(client).messages.stream(**params) as stream:
+                yield from stream.text_stream
+                if hasattr(stream, "get_final_message"):
+                    usage.update(_usage(stream.get_final_message().usage) or {})
+        yield from scheduler.stream(stream, reserved)
+        scheduler.settle(reserved, _total(usage))
+
+    def openai_create(self, params):
+        scheduler = get_scheduler("openai")
+        reserved = estimate_tokens(params)
+        response = scheduler.call(lambda: clients.openai_client().chat.completions.create(**params), reserved)
+        usage = _usage(getattr(response, "usage", None))
+        scheduler.settle(reserved, _total(usage))
+        return response.choices[0].message.content, usage
+
+    # Usage arrives in a final chunk without choices
+    def openai_stream(self, params, usage):
+        scheduler = get_scheduler("openai")
+        reserved = estimate_tokens(params)
+
+        def stream():
+            for event in clients.openai_client().chat.completions.create(stream=True, stream_options={"include_usage": True}, **params):
+                if getattr(event, "usage", None) is not None:
+                    usage.update(_usage(event.usage))
+                if not event.choices:
+                    continue
+                chunk = event.choices[0].delta.content
+                if chunk:
+                    yield chunk
+        yield from scheduler.stream(stream, reserved)
+        scheduler.settle(reserved, _total(usage))
+
+
+# Files under the cassette directory: prices/<interval>/<TICKER>.pkl,
+# tickers/<TICKER>.<name>.pkl and llm/<request hash>.json
+class Cassette:
+    def __init__(self, directory=CASSETTE_DIR):
+        self.directory = directory
+        self._lock = threading.Lock()
+
+    def _path(self, *parts):
+        return os.path.join(self.directory, *[str(p).replace("/", "_") for p in parts])
+
+    def _read_pickle(self, path):
+        if not os.path.exists(path):
+            raise CassetteMissError(path)
+        with open(path, "rb") as f:
+            return pickle.load(f)
+
+    def _write(self, path, payload, mode):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + ".tmp", mode) as f:
+            if "b" in mode:
+                pickle.dump(payload, f)
+            else:
+                json.dump(payload, f)
+        os.replace(path + ".tmp", path)
+
+    def _bars_path(self, ticker, interval):
+        return self._path("prices", interval, f"{ticker.upper()}.pkl")
+
+    def bars(self, ticker, interval, start=None, end=None):
+        data = self._read_pickle(self._bars_path(ticker, interval))
+        if start is not None and not data.empty:
+            data = data[data.index >= pd.Timestamp(start).tz_localize(None)]
+        if end is not None and not data.empty:
+            data = data[data.index < pd.Timestamp(end).tz_localize(None)]
+        return data.copy()
+
+    # Merge newly fetched bars into the recorded ones (newest copy of a bar wins)
+    def add_bars(self, ticker, interval, data):
+        if data is None or data.empty:
+            return
+        path = self._bars_path(ticker, interval)
+        with self._lock:
+            try:
+                recorded = self._read_pickle(path)
+            except CassetteMissError:
+                recorded = pd.DataFrame()
+            merged = pd.concat([f for f in (recorded, data) if not f.empty])
+            merged = merged[~merged.index.duplicated(keep="last")].sort_index()
+            self._write(path, merged, "wb")
+
+    def ticker_data(self, ticker, name):
+        return self._read_pickle(self._path("tickers", f"{ticker.upper()}.{name}.pkl"))
+
+    def add_ticker_data(self, ticker, name, value):
+        with self._lock:
+            self._write(self._path("tickers", f"{ticker.upper()}.{name}.pkl"), value, "wb")
+
+    @staticmethod
+    def request_key(provider, params):
+        payload = json.dumps({"provider": provider, **params}, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    # (text, usage) recorded for an LLM request
+    def completion(self, provider, params):
+        path = self._path("llm", f"{self.request_key(provider, params)}.json")
+        if not os.path.exists(path):
+            raise CassetteMissError(f"No recorded {provider} response for this request ({path})")
+        with open(path) as f:
+            entry = json.load(f)
+        return entry["text"], entry.get("usage")
+
+    def add_completion(self, provider, params, text, usage):
+        path = self._path("llm", f"{self.request_key(provider, params)}.json")
+        with self._lock:
+            self._write(path, {"provider": provider, "model": params.get("model"), "text": text, "usage": usage}, "w")
+
+
+class RecordingProvider(LiveProvider):
+    def __init__(self, cassette=None):
+        self.cassette = cassette or Cassette()
+
+    def history(self, ticker, interval, start=None, end=None):
+        data = super().history(ticker, interval, start, end)
+        self.cassette.add_bars(ticker, interval, data)
+        return data
+
+    def download(self, tickers, interval, start=None, end=None):
+        frames = super().download(tickers, interval, start, end)
+        for ticker, data in frames.items():
+            self.cassette.add_bars(ticker, interval, data)
+        return frames
+
+    def ticker_data(self, ticker, name):
+        value = super().ticker_data(ticker, name)
+        self.cassette.add_ticker_data(ticker, name, value)
+        return value
+
+    def anthropic_create(self, client, params):
+        text, usage = super().anthropic_create(client, params)
+        self.cassette.add_completion("anthropic", params, text, usage)
+        return text, usage
+
+    def anthropic_stream(self, client, params, usage):
+        chunks = []
+        for chunk in super().anthropic_stream(client, params, usage):
+            chunks.append(chunk)
+            yield chunk
+        self.cassette.add_completion("anthropic", params, "".join(chunks), usage or None)
+
+    def openai_create(self, params):
+        text, usage = super().openai_create(params)
+        self.cassette.add_completion("openai", params, text, usage)
+        return text, usage
+
+    def openai_stream(self, params, usage):
+        chunks = []
+        for chunk in super().openai_stream(params, usage):
+            chunks.append(chunk)
+            yield chunk
+        self.cassette.add_completion("openai", params, "".join(chunks), usage or None)
+
+
+# Serves recorded responses only; anything that was not recorded raises CassetteMissError
+class ReplayProvider(Provider):
+    def __init__(self, cassette=None):
+        self.cassette = cassette or Cassette()
+
+    def history(self, ticker, interval, start=None, end=None):
+        return self.cassette.bars(ticker, interval, start, end)
+
+    def download(self, tickers, interval, start=None, end=None):
+        frames = {}
+        for ticker in tickers:
+            try:
+                frames[ticker] = self.cassette.bars(ticker, interval, start, end)
+            except CassetteMissError:
+                # Same as yf.download for a ticker it has no data for
+                frames[ticker] = pd.DataFrame()
+        return frames
+
+    def ticker_data(self, ticker, name):
+        return self.cassette.ticker_data(ticker, name)
+
+    def anthropic_create(self, client, params):
+        return self.cassette.completion("anthropic", params)
+
+    def anthropic_stream(self, client, params, usage):
+        text, recorded = self.cassette.completion("anthropic", params)
+        usage.update(recorded or {})
+        yield text
+
+    def openai_create(self, params):
+        return self.cassette.completion("openai", params)
+
+    def openai_stream(self, params, usage):
+        text, recorded = self.cassette.completion("openai", params)
+        usage.update(recorded or {})
+        yield text
+
+
+PROVIDERS = {"live": LiveProvider, "record": RecordingProvider, "replay": ReplayProvider}
+
+_provider = None
+_provider_lock = threading.Lock()
+
+
+def get_provider():
+    global _provider
+    with _provider_lock:
+        if _provider is None:
+            if PROVIDER_MODE not in PROVIDERS:
+                raise ValueError(f"Unknown INVESTOR_PROVIDER_MODE {PROVIDER_MODE!r}, expected one of {', '.join(PROVIDERS)}")
+            _provider = PROVIDERS[PROVIDER_MODE]()
+        return _provider
+
+
+# Replace the process-wide provider, e.g. set_provider(ReplayProvider(Cassette(path)))
+def set_provider(provider):
+    global _provider
+    with _provider_lock:
+        _provider = provider
@@ -0,0 +1,245 @@
+import os
+import random
+import threading
+import time
+
+import telemetry
+
+# Shared admission control for LLM requests. Each provider has a scheduler that
+# limits requests and tokens per minute with token buckets, retries rate-limit,
+# overload, server and connection errors with jittered exponential backoff, and
+# adapts its concurrency to the observed error rate (additive increase after
+# successes, halved on throttling). All SDK-level retries are left to it.
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504, 529}
+THROTTLE_STATUS = {429, 529}
+
+MAX_RETRIES = int(os.environ.get("INVESTOR_LLM_MAX_RETRIES", 6))
+BASE_BACKOFF_SECONDS = float(os.environ.get("INVESTOR_LLM_BACKOFF_SECONDS", 1.0))
+MAX_BACKOFF_SECONDS = float(os.environ.get("INVESTOR_LLM_MAX_BACKOFF_SECONDS", 60.0))
+
+# Per-provider defaults; override with e.g. INVESTOR_ANTHROPIC_RPM
+LIMITS = {
+    "anthropic": {"rpm": 50, "tpm": 40_000, "max_concurrency": 8},
+    "openai": {"rpm": 500, "tpm": 30_000, "max_concurrency": 8},
+}
+
+
+def _limit(provider, name):
+    return int(os.environ.get(f"INVESTOR_{provider.upper()}_{name.upper()}", LIMITS[provider][name]))
+
+
+def _status(error):
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status
+
+
+def is_retryable(error):
+    if _status(error) in RETRYABLE_STATUS:
+        return True
+    # Connection errors and timeouts of both SDKs (and of httpx underneath)
+    return any(cls.__name__ in ("APIConnectionError", "APITimeoutError", "ConnectError", "ReadTimeout")
+               for cls in type(error).__mro__)
+
+
+def _retry_after(error):
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    def __init__(self, per_minute, capacity=None):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity or per_minute
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    # Block until `amount` tokens are available and take them; returns the seconds waited
+    def acquire(self, amount=1):
+        amount = min(amount, self.capacity)
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return waited
+                delay = (amount - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+    # Return unused tokens (or take extra ones with a negative amount, which may go into debt)
+    def adjust(self, amount):
+        with self._lock:
+            self._refill()
+            self._tokens = min(self.capacity, self._tokens + amount)
+
+
+class Scheduler:
+    def __init__(self, name, rpm, tpm, max_concurrency, min_concurrency=1,
+                 max_retries=MAX_RETRIES, base_backoff=BASE_BACKOFF_SECONDS, max_backoff=MAX_BACKOFF_SECONDS):
+        self.name = name
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.concurrency = float(max_concurrency)
+        self.in_flight = 0
+        self.calls = 0
+        self.retries = 0
+        self.throttled = 0
+        self._paused_until = 0.0
+        self._condition = threading.Condition()
+
+    def _enter(self):
+        with self._condition:
+            while self.in_flight >= int(self.concurrency):
+                self._condition.wait()
+            self.in_flight += 1
+            pause = self._paused_until - time.monotonic()
+        if pause > 0:
+            time.sleep(pause)
+
+    def _exit(self, error=None):
+        with self._condition:
+            self.in_flight -= 1
+            if error is None:
+                # About +1 after a full window of successes
+                self.concurrency = min(self.max_concurrency, self.concurrency + 1.0 / self.concurrency)
+            elif _status(error) in THROTTLE_STATUS:
+                self.throttled += 1
+                self.concurrency = max(self.min_concurrency, self.concurrency / 2)
+            self._condition.notify_all()
+
+    def _backoff(self, attempt, error):
+        delay = random.uniform(0, min(self.max_backoff, self.base_backoff * 2 ** attempt))
+        retry_after = _retry_after(error)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+            # Everyone waits out the server's retry-after, not just this caller
+            with self._condition:
+                self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+        with self._condition:
+            self.retries += 1
+        time.sleep(delay)
+        return delay
+
+    def _admit(self, tokens):
+        self._enter()
+        return self.requests.acquire(1) + self.tokens.acquire(tokens)
+
+    def _annotate(self, attempt, waited):
+        span = telemetry.current_span()
+        if span is not None:
+            span.set(retries=attempt, queue_ms=round(waited * 1000, 1))
+
+    # Run func() under the limits, retrying retryable errors. `tokens` is the
+    # estimated token use, reserved up front; correct it later with settle().
+    def call(self, func, tokens=0):
+        waited = 0.0
+        for attempt in range(self.max_retries + 1):
+            waited += self._admit(tokens)
+            try:
+                result = func()
+            except Exception as e:
+                self._exit(e)
+                self.tokens.adjust(tokens)
+                if not is_retryable(e) or attempt == self.max_retries:
+                    self._annotate(attempt, waited)
+                    raise
+                waited += self._backoff(attempt, e)
+                continue
+            self._exit()
+            with self._condition:
+                self.calls += 1
+            self._annotate(attempt, waited)
+            return result
+
+    # Streaming variant: make_stream() is retried until its first chunk arrives;
+    # errors after that are raised since chunks were already handed out
+    def stream(self, make_stream, tokens=0):
+        waited = 0.0
+        for attempt in range(self.max_retries + 1):
+            waited += self._admit(tokens)
+            started = False
+            try:
+                for chunk in make_stream():
+                    started = True
+                    yield chunk
+            except Exception as e:
+                self._exit(e)
+                if not started:
+                    self.tokens.adjust(tokens)
+                if started or not is_retryable(e) or attempt == self.max_retries:
+                    self._annotate(attempt, waited)
+                    raise
+                waited += self._backoff(attempt, e)
+                continue
+            except BaseException:
+                # Stream abandoned by the consumer (GeneratorExit)
+                self._exit()
+                raise
+            self._exit()
+            with self._condition:
+                self.calls += 1
+            self._annotate(attempt, waited)
+            return
+
+    # Replace a token reservation with the actual usage once it is known
+    def settle(self, reserved, used):
+        if used is not None:
+            self.tokens.adjust(reserved - used)
+
+    def stats(self):
+        with self._condition:
+            return {
+                "calls": self.calls,
+                "retries": self.retries,
+                "throttled": self.throttled,
+                "in_flight": self.in_flight,
+                "concurrency": round(self.concurrency, 2),
+            }
+
+
+_schedulers = {}
+_schedulers_lock = threading.Lock()
+
+
+# Process-wide scheduler for "anthropic" or "openai"
+def get_scheduler(provider):
+    with _schedulers_lock:
+        scheduler = _schedulers.get(provider)
+        if scheduler is None:
+            scheduler = Scheduler(
+                provider,
+                rpm=_limit(provider, "rpm"),
+                tpm=_limit(provider, "tpm"),
+                max_concurrency=_limit(provider, "max_concurrency"),
+            )
+            _schedulers[provider] = scheduler
+        return scheduler
+
+
+# Schedulers created so far, by provider
+def schedulers():
+    with _schedulers_lock:
+        return dict(_schedulers)
+
+
+# Tokens reserved for a request: the prompt (about four characters per token) plus max_tokens
+def estimate_tokens(params):
+    prompt = str(params.get("system", "")) + str(params.get("messages", ""))
+    return len(prompt) // 4 + 1 + int(params.get("max_tokens") or 0)
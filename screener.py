@@ -0,0 +1,126 @@
+import atexit
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+import price_store
+from signals import identify_patterns
+
+# Universe-wide screener for the identify_patterns checks. Prices are fetched in
+# batches through the price store (one threaded download per batch) while the
+# previous batches are evaluated in a process pool across all cores, and
+# per-ticker results are yielded as soon as they are ready.
+FETCH_BATCH_SIZE = 200
+EVAL_CHUNK_SIZE = 25
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+# Process pool shared by all screener runs; "spawn" avoids forking the
+# Streamlit server together with its threads
+def get_executor(max_workers=None):
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=max_workers or os.cpu_count(),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _executor
+
+
+# Drop a pool whose worker died (BrokenProcessPool), so the next run starts a new one
+def _discard_executor(executor):
+    global _executor
+    with _executor_lock:
+        if _executor is executor:
+            _executor = None
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+@atexit.register
+def shutdown():
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _evaluate_chunk(items, fetch_seconds):
+    results = []
+    for ticker, df in items:
+        start = time.perf_counter()
+        try:
+            patterns, error = identify_patterns(df), None
+        except Exception as e:
+            patterns, error = [], str(e)
+        results.append({
+            "ticker": ticker,
+            "patterns": patterns,
+            "bars": len(df),
+            "fetch_seconds": fetch_seconds,
+            "eval_seconds": time.perf_counter() - start,
+            "error": error,
+        })
+    return results
+
+
+def _chunks(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+# Yield one result dict per ticker (ticker, patterns, bars, fetch_seconds,
+# eval_seconds, error) in completion order. If a worker process dies the run
+# raises BrokenProcessPool and the next run gets a new pool.
+def screen(tickers, period="1y", interval="1d", fetch_batch_size=FETCH_BATCH_SIZE,
+           eval_chunk_size=EVAL_CHUNK_SIZE, max_workers=None):
+    executor = get_executor(max_workers)
+    try:
+        pending = set()
+        for batch in _chunks(list(dict.fromkeys(tickers)), fetch_batch_size):
+            start = time.perf_counter()
+            panel = price_store.get_panel(batch, period=period, interval=interval)
+            fetch_seconds = (time.perf_counter() - start) / len(batch)
+
+            items = []
+            for ticker in batch:
+                frame = panel.xs(ticker, axis=1, level="Ticker").dropna(subset=["Close"])
+                items.append((ticker, frame))
+            for chunk in _chunks(items, eval_chunk_size):
+                pending.add(executor.submit(_evaluate_chunk, chunk, fetch_seconds))
+
+            # Hand out whatever finished while this batch was downloading
+            done, pending = wait(pending, timeout=0)
+            for future in done:
+                yield from future.result()
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield from future.result()
+    except BrokenProcessPool:
+        _discard_executor(executor)
+        raise
+
+
+# Command line: python screener.py AAPL MSFT ... or python screener.py tickers.txt
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if len(args) == 1 and os.path.isfile(args[0]):
+        with open(args[0]) as f:
+            args = f.read().replace(",", "\n").split()
+    started = time.perf_counter()
+    count = 0
+    for result in screen(args):
+        count += 1
+        if result["patterns"]:
+            names = ", ".join(p["pattern"] for p in result["patterns"])
+            print(f"{result['ticker']}: {names}")
+    print(f"Screened {count} tickers in {time.perf_counter() - started:.1f}s")
@@ -0,0 +1,104 @@
+import numpy as np
+
+import telemetry
+
+# Vectorized signal detection shared by the apps. Time runs along axis 0, so
+# every function accepts a single price Series or a panel with one column per ticker.
+
+
+# Boolean (up, down) masks for the bars where `fast` crosses `slow`: up when the
+# fast-minus-slow spread goes from <= 0 to > 0, down when it goes from >= 0 to < 0
+def crossover_masks(fast, slow):
+    spread = np.asarray(fast, dtype=float) - np.asarray(slow, dtype=float)
+    up = np.zeros(spread.shape, dtype=bool)
+    down = np.zeros(spread.shape, dtype=bool)
+    previous, current = spread[:-1], spread[1:]
+    # NaN spreads (indicator warm-up) compare False and never produce an event
+    up[1:] = (previous <= 0) & (current > 0)
+    down[1:] = (previous >= 0) & (current < 0)
+    return up, down
+
+
+def _events(index, up, down):
+    rows = np.flatnonzero(up | down)
+    return [(index[i], "up" if up[i] else "down") for i in rows]
+
+
+# Crossover events as (date, 'up'|'down') tuples in date order; for a DataFrame
+# the result is a dict of such lists keyed by column
+def crossovers(fast, slow):
+    up, down = crossover_masks(fast, slow)
+    if up.ndim == 1:
+        return _events(fast.index, up, down)
+    return {column: _events(fast.index, up[:, i], down[:, i]) for i, column in enumerate(fast.columns)}
+
+
+# trending's SMA20/SMA50 crossover events; the SMA columns are added to `data`
+@telemetry.traced("signals.identify_crossovers", "indicators")
+def identify_crossovers(data):
+    import ta
+
+    data['SMA20'] = ta.trend.sma_indicator(data['Close'], window=20)
+    data['SMA50'] = ta.trend.sma_indicator(data['Close'], window=50)
+    return crossovers(data['SMA20'], data['SMA50'])
+
+
+# SMA(fast)/SMA(slow) crossovers of a close Series or a close panel
+def sma_crossovers(close, fast=20, slow=50):
+    return crossovers(close.rolling(fast).mean(), close.rolling(slow).mean())
+
+
+# Crossovers for several (fast, slow) window pairs at once, keyed by the pair
+def sma_crossovers_multi(close, pairs=((20, 50), (50, 200))):
+    windows = sorted({w for pair in pairs for w in pair})
+    means = {w: close.rolling(w).mean() for w in windows}
+    return {(fast, slow): crossovers(means[fast], means[slow]) for fast, slow in pairs}
+
+
+# Golden/death cross, MACD crossover and RSI overbought/oversold checks on the
+# last bar of an OHLC frame, using the ta library (imported on first use, it is slow to load)
+@telemetry.traced("signals.identify_patterns", "indicators")
+def identify_patterns(df):
+    import ta
+
+    patterns = []
+    # Ensure the dataframe has the necessary columns
+    if not {'Open', 'High', 'Low', 'Close'}.issubset(df.columns) or len(df) < 2:
+        return patterns
+    
+    # Calculate Moving Averages
+    sma50 = ta.trend.SMAIndicator(close=df['Close'], window=50)
+    df['SMA50'] = sma50.sma_indicator()
+    sma200 = ta.trend.SMAIndicator(close=df['Close'], window=200)
+    df['SMA200'] = sma200.sma_indicator()
+    
+    # Calculate MACD
+    macd = ta.trend.MACD(close=df['Close'])
+    df['MACD'] = macd.macd()
+    df['MACD_Signal'] = macd.macd_signal()
+    df['MACD_Diff'] = macd.macd_diff()
+    
+    # Calculate RSI
+    rsi = ta.momentum.RSIIndicator(close=df['Close'])
+    df['RSI'] = rsi.rsi()
+    
+    # Identify Golden Cross and Death Cross
+    if df['SMA50'].iloc[-1] > df['SMA200'].iloc[-1] and df['SMA50'].iloc[-2] <= df['SMA200'].iloc[-2]:
+        patterns.append({'pattern': 'Golden Cross', 'date': df.index[-1]})
+    elif df['SMA50'].iloc[-1] < df['SMA200'].iloc[-1] and df['SMA50'].iloc[-2] >= df['SMA200'].iloc[-2]:
+        patterns.append({'pattern': 'Death Cross', 'date': df.index[-1]})
+    
+    # Identify MACD Crossovers
+    if df['MACD'].iloc[-1] > df['MACD_Signal'].iloc[-1] and df['MACD'].iloc[-2] <= df['MACD_Signal'].iloc[-2]:
+        patterns.append({'pattern': 'MACD Bullish Crossover', 'date': df.index[-1]})
+    elif df['MACD'].iloc[-1] < df['MACD_Signal'].iloc[-1] and df['MACD'].iloc[-2] >= df['MACD_Signal'].iloc[-2]:
+        patterns.append({'pattern': 'MACD Bearish Crossover', 'date': df.index[-1]})
+    
+    # Identify RSI Overbought/Oversold
+    if df['RSI'].iloc[-1] > 70:
+        patterns.append({'pattern': 'RSI Overbought', 'date': df.index[-1]})
+    elif df['RSI'].iloc[-1] < 30:
+        patterns.append({'pattern': 'RSI Oversold', 'date': df.index[-1]})
+    
+    # Limit to 5 patterns
+    return patterns[:5]
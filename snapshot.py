@@ -0,0 +1,68 @@
+import threading
+import time
+
+import providers
+import telemetry
+
+# Process-wide, lazily loaded view of a ticker's yfinance datasets. Each dataset
+# is fetched the first time it is accessed and then reused by every function
+# and Streamlit rerun until it is older than the TTL.
+SNAPSHOT_TTL_SECONDS = 15 * 60
+
+_snapshots = {}
+_snapshots_lock = threading.Lock()
+
+
+# Datasets older than `ttl` are fetched again on access. Views with another TTL
+# (with_ttl) share the fetched datasets, so each caller gets data no older than
+# it asked for without fetching twice.
+class TickerSnapshot:
+    def __init__(self, ticker, ttl=SNAPSHOT_TTL_SECONDS, store=None):
+        self.ticker = ticker
+        self.ttl = ttl
+        # {name: (value, fetched_at)} and the lock guarding it
+        self._values, self._lock = store or ({}, threading.Lock())
+
+    def with_ttl(self, ttl):
+        return TickerSnapshot(self.ticker, ttl, (self._values, self._lock))
+
+    def _get(self, name):
+        with self._lock:
+            entry = self._values.get(name)
+            if entry is not None and time.time() - entry[1] <= self.ttl:
+                return entry[0]
+            with telemetry.span(f"yfinance.{name}", "fetch", ticker=self.ticker):
+                value = providers.get_provider().ticker_data(self.ticker, name)
+            self._values[name] = (value, time.time())
+            return value
+
+    @property
+    def info(self):
+        return self._get("info")
+
+    @property
+    def financials(self):
+        return self._get("financials")
+
+    @property
+    def balance_sheet(self):
+        return self._get("balance_sheet")
+
+    @property
+    def news(self):
+        return self._get("news")
+
+    # Drop cached datasets so the next access fetches them again
+    def refresh(self):
+        with self._lock:
+            self._values.clear()
+
+
+# The process-wide snapshot of a ticker, seen with this call's `ttl`
+def get_snapshot(ticker, ttl=SNAPSHOT_TTL_SECONDS):
+    with _snapshots_lock:
+        snapshot = _snapshots.get(ticker)
+        if snapshot is None:
+            snapshot = TickerSnapshot(ticker, ttl)
+            _snapshots[ticker] = snapshot
+    return snapshot if snapshot.ttl == ttl else snapshot.with_ttl(ttl)
@@ -0,0 +1,12 @@
+import streamlit as st
+
+from navigation import PAGES
+
+# Single entrypoint for all the apps: streamlit run streamlit_app.py
+# Only streamlit is imported here; pandas, yfinance, the LLM SDKs and the other
+# heavy packages load when a page that needs them is first opened.
+sections = {}
+for index, (section, script, title, icon) in enumerate(PAGES):
+    sections.setdefault(section, []).append(st.Page(script, title=title, icon=icon, default=index == 0))
+
+st.navigation(sections).run()
@@ -0,0 +1,180 @@
+import functools
+import itertools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Lightweight spans around data fetches, indicator computation, figure building,
+# pipeline stages and LLM calls. Each finished span records its wall time and
+# any attributes set on it (tokens, cache hits, ...) in a process-wide ring
+# buffer; with INVESTOR_TELEMETRY_PATH set, spans are also appended to that
+# file as JSON lines for monitoring.
+TELEMETRY_PATH = os.environ.get("INVESTOR_TELEMETRY_PATH")
+MAX_SPANS = int(os.environ.get("INVESTOR_TELEMETRY_MAX_SPANS", 5000))
+
+_spans = deque(maxlen=MAX_SPANS)
+_spans_lock = threading.Lock()
+_sequence = itertools.count(1)
+_local = threading.local()
+
+
+class Span:
+    def __init__(self, name, kind, attrs):
+        self.seq = next(_sequence)
+        self.name = name
+        self.kind = kind
+        self.attrs = dict(attrs)
+        self.parent = None
+        self.started = time.time()
+        self.ms = None
+        self.error = None
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def to_dict(self):
+        return {
+            "seq": self.seq,
+            "name": self.name,
+            "kind": self.kind,
+            "parent": self.parent,
+            "started": self.started,
+            "ms": self.ms,
+            "error": self.error,
+            "thread": threading.current_thread().name,
+            **self.attrs,
+        }
+
+
+def _stack():
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+def _record(record):
+    with _spans_lock:
+        _spans.append(record)
+        if TELEMETRY_PATH:
+            with open(TELEMETRY_PATH, "a") as f:
+                f.write(json.dumps(record, default=str) + "\n")
+
+
+# Time the enclosed block; attributes can be added with span.set(...) inside it.
+# `kind` groups spans in the summary (fetch, indicators, figure, stage, llm).
+@contextmanager
+def span(name, kind="other", **attrs):
+    current = Span(name, kind, attrs)
+    stack = _stack()
+    if stack:
+        current.parent = stack[-1].seq
+    stack.append(current)
+    start = time.perf_counter()
+    try:
+        yield current
+    except Exception as e:
+        current.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        current.ms = (time.perf_counter() - start) * 1000
+        # remove() rather than pop(): spans held open by generators may close out of order
+        stack.remove(current)
+        _record(current.to_dict())
+
+
+# Innermost span open in this thread, or None
+def current_span():
+    stack = _stack()
+    return stack[-1] if stack else None
+
+
+# Decorator form of span(); the span is named after the function by default
+def traced(name=None, kind="other"):
+    def decorator(func):
+        span_name = name or f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(span_name, kind):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# Finished spans (oldest first), optionally only those after sequence number `since`
+def spans(since=0):
+    with _spans_lock:
+        return [s for s in _spans if s["seq"] > since]
+
+
+def last_sequence():
+    with _spans_lock:
+        return _spans[-1]["seq"] if _spans else 0
+
+
+def to_jsonl(records):
+    return "".join(json.dumps(record, default=str) + "\n" for record in records)
+
+
+# Calls, wall time, tokens and cache hits per span kind
+def summarize(records):
+    summary = {}
+    kinds = {record["seq"]: record["kind"] for record in records}
+    for record in records:
+        row = summary.setdefault(record["kind"], {
+            "calls": 0, "ms": 0.0, "input_tokens": 0, "output_tokens": 0, "cache_hits": 0, "errors": 0,
+        })
+        row["calls"] += 1
+        # A span nested in one of the same kind is already part of its parent's time
+        if kinds.get(record["parent"]) != record["kind"]:
+            row["ms"] += record["ms"]
+        row["input_tokens"] += record.get("input_tokens") or 0
+        row["output_tokens"] += record.get("output_tokens") or 0
+        row["cache_hits"] += 1 if record.get("cache_hit") else 0
+        row["errors"] += 1 if record["error"] else 0
+    return summary
+
+
+# Collapsible sidebar panel with the spans recorded during this page run. Spans
+# recorded by other sessions running at the same time are included as well.
+def show_telemetry():
+    import pandas as pd
+    import streamlit as st
+
+    import clients
+
+    since = st.session_state.get("telemetry_since", 0)
+    records = spans(since)
+    st.session_state["telemetry_since"] = last_sequence()
+
+    with st.sidebar.expander("Performance", expanded=False):
+        # Process-wide, since the HTTP connection pools are shared by all sessions
+        pools = clients.stats()
+        if pools:
+            st.caption("HTTP connections: " + ", ".join(
+                f"{name} {s['requests']} requests over {s['connections']} connections ({s['reuse_rate']:.0%} reused)"
+                for name, s in pools.items()
+            ))
+        if not records:
+            st.caption("No spans recorded during this run.")
+            return
+        summary = pd.DataFrame.from_dict(summarize(records), orient="index")
+        summary["ms"] = summary["ms"].round(1)
+        st.dataframe(summary, use_container_width=True)
+
+        table = pd.DataFrame(records)
+        columns = [c for c in ("name", "kind", "ms", "cache_hit", "input_tokens", "output_tokens", "connections", "error") if c in table.columns]
+        table = table.sort_values("ms", ascending=False)[columns]
+        table["ms"] = table["ms"].round(1)
+        st.dataframe(table, hide_index=True, use_container_width=True)
+
+        st.download_button(
+            "Export spans (JSON lines)",
+            to_jsonl(records),
+            file_name=f"telemetry-{int(time.time())}.jsonl",
+            mime="application/jsonl",
+        )
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# Offline checks of the behaviour the benchmarks only time:  python -m pytest tests
+# The modules live at the repository root.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import backtest
+import signals
+from benchmarks import fixtures
+from panel import PricePanel
+
+
+def steady(n=100, growth=0.01):
+    close = 100 * (1 + growth) ** np.arange(n)
+    index = pd.bdate_range("2024-01-01", periods=n)
+    return PricePanel(index, ["AAA"], {field: close[:, None] for field in ("Open", "High", "Low", "Close")})
+
+
+def every_tenth_bar(direction):
+    def rule(panel):
+        result = np.zeros((len(panel), len(panel.tickers)), dtype=np.int8)
+        result[::10] = direction
+        return result
+    return rule
+
+
+# On a close rising 1% a bar, a buy makes (1.01**h - 1) with no drawdown and a
+# sell loses the same, with the whole move against it
+@pytest.mark.parametrize("direction", [1, -1])
+def test_statistics_on_a_known_path(monkeypatch, direction):
+    monkeypatch.setitem(backtest.RULES, "every_tenth", ("test", every_tenth_bar(direction)))
+    results = backtest.backtest(steady(), ["every_tenth"], horizons=(5, 20))
+    move = {5: 1.01 ** 5 - 1, 20: 1.01 ** 20 - 1}
+    for row in results.itertuples():
+        # Signals without a full horizon ahead are not counted
+        assert row.signals == len(range(0, 100 - row.horizon, 10))
+        assert row.mean_return == pytest.approx(direction * move[row.horizon])
+        assert row.hit_rate == (1.0 if direction > 0 else 0.0)
+        assert row.mean_drawdown == pytest.approx(0.0 if direction > 0 else -move[row.horizon])
+
+
+def test_sma_crossover_rule_matches_identify_crossovers():
+    data = fixtures.ohlcv(1500, seed=2)
+    panel = PricePanel.from_history("AAA", data)
+    rule = backtest.RULES["sma20_50_crossover"][1](panel)[:, 0]
+    expected = signals.identify_crossovers(data.copy())
+    assert [(panel.index[i], "up" if rule[i] > 0 else "down") for i in np.flatnonzero(rule)] == expected
+
+
+def test_summarize_pools_the_signals():
+    frame = pd.concat({ticker: fixtures.ohlcv(600, seed=i) for i, ticker in enumerate(fixtures.PEERS)}, axis=1).swaplevel(axis=1)
+    results = backtest.backtest(PricePanel.from_frame(frame, fixtures.PEERS), ["rsi_extremes"], horizons=(5,))
+    pooled = backtest.summarize(results).loc[("rsi_extremes", 5)]
+    assert pooled["signals"] == results["signals"].sum()
+    weighted = (results["mean_return"] * results["signals"]).sum() / results["signals"].sum()
+    assert pooled["mean_return"] == pytest.approx(weighted)
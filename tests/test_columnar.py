@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+
+import columnar
+from benchmarks import fixtures
+
+
+def bars(n=257):
+    data = fixtures.ohlcv(n)
+    data["Volume"] = data["Volume"] * 1000 + 1  # beyond float32's 2**24
+    data["Dividends"] = 0.0
+    data.iloc[-1, data.columns.get_loc("Dividends")] = 0.24
+    data["Stock Splits"] = 0.0
+    return data
+
+
+def test_round_trip(tmp_path):
+    data = bars()
+    path = str(tmp_path / "BARS.cols")
+    columnar.write(path, data)
+    frame = columnar.read(path).frame()
+    assert frame.index.equals(data.index)
+    assert list(frame.columns) == list(data.columns)
+    for column in ("Open", "High", "Low", "Close"):
+        assert frame[column].dtype == np.float32
+        np.testing.assert_allclose(frame[column], data[column], rtol=1e-6)
+    # Compared with fetched values by the price store, so they must come back exactly
+    for column in columnar.FLOAT64_COLUMNS:
+        assert (frame[column] == data[column]).all(), column
+
+
+def test_frame_is_a_view_of_the_mapping(tmp_path):
+    path = str(tmp_path / "BARS.cols")
+    columnar.write(path, bars())
+    columns = columnar.read(path)
+    frame = columns.frame()
+    assert np.shares_memory(frame["Close"].to_numpy(), columns.column("Close"))
+    assert np.shares_memory(frame["Volume"].to_numpy(), columns.column("Volume"))
+
+
+def test_empty_and_missing(tmp_path):
+    path = str(tmp_path / "EMPTY.cols")
+    columnar.write(path, pd.DataFrame({"Close": []}, index=pd.DatetimeIndex([], name="Date")))
+    assert len(columnar.read(path).frame()) == 0
+    assert columnar.read(str(tmp_path / "MISSING.cols")) is None
+
+
+def test_rewrite_is_picked_up(tmp_path):
+    path = str(tmp_path / "BARS.cols")
+    columnar.write(path, bars(100))
+    assert len(columnar.read(path)) == 100
+    columnar.write(path, bars(120))
+    assert len(columnar.read(path)) == 120
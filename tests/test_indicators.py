@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+
+from benchmarks import fixtures
+from indicators import IndicatorSet
+
+
+# The app5 indicators recomputed from scratch with pandas, as ta computes them
+def recompute(df):
+    close = df["Close"]
+    change = close.diff()
+    gains = change.clip(lower=0).ewm(alpha=1 / 14, min_periods=14, adjust=True).mean()
+    losses = (-change).clip(lower=0).ewm(alpha=1 / 14, min_periods=14, adjust=True).mean()
+    rolling = close.rolling(20, min_periods=20)
+    mid, std = rolling.mean(), rolling.std(ddof=0)
+    return pd.DataFrame({
+        "SMA20": mid,
+        "SMA50": close.rolling(50, min_periods=50).mean(),
+        "RSI": 100 * gains / (gains + losses),
+        "BBL_20_2.0": mid - 2 * std,
+        "BBM_20_2.0": mid,
+        "BBU_20_2.0": mid + 2 * std,
+    })
+
+
+def assert_matches(frame, df):
+    expected = recompute(df).loc[frame.index]
+    for column in expected.columns:
+        np.testing.assert_allclose(frame[column], expected[column], rtol=1e-9, atol=1e-9, err_msg=column)
+
+
+def test_full_history():
+    df = fixtures.ohlcv(1500)
+    indicators = IndicatorSet().update(df)
+    assert_matches(indicators.frame(df), df)
+
+
+def test_incremental_updates_match_a_full_recompute():
+    df = fixtures.ohlcv(1500)
+    indicators = IndicatorSet()
+    for end in (100, 101, 700, 1499, 1500):
+        indicators.update(df.iloc[:end])
+    assert_matches(indicators.frame(df), df)
+
+
+def test_revised_last_bar_is_replayed():
+    df = fixtures.ohlcv(600)
+    indicators = IndicatorSet().update(df)
+    revised = df.copy()
+    revised.iloc[-1, revised.columns.get_loc("Close")] *= 1.05
+    indicators.update(revised)
+    assert_matches(indicators.frame(revised), revised)
+
+
+# A split re-adjusts every earlier bar; the state has to start over
+def test_readjusted_history_is_recomputed():
+    df = fixtures.ohlcv(600)
+    indicators = IndicatorSet().update(df)
+    adjusted = df.copy()
+    adjusted[["Open", "High", "Low", "Close"]] /= 4
+    indicators.update(adjusted)
+    assert_matches(indicators.frame(adjusted), adjusted)
+
+
+def test_frame_of_a_window():
+    df = fixtures.ohlcv(1000)
+    indicators = IndicatorSet().update(df)
+    window = df.iloc[700:900]
+    frame = indicators.frame(window)
+    assert list(frame.index) == list(window.index)
+    assert_matches(frame, df)
+    assert not np.isnan(frame["SMA50"]).any()
+
+
+def test_different_history_resets():
+    indicators = IndicatorSet().update(fixtures.ohlcv(300, seed=1))
+    df = fixtures.ohlcv(300, seed=2, start="2000-01-03")
+    indicators.update(df)
+    assert_matches(indicators.frame(df), df)
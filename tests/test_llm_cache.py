@@ -0,0 +1,63 @@
+import time
+from types import SimpleNamespace
+
+import llm_cache
+from llm_cache import LLMCache
+
+
+def cache(tmp_path, **kwargs):
+    return LLMCache(path=str(tmp_path / "cache.sqlite3"), **kwargs)
+
+
+def test_key_covers_the_whole_request(tmp_path):
+    c = cache(tmp_path)
+    params = {"model": "m", "max_tokens": 300, "messages": [{"role": "user", "content": "hi"}]}
+    assert c.key("anthropic", params) == c.key("anthropic", dict(reversed(list(params.items()))))
+    assert c.key("anthropic", params) != c.key("openai", params)
+    assert c.key("anthropic", params) != c.key("anthropic", dict(params, max_tokens=500))
+
+
+def test_hit_and_miss(tmp_path):
+    c = cache(tmp_path)
+    assert c.get("a") is None
+    c.set("a", "reply")
+    assert c.get("a") == "reply"
+    assert c.stats() == {"hits": 1, "misses": 1, "hit_rate": 0.5, "entries": 1}
+
+
+def test_entries_expire_after_the_ttl(tmp_path, monkeypatch):
+    now = [time.time()]
+    monkeypatch.setattr(llm_cache, "time", SimpleNamespace(time=lambda: now[0]))
+    c = cache(tmp_path, ttl=60)
+    c.set("a", "reply")
+    now[0] += 59
+    assert c.get("a") == "reply"
+    now[0] += 2
+    assert c.get("a") is None
+    assert c.stats()["entries"] == 0
+
+
+def test_least_recently_used_are_evicted(tmp_path, monkeypatch):
+    now = [time.time()]
+    monkeypatch.setattr(llm_cache, "time", SimpleNamespace(time=lambda: now[0]))
+    c = cache(tmp_path, max_entries=3)
+    for key in "abc":
+        now[0] += 1
+        c.set(key, key)
+    now[0] += 1
+    c.get("a")  # "b" is now the least recently used
+    now[0] += 1
+    c.set("d", "d")
+    assert [c.get(key) for key in "abcd"] == ["a", None, "c", "d"]
+
+
+def test_delete(tmp_path):
+    c = cache(tmp_path)
+    c.set("a", "reply")
+    c.delete("a")
+    assert c.get("a") is None
+
+
+def test_shared_between_instances(tmp_path):
+    cache(tmp_path).set("a", "reply")
+    assert cache(tmp_path).get("a") == "reply"
@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+
+from benchmarks import fixtures
+from panel import PricePanel
+
+
+def peers(n=400, gaps=True):
+    close = pd.DataFrame({ticker: fixtures.ohlcv(n, seed=i)["Close"] for i, ticker in enumerate(fixtures.PEERS)})
+    if gaps:
+        close.iloc[:30, 1] = np.nan  # listed later
+        close.iloc[200:205, 2] = np.nan  # missing bars
+    return close, PricePanel.from_frame(pd.concat({"Close": close}, axis=1))
+
+
+def test_returns_and_rebasing_match_pandas():
+    close, panel = peers()
+    filled = close.ffill()
+    pd.testing.assert_frame_equal(panel.returns(), filled.pct_change(fill_method=None), check_freq=False)
+    first = filled.apply(lambda column: column.dropna().iloc[0])
+    pd.testing.assert_frame_equal(panel.rebased(), filled / first * 100, check_freq=False)
+
+
+def test_rolling_correlation_matches_pandas():
+    close, panel = peers()
+    returns = close.ffill().pct_change(fill_method=None)
+    correlation = panel.rolling_correlation(60)
+    assert correlation.shape == (len(close), len(fixtures.PEERS), len(fixtures.PEERS))
+    for i, a in enumerate(fixtures.PEERS):
+        for j, b in enumerate(fixtures.PEERS):
+            expected = returns[a].rolling(60).corr(returns[b]).to_numpy()
+            np.testing.assert_allclose(correlation[:, i, j], expected, atol=1e-8, equal_nan=True, err_msg=f"{a}/{b}")
+
+
+def test_correlation_with_one_ticker():
+    close, panel = peers(gaps=False)
+    frame = panel.correlation_with("MSFT", 20)
+    assert list(frame.columns) == [t for t in fixtures.PEERS if t != "MSFT"]
+    expected = close.pct_change(fill_method=None)["MSFT"].rolling(20).corr(close.pct_change(fill_method=None)["AAPL"])
+    np.testing.assert_allclose(frame["AAPL"], expected, atol=1e-8, equal_nan=True)
+
+
+def test_since_and_dropna():
+    close, panel = peers()
+    assert panel.since(close.index[100]).index[0] == close.index[100]
+    close.iloc[50] = np.nan
+    panel = PricePanel.from_frame(pd.concat({"Close": close}, axis=1))
+    assert len(panel.dropna()) == len(close) - 1
+
+
+def test_empty_panel():
+    panel = PricePanel(pd.DatetimeIndex([]), ["AAA"], {"Close": np.empty((0, 1))})
+    assert panel.empty
+    assert panel.normalized().empty
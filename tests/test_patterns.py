@@ -0,0 +1,42 @@
+import numpy as np
+
+from benchmarks import fixtures
+from patterns import pattern_signals, scan_patterns
+
+ORDER = 5
+
+
+def arrays(df):
+    return [df[field].to_numpy() for field in ("Open", "High", "Low", "Close")]
+
+
+# A signal on bar t may only depend on bars up to t: the signals of every
+# prefix agree with those of the whole history on the prefix's last bar
+def test_pattern_signals_do_not_look_ahead():
+    df = fixtures.ohlcv(400, seed=3)
+    full = pattern_signals(*arrays(df), order=ORDER)
+    assert np.count_nonzero(full[:-1] != 0) > 0
+    for end in range(1, len(df) + 1):
+        prefix = pattern_signals(*arrays(df.iloc[:end]), order=ORDER)
+        assert prefix[-1] == full[end - 1], f"bar {end - 1}"
+
+
+# Lows at bars 10 and 30: the double bottom is only known once bar 35 has
+# shown that bar 30 was a swing low, so the buy comes at bar 35
+def test_double_bottom_acts_after_confirmation():
+    low = np.concatenate([
+        np.linspace(100, 90, 11), np.linspace(90, 100, 11)[1:], np.linspace(100, 90, 11)[1:], np.linspace(90, 100, 11)[1:],
+    ])
+    close = low + 0.5
+    signals = pattern_signals(close, low + 1, low, close, order=ORDER)
+    assert signals[30 + ORDER] == 1
+    assert not signals[30:30 + ORDER].any()
+
+
+def test_scan_patterns_dates_match_the_signals():
+    df = fixtures.ohlcv(2000, seed=4)
+    signals = pattern_signals(*arrays(df), order=ORDER)
+    for occurrence in scan_patterns(df, ORDER):
+        if occurrence["Pattern"] == "Shooting Star":
+            # Shooting stars are applied last, so their sell wins a shared bar
+            assert signals[df.index.get_loc(occurrence["Date"])] == -1
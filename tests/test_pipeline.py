@@ -0,0 +1,70 @@
+from types import SimpleNamespace
+
+import pipeline
+from pipeline import Pipeline
+
+
+def build(store, params, calls, ttl=None):
+    p = Pipeline("test", params, store)
+
+    @p.stage(inputs=("ticker",), ttl=ttl)
+    def data(ticker):
+        calls.append("data")
+        return f"prices of {ticker}"
+
+    @p.stage(inputs=("data", "window"))
+    def signals(data, window):
+        calls.append("signals")
+        return f"{data} over {window}"
+
+    @p.stage(inputs=("ticker",))
+    def info(ticker):
+        calls.append("info")
+        return f"info of {ticker}"
+    return p
+
+
+def test_unchanged_inputs_run_nothing():
+    store, calls = {}, []
+    assert build(store, {"ticker": "AAA", "window": 20}, calls).run("signals") == "prices of AAA over 20"
+    assert calls == ["data", "signals"]
+    p = build(store, {"ticker": "AAA", "window": 20}, calls)
+    assert p.run("signals") == "prices of AAA over 20"
+    assert p.executed == [] and calls == ["data", "signals"]
+
+
+def test_changed_parameter_reruns_only_the_stages_below_it():
+    store, calls = {}, []
+    p = build(store, {"ticker": "AAA", "window": 20}, calls)
+    p.run("signals"), p.run("info")
+    p = build(store, {"ticker": "AAA", "window": 50}, calls)
+    assert p.run("signals") == "prices of AAA over 50" and p.run("info") == "info of AAA"
+    assert p.executed == ["signals"]
+    p = build(store, {"ticker": "BBB", "window": 50}, calls)
+    p.run("signals"), p.run("info")
+    assert p.executed == ["data", "signals", "info"]
+
+
+def test_invalidate_reruns_the_stage_and_everything_below():
+    store, calls = {}, []
+    p = build(store, {"ticker": "AAA", "window": 20}, calls)
+    p.run("signals"), p.run("info")
+    p.invalidate("data")
+    p = build(store, {"ticker": "AAA", "window": 20}, calls)
+    p.run("signals"), p.run("info")
+    assert p.executed == ["data", "signals"]
+
+
+def test_ttl_reruns_once_per_period(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(pipeline, "time", SimpleNamespace(time=lambda: now[0]))
+    store, calls = {}, []
+    build(store, {"ticker": "AAA", "window": 20}, calls, ttl=60).run("signals")
+    now[0] += 10
+    p = build(store, {"ticker": "AAA", "window": 20}, calls, ttl=60)
+    p.run("signals")
+    assert p.executed == []
+    now[0] += 60
+    p = build(store, {"ticker": "AAA", "window": 20}, calls, ttl=60)
+    p.run("signals")
+    assert p.executed == ["data", "signals"]
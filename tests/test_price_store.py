@@ -0,0 +1,130 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import price_store
+import providers
+from benchmarks import fixtures
+
+
+# Serves slices of one history and records every requested range (anything
+# else is left to the replay provider, which finds nothing recorded)
+class FakeProvider(providers.ReplayProvider):
+    def __init__(self, data):
+        super().__init__()
+        self.data = data
+        self.calls = []
+
+    def _bars(self, start, end):
+        data = self.data
+        if start is not None:
+            data = data[data.index >= pd.Timestamp(start)]
+        if end is not None:
+            data = data[data.index < pd.Timestamp(end)]
+        return data.copy()
+
+    def history(self, ticker, interval, start=None, end=None):
+        self.calls.append(("history", ticker, start, end))
+        return self._bars(start, end)
+
+    def download(self, tickers, interval, start=None, end=None):
+        self.calls.append(("download", tuple(tickers), start, end))
+        return {ticker: self._bars(start, end) for ticker in tickers}
+
+
+def bars(n=600):
+    data = fixtures.ohlcv(n, start="2020-01-01")
+    return data.assign(Dividends=0.0, **{"Stock Splits": 0.0})
+
+
+@pytest.fixture(params=sorted(price_store.BACKENDS))
+def store(request, monkeypatch, tmp_path):
+    monkeypatch.setattr(price_store, "STORE_DIR", str(tmp_path))
+    monkeypatch.setattr(price_store, "_backend", price_store.BACKENDS[request.param]())
+    provider = FakeProvider(bars())
+
+    def use(data=None):
+        if data is not None:
+            provider.data = data
+        monkeypatch.setattr(providers, "get_provider", lambda: provider)
+        return provider
+    return use
+
+
+def test_first_load_fetches_the_range_once(store):
+    provider = store()
+    start = datetime(2021, 1, 1)
+    data = price_store.get_history("AAA", start=start)
+    assert provider.calls == [("history", "AAA", start, None)]
+    assert data.index[0] >= pd.Timestamp(start)
+    assert len(price_store.get_history("AAA", start=start)) == len(data)
+    assert len(provider.calls) == 1
+
+
+def test_stale_tail_fetches_from_the_last_stored_bar(store, monkeypatch):
+    provider = store(bars()[:-50])
+    price_store.get_history("AAA", start=datetime(2021, 1, 1))
+    last = price_store.get_history("AAA", start=datetime(2021, 1, 1)).index[-1]
+    provider.data = bars()
+    monkeypatch.setattr(price_store, "REFRESH_SECONDS", -1)
+    data = price_store.get_history("AAA", start=datetime(2021, 1, 1))
+    assert provider.calls[-1] == ("history", "AAA", last.to_pydatetime(), None)
+    assert data.index[-1] == bars().index[-1]
+    assert not data.index.duplicated().any()
+
+
+def test_longer_period_fetches_only_the_missing_head(store):
+    provider = store()
+    price_store.get_history("AAA", start=datetime(2021, 1, 1))
+    first = price_store.get_history("AAA", start=datetime(2021, 1, 1)).index[0]
+    data = price_store.get_history("AAA", start=datetime(2020, 3, 1))
+    assert provider.calls[-1] == ("history", "AAA", datetime(2020, 3, 1), first)
+    assert data.index[0] >= pd.Timestamp(2020, 3, 1)
+    np.testing.assert_allclose(data["Close"], provider.data.loc[data.index, "Close"], rtol=1e-6)
+
+
+# A split in the new tail means Yahoo re-adjusted every earlier bar
+def test_split_refetches_the_whole_history(store, monkeypatch):
+    provider = store(bars()[:-50])
+    price_store.get_history("AAA", start=datetime(2021, 1, 1))
+    split = bars()
+    split.iloc[:-20, :4] /= 4
+    split.iloc[-20, split.columns.get_loc("Stock Splits")] = 4.0
+    provider.data = split
+    monkeypatch.setattr(price_store, "REFRESH_SECONDS", -1)
+
+    data = price_store.get_history("AAA", start=datetime(2021, 1, 1))
+    assert provider.calls[-1] == ("history", "AAA", datetime(2021, 1, 1), None)
+    np.testing.assert_allclose(data["Close"], split.loc[data.index, "Close"], rtol=1e-6)
+
+    # The split is stored now, so the next tail does not trigger another re-fetch
+    price_store.get_history("AAA", start=datetime(2021, 1, 1))
+    assert provider.calls[-1][3] is None and provider.calls[-1][2] == data.index[-1].to_pydatetime()
+
+
+# A dividend that float32 cannot hold exactly must still compare equal to the
+# fetched one, or every refresh would re-fetch the whole history
+def test_stored_dividend_does_not_trigger_a_refetch(store, monkeypatch):
+    data = bars()
+    data.iloc[-1, data.columns.get_loc("Dividends")] = 0.24
+    provider = store(data)
+    price_store.get_history("AAA", start=datetime(2021, 1, 1))
+    monkeypatch.setattr(price_store, "REFRESH_SECONDS", -1)
+    for _ in range(2):
+        price_store.get_history("AAA", start=datetime(2021, 1, 1))
+    assert [call[2] for call in provider.calls[1:]] == [data.index[-1].to_pydatetime()] * 2
+
+
+def test_panel_batches_the_gaps(store, monkeypatch):
+    provider = store()
+    price_store.get_history("AAA", start=datetime(2021, 1, 1))
+    provider.calls.clear()
+    monkeypatch.setattr(price_store, "REFRESH_SECONDS", -1)
+
+    panel = price_store.get_panel(["AAA", "BBB", "CCC"], start=datetime(2021, 1, 1))
+    # One download for the two missing histories, one for the stale tail
+    assert [call[:2] for call in provider.calls] == [("download", ("BBB", "CCC")), ("download", ("AAA",))]
+    assert list(panel["Close"].columns) == ["AAA", "BBB", "CCC"]
+    assert not panel["Close"].isna().any().any()
@@ -0,0 +1,46 @@
+import json
+
+import pytest
+
+from prompts import ANALYSIS_FIELDS, parse_structured_analysis
+
+
+def entry(ticker):
+    return {field: f"{field} of {ticker}" for field in ANALYSIS_FIELDS}
+
+
+def test_reply_with_text_around_the_json():
+    reply = "Here is the analysis:\n" + json.dumps({"AAA": entry("AAA"), "BBB": entry("BBB")}) + "\nLet me know."
+    assert parse_structured_analysis(reply, ["AAA", "BBB"]) == {"AAA": entry("AAA"), "BBB": entry("BBB")}
+
+
+def test_incomplete_entries_are_left_out():
+    incomplete = dict(entry("BBB"), metrics="")
+    reply = json.dumps({"AAA": entry("AAA"), "BBB": incomplete})
+    assert parse_structured_analysis(reply, ["AAA", "BBB", "CCC"]) == {"AAA": entry("AAA")}
+
+
+def test_ticker_keys_ignore_case_and_spaces():
+    reply = json.dumps({" aaa ": entry("AAA")})
+    assert parse_structured_analysis(reply, ["AAA"]) == {"AAA": entry("AAA")}
+
+
+def test_single_ticker_without_the_ticker_level():
+    assert parse_structured_analysis(json.dumps(entry("AAA")), ["AAA"]) == {"AAA": entry("AAA")}
+
+
+def test_structured_fields_are_flattened():
+    reply = json.dumps({"AAA": dict(entry("AAA"), metrics={"P/E": 30, "Margin": "25%"}, consensus=["Buy", "Hold"])})
+    analysis = parse_structured_analysis(reply, ["AAA"])["AAA"]
+    assert analysis["metrics"] == "P/E: 30; Margin: 25%"
+    assert analysis["consensus"] == "Buy; Hold"
+
+
+@pytest.mark.parametrize("reply", [
+    "I cannot provide that analysis.",
+    '{"AAA": {"sentiment": "cut off at max_tok',
+    '["AAA", "BBB"]',
+])
+def test_unusable_replies_raise(reply):
+    with pytest.raises(ValueError):
+        parse_structured_analysis(reply, ["AAA", "BBB"])
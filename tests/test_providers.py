@@ -0,0 +1,17 @@
+import pytest
+
+import providers
+
+
+def test_every_provider_implements_the_interface():
+    for cls in providers.PROVIDERS.values():
+        cls()
+
+
+def test_incomplete_provider_fails_when_created():
+    class BarsOnly(providers.Provider):
+        def history(self, ticker, interval, start=None, end=None):
+            return None
+
+    with pytest.raises(TypeError, match="abstract"):
+        BarsOnly()
@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+
+import signals
+from benchmarks import fixtures
+
+
+# trending's original crossover loop, which identify_crossovers replaced
+def loop_crossovers(data):
+    crossovers = []
+    for i in range(1, len(data)):
+        if data['SMA20'].iloc[i - 1] <= data['SMA50'].iloc[i - 1] and data['SMA20'].iloc[i] > data['SMA50'].iloc[i]:
+            crossovers.append((data.index[i], 'up'))
+        elif data['SMA20'].iloc[i - 1] >= data['SMA50'].iloc[i - 1] and data['SMA20'].iloc[i] < data['SMA50'].iloc[i]:
+            crossovers.append((data.index[i], 'down'))
+    return crossovers
+
+
+def test_identify_crossovers_matches_the_loop():
+    for seed in range(5):
+        data = fixtures.ohlcv(1500, seed=seed)
+        events = signals.identify_crossovers(data)
+        assert events
+        assert events == loop_crossovers(data)
+
+
+# Equal averages (a spread of exactly zero) count as "not above" and "not below"
+def test_touching_averages_match_the_loop():
+    index = pd.bdate_range("2024-01-01", periods=8)
+    data = pd.DataFrame({
+        "SMA20": [1.0, 2.0, 2.0, 3.0, 3.0, 1.0, np.nan, 4.0],
+        "SMA50": [2.0, 2.0, 2.0, 2.0, 3.0, 3.0, 2.0, 2.0],
+    }, index=index)
+    assert signals.crossovers(data["SMA20"], data["SMA50"]) == loop_crossovers(data)
+
+
+def test_panel_matches_each_column():
+    close = pd.DataFrame({ticker: fixtures.ohlcv(800, seed=i)["Close"] for i, ticker in enumerate(fixtures.PEERS)})
+    panel = signals.sma_crossovers(close)
+    for ticker in fixtures.PEERS:
+        assert panel[ticker] == signals.sma_crossovers(close[ticker])
+    multi = signals.sma_crossovers_multi(close, pairs=((20, 50), (50, 200)))
+    assert multi[(20, 50)] == panel
+    assert multi[(50, 200)] == signals.sma_crossovers(close, 50, 200)
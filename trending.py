@@ -1,12 +1,16 @@
 import streamlit as st
-import yfinance as yf
-import pandas as pd
-import plotly.graph_objects as go
-from datetime import datetime, timedelta
-import anthropic
-from anthropic import Anthropic
-import pytz
-import ta
+from datetime import timedelta
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import price_store
+import clients
+import llm
+import signals
+import news as company_news
+from snapshot import get_snapshot
+from pipeline import Pipeline
+import prompts
+import telemetry
+from charts import crossover_chart
 
 # Streamlit app setup
 st.set_page_config(page_title="Investor Analysis App", layout="wide")
@@ -14,44 +18,24 @@ st.title("Investor Analysis App")
 
 # Anthropic API setup
 anthropic_api_key = st.secrets["ANTHROPIC_API_KEY"]
-client = Anthropic(api_key=anthropic_api_key)
+client = clients.anthropic_client(anthropic_api_key)
+
+# Maximum number of crossover analyses requested at the same time
+MAX_CONCURRENT_ANALYSES = int(st.secrets.get("MAX_CONCURRENT_ANALYSES", 4))
 
 # Function to get stock data
 def get_stock_data(ticker, period="1y"):
-    stock = yf.Ticker(ticker)
-    data = stock.history(period=period)
+    data = price_store.get_history(ticker, period=period)
     return data
 
-# Function to identify crossover events
-def identify_crossovers(data):
-    data['SMA20'] = ta.trend.sma_indicator(data['Close'], window=20)
-    data['SMA50'] = ta.trend.sma_indicator(data['Close'], window=50)
-    
-    crossovers = []
-    for i in range(1, len(data)):
-        if (data['SMA20'].iloc[i-1] <= data['SMA50'].iloc[i-1] and 
-            data['SMA20'].iloc[i] > data['SMA50'].iloc[i]):
-            crossovers.append((data.index[i], 'up'))
-        elif (data['SMA20'].iloc[i-1] >= data['SMA50'].iloc[i-1] and 
-              data['SMA20'].iloc[i] < data['SMA50'].iloc[i]):
-            crossovers.append((data.index[i], 'down'))
-    
-    return crossovers
-
 # Function to get news for a company
 def get_company_news(ticker, start_date, end_date):
-    stock = yf.Ticker("Sanofi")
-    news = stock.news
-    utc = pytz.UTC
-    start_date = utc.localize(start_date)
-    end_date = utc.localize(end_date)
-  
-    filtered_news = [n for n in news if start_date <= datetime.fromtimestamp(n['providerPublishTime'], tz=utc) <= end_date]
-    return filtered_news
+    # News is fetched once per ticker and looked up by publish time
+    return company_news.get_news_index(ticker).between(start_date, end_date)
 
 # Function to get company info
 def get_company_info(ticker):
-    stock = yf.Ticker(ticker)
+    stock = get_snapshot(ticker)
     info = stock.info
     financials = stock.financials
     balance_sheet = stock.balance_sheet
@@ -61,29 +45,14 @@ def get_company_info(ticker):
         'balance_sheet': balance_sheet.to_dict()
     }
 
-# Function to analyze crossover events
-def analyze_crossover(event_date, event_type, news, company_info):
-    news_summary = "\n".join([f"- {n['title']}" for n in news[:5]])  # Summarize up to 5 news items
-    
-    prompt = f"""
-    As a financial investor, analyze the following crossover event and provide insights:
-
-    Event Date: {event_date.strftime('%Y-%m-%d')}
-    Event Type: {event_type}
-
-    Recent News:
-    {news_summary}
+# Function to analyze crossover events; streamed text chunks are also appended
+# to `chunks` (if given) so the page can render the analysis while it arrives
+def analyze_crossover(event_date, event_type, news, company_info, chunks=None):
+    prompt = prompts.crossover_prompt(event_date, event_type, news, company_info)
 
-    Company Information:
-    - Name: {company_info['info'].get('longName', 'N/A')}
-    - Sector: {company_info['info'].get('sector', 'N/A')}
-    - Industry: {company_info['info'].get('industry', 'N/A')}
-    - Market Cap: ${company_info['info'].get('marketCap', 'N/A'):,}
-
-    Please provide a focused analysis of notable events, facts, company communications such as product announcements, investor events, M&A news, or strategy changes that could explain this crossover. Avoid technical jargon about bullish or bearish moments, and instead focus on concrete business factors. Provide both quantitative and qualitative insights in your response.
-    """
-
-    response = client.messages.create(
+    text = []
+    for chunk in llm.anthropic_stream(
+        client,
         model="claude-3-5-sonnet-20240620",
         max_tokens=1000,
         temperature=0,
@@ -91,55 +60,84 @@ def analyze_crossover(event_date, event_type, news, company_info):
         messages=[
             {"role": "user", "content": prompt}
         ]
-    )
-    
-    return response.content[0].text
+    ):
+        text.append(chunk)
+        if chunks is not None:
+            chunks.append(chunk)
+    return "".join(text)
+
+# Function to render one crossover event and its (possibly partial) analysis
+def show_crossover(placeholder, event_date, event_type, analysis):
+    with placeholder.container():
+        st.write(f"**Event Date:** {event_date.strftime('%Y-%m-%d')}")
+        st.write(f"**Event Type:** {'Upward' if event_type == 'up' else 'Downward'} Trend")
+        st.write(f"**Analysis:**")
+        st.write(analysis)
+        st.write("---")
 
 # Main app
 ticker = st.text_input("Enter a stock ticker:", value="SAN.PA")
 
 if ticker:
+    # Each stage re-executes only when one of its inputs changed, so reruns with
+    # the same ticker reuse the prices, company info and crossover analyses; the
+    # prices are read again once per price store refresh interval
+    pipeline = Pipeline("trending", {"ticker": ticker}, st.session_state)
+    pipeline.stage("data", inputs=("ticker",), ttl=price_store.REFRESH_SECONDS)(get_stock_data)
+    pipeline.stage("crossovers", inputs=("data",))(signals.identify_crossovers)
+    pipeline.stage("company_info", inputs=("ticker",))(get_company_info)
+
+    # Analyze crossover events concurrently; each analysis streams into its own slot
+    @pipeline.stage(inputs=("ticker", "crossovers", "company_info"))
+    def analyses(ticker, crossovers, company_info):
+        analyses = [None] * len(crossovers)
+        buffers = [[] for _ in crossovers]
+        shown = [0] * len(crossovers)
+        with ThreadPoolExecutor(max_workers=max(1, MAX_CONCURRENT_ANALYSES)) as executor:
+            futures = {}
+            for i, (date, event_type) in enumerate(crossovers):
+                start_date = date.replace(tzinfo=None) - timedelta(days=60)
+                end_date = date.replace(tzinfo=None)
+                news = get_company_news(ticker, start_date, end_date)
+                futures[executor.submit(analyze_crossover, date, event_type, news, company_info, buffers[i])] = i
+
+            # Worker threads only fill the buffers; all rendering happens here on the script thread
+            pending = set(futures)
+            while pending:
+                done, pending = wait(pending, timeout=0.25, return_when=FIRST_COMPLETED)
+                for future in done:
+                    i = futures[future]
+                    try:
+                        analyses[i] = future.result()
+                    except Exception as e:
+                        analyses[i] = f"Analysis unavailable ({e})"
+                    show_crossover(placeholders[i], *crossovers[i], analyses[i])
+                for future in pending:
+                    i = futures[future]
+                    if len(buffers[i]) != shown[i]:
+                        shown[i] = len(buffers[i])
+                        show_crossover(placeholders[i], *crossovers[i], "".join(buffers[i]))
+        return analyses
+
     # Get stock data
-    data = get_stock_data(ticker)
-    
-    # Create candlestick chart
-    fig = go.Figure(data=[go.Candlestick(x=data.index,
-                    open=data['Open'],
-                    high=data['High'],
-                    low=data['Low'],
-                    close=data['Close'])])
+    data = pipeline.run("data")
     
     # Identify crossover events
-    crossovers = identify_crossovers(data)
-    
-    # Add crossover events to the chart
-    for date, event_type in crossovers:
-        fig.add_annotation(
-            x=date,
-            y=data.loc[date, 'High'] if event_type == 'up' else data.loc[date, 'Low'],
-            text='↑' if event_type == 'up' else '↓',
-            showarrow=False,
-            font=dict(size=20, color='blue' if event_type == 'up' else 'black')
-        )
+    crossovers = pipeline.run("crossovers")
     
-    # Display the chart
-    st.plotly_chart(fig, use_container_width=True)
+    # Display the candlestick chart with the crossover events
+    st.plotly_chart(crossover_chart(data, crossovers), use_container_width=True)
     
-    # Get company info
-    company_info = get_company_info(ticker)
-    
-    # Analyze crossover events
     st.subheader("Crossover Event Analysis")
+    placeholders = []
     for date, event_type in crossovers:
-        start_date = date.replace(tzinfo=None) - timedelta(days=60)
-        end_date = date.replace(tzinfo=None)
-        news = get_company_news(ticker, start_date, end_date)
-        analysis = analyze_crossover(date, event_type, news, company_info)
-        
-        st.write(f"**Event Date:** {date.strftime('%Y-%m-%d')}")
-        st.write(f"**Event Type:** {'Upward' if event_type == 'up' else 'Downward'} Trend")
-        st.write(f"**Analysis:**")
-        st.write(analysis)
-        st.write("---")
+        placeholder = st.empty()
+        placeholder.caption(f"Analyzing {date.strftime('%Y-%m-%d')} crossover...")
+        placeholders.append(placeholder)
+
+    for placeholder, (date, event_type), analysis in zip(placeholders, crossovers, pipeline.run("analyses")):
+        show_crossover(placeholder, date, event_type, analysis)
 
 st.sidebar.write("This app analyzes stock data and provides insights on trend changes.")
+llm.show_cache_stats()
+telemetry.show_telemetry()
@@ -1,12 +1,9 @@
 import streamlit as st
-import yfinance as yf
-import pandas as pd
 import plotly.graph_objects as go
-from datetime import datetime, timedelta
-import anthropic
-from anthropic import Anthropic
-import pytz
-import ta
+from datetime import datetime, timedelta, timezone
+import clients
+import llm
+import telemetry
 
 # Streamlit app setup
 st.set_page_config(page_title="Investor Analysis App", layout="wide")
@@ -14,16 +11,20 @@ st.title("Investor Analysis App")
 
 # Anthropic API setup
 anthropic_api_key = st.secrets["ANTHROPIC_API_KEY"]
-client = Anthropic(api_key=anthropic_api_key)
+client = clients.anthropic_client(anthropic_api_key)
 
 # Function to get stock data
 def get_stock_data(ticker, period="1y"):
-    stock = yf.Ticker(ticker)
+    import yfinance as yf
+
+    stock = yf.Ticker(ticker, session=clients.yahoo_session())
     data = stock.history(period=period)
     return data
 
 # Function to identify crossover events
 def identify_crossovers(data):
+    import ta
+
     data['SMA20'] = ta.trend.sma_indicator(data['Close'], window=20)
     data['SMA50'] = ta.trend.sma_indicator(data['Close'], window=50)
     
@@ -40,18 +41,21 @@ def identify_crossovers(data):
 
 # Function to get news for a company
 def get_company_news(ticker, start_date, end_date):
-    stock = yf.Ticker("Sanofi")
+    import yfinance as yf
+
+    stock = yf.Ticker("Sanofi", session=clients.yahoo_session())
     news = stock.news
-    utc = pytz.UTC
-    start_date = utc.localize(start_date)
-    end_date = utc.localize(end_date)
+    start_date = start_date.replace(tzinfo=timezone.utc)
+    end_date = end_date.replace(tzinfo=timezone.utc)
   
-    filtered_news = [n for n in news if start_date <= datetime.fromtimestamp(n['providerPublishTime'], tz=utc) <= end_date]
+    filtered_news = [n for n in news if start_date <= datetime.fromtimestamp(n['providerPublishTime'], tz=timezone.utc) <= end_date]
     return filtered_news
 
 # Function to get company info
 def get_company_info(ticker):
-    stock = yf.Ticker(ticker)
+    import yfinance as yf
+
+    stock = yf.Ticker(ticker, session=clients.yahoo_session())
     info = stock.info
     financials = stock.financials
     balance_sheet = stock.balance_sheet
@@ -83,7 +87,8 @@ def analyze_crossover(event_date, event_type, news, company_info):
     Please provide a focused analysis of notable events, facts, company communications such as product announcements, investor events, M&A news, or strategy changes that could explain this crossover. Avoid technical jargon about bullish or bearish moments, and instead focus on concrete business factors. Provide both quantitative and qualitative insights in your response.
     """
 
-    response = client.messages.create(
+    return llm.anthropic_text(
+        client,
         model="claude-3-5-sonnet-20240620",
         max_tokens=1000,
         temperature=0,
@@ -92,8 +97,6 @@ def analyze_crossover(event_date, event_type, news, company_info):
             {"role": "user", "content": prompt}
         ]
     )
-    
-    return response.content[0].text
 
 # Main app
 ticker = st.text_input("Enter a stock ticker:", value="SAN.PA")
@@ -143,3 +146,5 @@ if ticker:
         st.write("---")
 
 st.sidebar.write("This app analyzes stock data and provides insights on trend changes.")
+llm.show_cache_stats()
+telemetry.show_telemetry()